@@ -1,11 +1,14 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk
-from ultralytics import YOLO
-import cv2
 import os
-import numpy as np
 import sys
+from lazy_imports import lazy_import, run_in_background
+# OpenCV/NumPy are only needed once an image is predicted
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+detection_arrays = lazy_import("detection_arrays")
+detection_cache = lazy_import("detection_cache")
 
 # Modern color scheme
 BG_COLOR = "#232946"
@@ -17,6 +20,14 @@ SLIDER_COLOR = "#b8c1ec"
 LABEL_FONT = ("Segoe UI", 16, "bold")
 BTN_FONT = ("Segoe UI", 12, "bold")
 
+def _load_image_model():
+    # Imported here: pulls in ultralytics/torch, which the window does not need to appear
+    from model_registry import get_model, resolve_model_path, IMAGE_MODEL
+    weights_path = resolve_model_path(*IMAGE_MODEL)
+    model, backend = get_model(weights_path)
+    return model, backend, weights_path
+
+
 class FireDetectionApp:
     def __init__(self, root):
         self.root = root
@@ -24,18 +35,19 @@ class FireDetectionApp:
         self.root.geometry("850x430")
         self.root.configure(bg=BG_COLOR)
         
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        model_name = "fire_8l.pt"
-        model_path = os.path.join(base_dir, "models", model_name)
-
-        # Check if model exists in src/models, if not check root/models
-        if not os.path.exists(model_path):
-            possible_path = os.path.join(base_dir, "..", "models", model_name)
-            if os.path.exists(possible_path):
-                model_path = possible_path
-
-        self.model = YOLO(model_path)
+        # Load the model in the background so the window shows up immediately;
+        # fastest available runtime (OpenVINO/ONNX export cached on first use, else PyTorch)
+        self.model = None
+        self.backend = None
+        self.weights_path = None
+        self.model_future = run_in_background(_load_image_model)
         self.image_path = None
+        # Detections of the current image at raw_conf (the cache's confidence floor,
+        # or the slider if lower); the slider only filters them (opened on first prediction)
+        self.cache = None
+        self.image_bgr = None
+        self.raw_dets = None
+        self.raw_conf = None
 
         # Title label
         title = tk.Label(self.root, text="🔥 Fire Detection with YOLOv8 🔥", font=("Segoe UI", 22, "bold"), bg=BG_COLOR, fg=FG_COLOR)
@@ -70,6 +82,7 @@ class FireDetectionApp:
         tk.Label(slider_frame, text="Confidence Threshold:", font=BTN_FONT, bg=BG_COLOR, fg=FG_COLOR).pack(side=tk.LEFT, padx=(0, 10))
         self.confidence_var = tk.DoubleVar(value=0.5)
         self.conf_slider = tk.Scale(slider_frame, from_=0.0, to=1.0, orient=tk.HORIZONTAL, resolution=0.1, variable=self.confidence_var, length=300,
+                                    command=self.on_threshold_change,
                                     bg=BG_COLOR, fg=FG_COLOR, troughcolor=SLIDER_COLOR, highlightbackground=FG_COLOR, font=BTN_FONT, bd=0)
         self.conf_slider.pack(side=tk.LEFT)
 
@@ -96,6 +109,8 @@ class FireDetectionApp:
         file_path = filedialog.askopenfilename(filetypes=[("Image Files", "*.jpg;*.jpeg;*.png;*.bmp")])
         if file_path:
             self.image_path = file_path
+            self.image_bgr = None
+            self.raw_dets = None
             img = Image.open(file_path)
             img_fixed = self.resize_to_fixed_size(img)
             self.tk_img = ImageTk.PhotoImage(img_fixed)
@@ -106,21 +121,71 @@ class FireDetectionApp:
         if not self.image_path:
             messagebox.showwarning("No Image", "Please load an image first.")
             return
+        if self.model is None:
+            if not self.model_future.done():
+                # Retry once the background load has finished, without blocking the UI
+                self.result_label.config(text="Loading model...", fg=FG_COLOR)
+                self.root.after(100, self.predict)
+                return
+            try:
+                self.model, self.backend, self.weights_path = self.model_future.result()
+            except Exception as e:
+                messagebox.showerror("Model Error", f"Could not load the model: {e}")
+                return
         try:
             conf_thresh = self.confidence_var.get()
+            if self.raw_dets is None or conf_thresh < self.raw_conf:
+                # Use imdecode to handle paths with special characters (e.g., "Università")
+                self.image_bgr = cv2.imdecode(np.fromfile(self.image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
+                self.raw_conf = min(conf_thresh, detection_cache.CONF_FLOOR)
+                self.raw_dets = self.raw_detections(self.raw_conf)
+        except Exception as e:
+            messagebox.showerror("Prediction Error", str(e))
+            return
+        self.show_detections(self.confidence_var.get())
+
+    def raw_detections(self, conf_thresh):
+        """
+        Detections of the current image at conf_thresh, from the detection
+        cache when this image was already predicted with these weights. Only
+        thresholds at the cache's confidence floor are cached; lower ones
+        always run the model.
+        """
+        if conf_thresh < detection_cache.CONF_FLOOR:
             results = self.model(self.image_path, conf=conf_thresh)
-            # Use imdecode to handle paths with special characters (e.g., "Università")
-            img = cv2.imdecode(np.fromfile(self.image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
-            fire_detected = False
-            for r in results:
-                boxes = r.boxes
-                for box in boxes:
-                    if float(box.conf[0]) >= conf_thresh:
-                        fire_detected = True
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
-                        cv2.rectangle(img, (x1, y1), (x2, y2), (238, 187, 195), 3)
-                        label = f"{self.model.names[int(box.cls[0])]}: {box.conf[0]:.2f}"
-                        cv2.putText(img, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (238, 187, 195), 2)
+            return np.concatenate([detection_arrays.from_result(r) for r in results])
+        if self.cache is None:
+            try:
+                self.cache = detection_cache.DetectionCache()
+            except Exception as e:
+                print(f"Warning: Detection cache unavailable. {e}")
+                self.cache = False
+        key = None
+        if self.cache:
+            key = self.cache.key(self.image_path, self.weights_path)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached[0]
+        results = self.model(self.image_path, conf=detection_cache.CONF_FLOOR)
+        dets = np.concatenate([detection_arrays.from_result(r) for r in results])
+        if key is not None:
+            self.cache.put(key, dets)
+        return dets
+
+    def on_threshold_change(self, value):
+        # Re-filter the current prediction instead of running the model again,
+        # unless the slider went below the threshold it was made at
+        if self.raw_dets is not None:
+            if float(value) < self.raw_conf:
+                self.predict()
+            else:
+                self.show_detections(float(value))
+
+    def show_detections(self, conf_thresh):
+        try:
+            img = self.image_bgr.copy()
+            dets = detection_cache.filter_conf(self.raw_dets, conf_thresh)
+            fire_detected = detection_arrays.draw(img, dets, self.model.names, color=(238, 187, 195))
             img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
             img_pil = Image.fromarray(img_rgb)
             img_fixed = self.resize_to_fixed_size(img_pil)
@@ -135,6 +200,8 @@ class FireDetectionApp:
 
     def reset(self):
         self.image_path = None
+        self.image_bgr = None
+        self.raw_dets = None
         self.tk_img = ImageTk.PhotoImage(self.placeholder_img)
         self.img_label.config(image=self.tk_img)
         self.result_label.config(text="")
@@ -1,12 +1,16 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk
+from PIL import Image
 import os
 import sys
 import time
 from fire_detection_logic import FireVideoProcessor
-import serial
-import serial.tools.list_ports
+from fire_metrics import enable_from_env
+from frame_display import FrameDisplay
+from fire_pipeline import FramePipeline, BLOCK
+from model_registry import resolve_model_path, VIDEO_MODEL
+from alarm_transport import AlarmTransport
+from event_clips import export_options_from_env
 
 # Modern color scheme
 BG_COLOR = "#232946"
@@ -29,25 +33,29 @@ class FireDetectionApp:
         # Handle window closing
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
-        # Initialize the logic processor
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        model_name = "fire_8n30.pt"
-        model_path = os.path.join(base_dir, "models", model_name)
-
-        # Check if model exists in src/models, if not check root/models
-        if not os.path.exists(model_path):
-            possible_path = os.path.join(base_dir, "..", "models", model_name)
-            if os.path.exists(possible_path):
-                model_path = possible_path
-
+        # Initialize the logic processor; the weights are shared via the registry
+        model_path = resolve_model_path(*VIDEO_MODEL)
         self.processor = FireVideoProcessor(model_path)
+        # Offline files: run sampled frames through the model in auto-sized batches
+        self.processor.enable_batching("auto", latency_budget_ms=250)
+        # Keep playback at real time on slow CPUs; stride 1 while fire is suspected
+        self.processor.enable_adaptive_stride()
+        # Move boxes with the fire between inferences instead of redrawing stale ones
+        self.processor.enable_tracking()
+        # Report fire once k of the last n frames agree, not on a single positive frame
+        self.processor.enable_confirmation()
+        # Evidence clips around fire events (FIRE_CLIP_DIR / FIRE_EXPORT_ANNOTATED), encoded off the detection path
+        export_options = export_options_from_env()
+        if export_options:
+            self.processor.enable_export(**export_options)
+        self.pipeline = None
         self.video_path = None
         self.is_running = False
         self.after_id = None
-        self.last_fire_state = False
 
-        # --- ESP32 Serial Connection ---
-        self.ser = self.detect_and_connect_esp32()
+        # --- ESP32 Alarm (scan, writes and reconnects run on the transport's own thread) ---
+        self.alarm = AlarmTransport()
+        self.alarm.start()
         
         # Title label
         title = tk.Label(self.root, text="🔥 Fire Detection with YOLOv8 🔥", font=("Segoe UI", 22, "bold"), bg=BG_COLOR, fg=FG_COLOR)
@@ -58,8 +66,11 @@ class FireDetectionApp:
         img_frame.pack(pady=3)
         self.display_size = (300, 200)
         self.placeholder_img = Image.new("RGB", self.display_size, "black")
-        self.tk_img = ImageTk.PhotoImage(self.placeholder_img)
-        self.img_label = tk.Label(img_frame, image=self.tk_img, bg=BG_COLOR)
+        self.img_label = tk.Label(img_frame, bg=BG_COLOR)
+        # One persistent PhotoImage, updated in place with thumbnail-size conversions
+        self.display = FrameDisplay(self.img_label, self.display_size)
+        self.display.show_image(self.placeholder_img)
+        self.processor.convert_rgb = False
         self.img_label.pack(padx=10, pady=2)
 
         # Result label
@@ -93,22 +104,6 @@ class FireDetectionApp:
         if __name__ == "__main__":
             self.check_reload()
 
-    def detect_and_connect_esp32(self):
-        """Automatically detects and connects to an ESP32 device."""
-        try:
-            ports = serial.tools.list_ports.comports()
-            # Common identifiers for ESP32 USB drivers
-            target_descriptors = ["CP210", "CH340", "USB Serial", "USB-to-Serial", "USB UART"]
-            for port in ports:
-                if any(desc in port.description for desc in target_descriptors):
-                    print(f"Connecting to ESP32 on {port.device} ({port.description})...")
-                    return serial.Serial(port.device, 115200, timeout=1)
-            print("Warning: No ESP32-like device found.")
-            return None
-        except Exception as e:
-            print(f"Warning: Could not connect to ESP32. {e}")
-            return None
-
     def check_reload(self):
         try:
             current_mtime = os.stat(self.script_path).st_mtime
@@ -120,25 +115,20 @@ class FireDetectionApp:
             print(f"Error checking reload: {e}")
         self.root.after(1000, self.check_reload)
 
-    def resize_to_fixed_size(self, img_pil):
-        return img_pil.resize(self.display_size, Image.LANCZOS)
-
     def load_video(self):
         file_path = filedialog.askopenfilename(filetypes=[("Video Files", "*.mp4;*.avi;*.mov;*.mkv")])
         if file_path:
+            # Stop reading the previous video before swapping the capture source
+            self.is_running = False
+            self.stop_pipeline()
             if self.processor.load_video(file_path):
                 self.video_path = file_path
                 # Get a preview frame
-                frame_rgb, success = self.processor.get_first_frame()
+                frame, success = self.processor.get_first_frame()
                 if success:
-                    img_pil = Image.fromarray(frame_rgb)
-                    img_fixed = self.resize_to_fixed_size(img_pil)
-                    self.tk_img = ImageTk.PhotoImage(img_fixed)
-                    self.img_label.config(image=self.tk_img)
+                    self.display.show(frame)
                 self.result_label.config(text="Video Loaded")
-                
-                if not self.is_running:
-                    self.start_detection()
+                self.start_detection()
             else:
                 self.video_path = None
                 messagebox.showerror("Error", "Failed to load video.")
@@ -150,80 +140,88 @@ class FireDetectionApp:
         if not self.video_path:
             messagebox.showwarning("No Video", "Please load a video first.")
             return
+        # Files must not lose frames: the capture blocks while inference catches up
+        self.pipeline = FramePipeline(self.processor, drop_policy=BLOCK,
+                                      conf_thresh=self.confidence_var.get())
+        self.pipeline.start()
         self.is_running = True
         self.process_frame()
 
+    def stop_pipeline(self):
+        if self.after_id:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        if self.pipeline:
+            self.pipeline.stop()
+            self.pipeline = None
+
     def process_frame(self):
         start_time = time.time()
         if not self.is_running:
             return
         
-        conf_thresh = self.confidence_var.get()
-        frame_rgb, fire_detected, status = self.processor.process_next_frame(conf_thresh)
+        # Capture and inference run in the pipeline threads; here we only consume results
+        self.pipeline.conf_thresh = self.confidence_var.get()
+        result = self.pipeline.get_result()
+        if result is None:
+            self.after_id = self.root.after(5, self.process_frame)
+            return
+        frame, fire_detected, status = result
         
         if status == "finished":
             self.is_running = False
+            self.stop_pipeline()
             self.result_label.config(text="Video Finished")
             return
         elif status == "error":
             self.is_running = False
+            self.stop_pipeline()
             return
             
         # Update Image
-        if frame_rgb is not None:
-            img_pil = Image.fromarray(frame_rgb)
-            img_fixed = self.resize_to_fixed_size(img_pil)
-            self.tk_img = ImageTk.PhotoImage(img_fixed)
-            self.img_label.config(image=self.tk_img)
+        if frame is not None:
+            self.display.show(frame)
         
         # Update Status Label
+        # Queued for the ESP32 without blocking; repeated states are coalesced
+        self.alarm.set_fire(fire_detected)
         if fire_detected:
-            # Send signal only if state changed to avoid flooding serial
-            if not self.last_fire_state and self.ser:
-                self.ser.write(b"FIRE\n")
-            self.last_fire_state = True
             self.result_label.config(text="🔥 FIRE DETECTED! 🔥", fg="#ff5959")
         else:
-            if self.last_fire_state and self.ser:
-                self.ser.write(b"SAFE\n")
-            self.last_fire_state = False
             self.result_label.config(text="No fire detected.", fg="#6fff57")
             
         # Schedule next frame
         processing_time = (time.time() - start_time) * 1000
         delay = int(max(1, (1000 / self.processor.fps) - processing_time))
-        self.root.after(delay, self.process_frame)
+        self.after_id = self.root.after(delay, self.process_frame)
 
     def reset(self):
         self.is_running = False
+        self.stop_pipeline()
         self.processor.release_video()
         self.video_path = None
-        self.tk_img = ImageTk.PhotoImage(self.placeholder_img)
-        self.img_label.config(image=self.tk_img)
+        self.display.show_image(self.placeholder_img)
         self.result_label.config(text="")
         # Turn off alarm on reset
-        if self.ser:
-            self.ser.write(b"SAFE\n")
-            self.ser.write(b"RESET\n")
-        self.last_fire_state = False
+        self.alarm.reset()
 
     def on_close(self):
         """Cleanup before closing the window."""
         self.is_running = False
+        self.stop_pipeline()
         if self.processor:
             self.processor.release_video()
-        if self.ser and self.ser.is_open:
-            try:
-                self.ser.write(b"RESET\n")
-                self.ser.close()
-            except:
-                pass
+            self.processor.disable_export()
+        self.alarm.reset()
+        self.alarm.stop()
         self.root.destroy()
         if self.on_back:
             self.on_back()
 
 
 def main():
+    # Opt-in stage metrics (FIRE_METRICS_PORT / FIRE_METRICS_LOG_INTERVAL)
+    enable_from_env()
     root = tk.Tk()
     app = FireDetectionApp(root)
     root.mainloop()
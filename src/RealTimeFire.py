@@ -1,14 +1,19 @@
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageTk
+from PIL import Image
+import gc
 import os
 import sys
 import time
 # Ensure we can import from the same directory
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from fire_detection_logic import FireVideoProcessor
-import serial
-import serial.tools.list_ports
+from fire_metrics import enable_from_env
+from frame_display import FrameDisplay
+from fire_pipeline import FramePipeline, DROP_OLDEST
+from model_registry import resolve_model_path, CAMERA_MODEL
+from alarm_transport import AlarmTransport
+from event_clips import export_options_from_env
 
 # Modern color scheme
 BG_COLOR = "#232946"
@@ -21,44 +26,41 @@ LABEL_FONT = ("Segoe UI", 16, "bold")
 BTN_FONT = ("Segoe UI", 12, "bold")
 
 class RealTimeFireApp:
-    def __init__(self, root, on_back=None):
+    def __init__(self, root, on_back=None, camera_source=0):
         self.root = root
         self.on_back = on_back
+        # Device index, video file or RTSP URL
+        self.camera_source = camera_source
         self.root.title("Real-Time Fire Detection (Camera)")
         self.root.geometry("850x430")
         self.root.configure(bg=BG_COLOR)
         
-        # Initialize the logic processor
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        model_name = "fire_8n.pt"  # Use the lightweight model for real-time
-        model_path = os.path.join(base_dir, "models", model_name)
-
-        # Check if model exists in src/models, if not check root/models
-        if not os.path.exists(model_path):
-            possible_path = os.path.join(base_dir, "..", "models", model_name)
-            if os.path.exists(possible_path):
-                model_path = possible_path
-                
         # Handle window closing
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
-        
-        # Fallback to absolute path or other known models if needed
-        if not os.path.exists(model_path):
-            # Try the one fro Fire_interface_v.py
-            model_name = "fire_8n30.pt" 
-            model_path = os.path.join(base_dir, "models", model_name)
-            if not os.path.exists(model_path):
-                 possible_path = os.path.join(base_dir, "..", "models", model_name)
-                 if os.path.exists(possible_path):
-                    model_path = possible_path
 
+        # Initialize the logic processor with the lightweight model for real-time
+        # (fire_8n.pt, falling back to fire_8n30.pt); the weights are shared via the registry
+        model_path = resolve_model_path(*CAMERA_MODEL)
         self.processor = FireVideoProcessor(model_path)
+        # Cameras mostly watch static scenes: skip the model until something moves
+        self.processor.enable_motion_gate()
+        # Derive the detection stride from measured inference time; stride 1 while fire is suspected
+        self.processor.enable_adaptive_stride()
+        # Move boxes with the fire between inferences instead of redrawing stale ones
+        self.processor.enable_tracking()
+        # Alarm only after fire is confirmed for 3 s of frames, and keep it through brief misses
+        self.processor.enable_confirmation(raise_hold_s=3.0)
+        # Evidence clips around fire events (FIRE_CLIP_DIR / FIRE_EXPORT_ANNOTATED), encoded off the detection path
+        export_options = export_options_from_env()
+        if export_options:
+            self.processor.enable_export(**export_options)
+        self.pipeline = None
+        self.after_id = None
         self.is_running = False
-        self.last_fire_state = False
-        self.fire_start_time = None
 
-        # --- ESP32 Serial Connection ---
-        self.ser = self.detect_and_connect_esp32()
+        # --- ESP32 Alarm (scan, writes and reconnects run on the transport's own thread) ---
+        self.alarm = AlarmTransport()
+        self.alarm.start()
         
         # Title label
         title = tk.Label(self.root, text="🔥 Real-Time Fire Detection (Camera) 🔥", font=("Segoe UI", 22, "bold"), bg=BG_COLOR, fg=FG_COLOR)
@@ -69,8 +71,11 @@ class RealTimeFireApp:
         img_frame.pack(pady=3)
         self.display_size = (300, 200)
         self.placeholder_img = Image.new("RGB", self.display_size, "black")
-        self.tk_img = ImageTk.PhotoImage(self.placeholder_img)
-        self.img_label = tk.Label(img_frame, image=self.tk_img, bg=BG_COLOR)
+        self.img_label = tk.Label(img_frame, bg=BG_COLOR)
+        # One persistent PhotoImage, updated in place with thumbnail-size conversions
+        self.display = FrameDisplay(self.img_label, self.display_size)
+        self.display.show_image(self.placeholder_img)
+        self.processor.convert_rgb = False
         self.img_label.pack(padx=10, pady=2)
 
         # Result label
@@ -105,33 +110,21 @@ class RealTimeFireApp:
         self.last_mtime = os.stat(self.script_path).st_mtime
         # self.check_reload() # Disabled to prevent unintentional reloads during simple usage
 
-    def detect_and_connect_esp32(self):
-        """Automatically detects and connects to an ESP32 device."""
-        try:
-            ports = serial.tools.list_ports.comports()
-            # Common identifiers for ESP32 USB drivers
-            target_descriptors = ["CP210", "CH340", "USB Serial", "USB-to-Serial", "USB UART"]
-            for port in ports:
-                if any(desc in port.description for desc in target_descriptors):
-                    print(f"Connecting to ESP32 on {port.device} ({port.description})...")
-                    return serial.Serial(port.device, 115200, timeout=1)
-            print("Warning: No ESP32-like device found.")
-            return None
-        except Exception as e:
-            print(f"Warning: Could not connect to ESP32. {e}")
-            return None
-
-    def resize_to_fixed_size(self, img_pil):
-        return img_pil.resize(self.display_size, Image.LANCZOS)
-
     def start_camera(self):
         if self.is_running:
             return
 
-        # Use 0 for default camera
-        camera_source = 0 
-        
-        if self.processor.load_video(camera_source):
+        if self.processor.load_video(self.camera_source):
+            # The model and the UI live as long as the window: move them out of the
+            # collector's generations so GC passes during the session stay short.
+            # reset() unfreezes, so nothing of this session stays frozen after it
+            gc.collect()
+            gc.freeze()
+            # Camera reads run at sensor rate; stale frames are dropped if inference lags.
+            # Frames are decoded into a fixed pool so a session of days does not churn memory
+            self.pipeline = FramePipeline(self.processor, drop_policy=DROP_OLDEST,
+                                          conf_thresh=self.confidence_var.get(), pool_frames=True)
+            self.pipeline.start()
             self.is_running = True
             self.result_label.config(text="Starting Camera...")
             self.start_btn.config(state=tk.DISABLED)
@@ -149,9 +142,13 @@ class RealTimeFireApp:
         if not self.is_running:
             return
         
-        conf_thresh = self.confidence_var.get()
-        # process_next_frame handles the reading from the cap
-        frame_rgb, fire_detected, status = self.processor.process_next_frame(conf_thresh)
+        # Capture and inference run in the pipeline threads; here we only consume results
+        self.pipeline.conf_thresh = self.confidence_var.get()
+        result = self.pipeline.get_result()
+        if result is None:
+            self.after_id = self.root.after(5, self.process_frame)
+            return
+        frame, fire_detected, status = result
         
         if status == "finished":
             # Camera disconnected or stream ended
@@ -167,34 +164,16 @@ class RealTimeFireApp:
             return
             
         # Update Image
-        if frame_rgb is not None:
-            img_pil = Image.fromarray(frame_rgb)
-            img_fixed = self.resize_to_fixed_size(img_pil)
-            self.tk_img = ImageTk.PhotoImage(img_fixed)
-            self.img_label.config(image=self.tk_img)
+        if frame is not None:
+            self.display.show(frame)
+            self.pipeline.recycle(frame)
         
-        # Update Status Label
-        # Update Status Label
+        # Update Status Label (fire_detected is the confirmed alarm state)
+        # Queued for the ESP32 without blocking; repeated states are coalesced
+        self.alarm.set_fire(fire_detected)
         if fire_detected:
             self.result_label.config(text="🔥 FIRE DETECTED! 🔥", fg="#ff5959")
-            
-            # Start timer if not already started
-            if self.fire_start_time is None:
-                self.fire_start_time = time.time()
-            
-            # Check duration
-            elapsed_time = time.time() - self.fire_start_time
-            if elapsed_time > 3.0:
-                # Send signal only if state changed
-                if not self.last_fire_state and self.ser:
-                    self.ser.write(b"FIRE\n")
-                self.last_fire_state = True
         else:
-            self.fire_start_time = None # Reset timer
-            
-            if self.last_fire_state and self.ser:
-                self.ser.write(b"SAFE\n")
-            self.last_fire_state = False
             self.result_label.config(text="Safe - Monitoring...", fg="#6fff57")
             
         # Schedule next frame
@@ -204,42 +183,54 @@ class RealTimeFireApp:
         processing_time = (time.time() - start_time) * 1000
         delay = int(max(1, (1000 / fps) - processing_time))
         
-        self.root.after(delay, self.process_frame)
+        self.after_id = self.root.after(delay, self.process_frame)
+
+    def stop_pipeline(self):
+        if self.after_id:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        if self.pipeline:
+            self.pipeline.stop()
+            self.pipeline = None
 
     def reset(self):
         self.is_running = False
+        self.stop_pipeline()
         self.processor.release_video()
+        # Objects of the stopped session go back to the collector (frozen again on the next start)
+        gc.unfreeze()
+        if self.processor.motion_gate:
+            stats = self.processor.motion_gate.stats()
+            print(f"Motion gate: skipped {stats['inferences_skipped']} of "
+                  f"{stats['frames_checked']} scheduled inferences")
         
-        self.tk_img = ImageTk.PhotoImage(self.placeholder_img)
-        self.img_label.config(image=self.tk_img)
+        self.display.show_image(self.placeholder_img)
         self.result_label.config(text="Camera Stopped", fg=FG_COLOR)
         
         self.start_btn.config(state=tk.NORMAL)
         
         # Turn off alarm on reset
-        if self.ser:
-            self.ser.write(b"SAFE\n")
-            self.ser.write(b"RESET\n")
-        self.last_fire_state = False
-        self.fire_start_time = None
+        self.alarm.reset()
 
     def on_close(self):
         """Cleanup before closing the window."""
         self.is_running = False
+        self.stop_pipeline()
         if self.processor:
             self.processor.release_video()
-        if self.ser and self.ser.is_open:
-            try:
-                self.ser.write(b"RESET\n")
-                self.ser.close()
-            except:
-                pass
+            self.processor.disable_export()
+        self.alarm.reset()
+        self.alarm.stop()
+        # Let this window's objects be collected once it is gone
+        gc.unfreeze()
         self.root.destroy()
         if self.on_back:
             self.on_back()
 
 
 def main():
+    # Opt-in stage metrics (FIRE_METRICS_PORT / FIRE_METRICS_LOG_INTERVAL)
+    enable_from_env()
     root = tk.Tk()
     app = RealTimeFireApp(root)
     root.mainloop()
@@ -0,0 +1,67 @@
+import math
+
+
+class AdaptiveStride:
+    """
+    Chooses the detection stride (run the model every N frames) from measured
+    timings instead of a fixed process_interval.
+
+    Keeps exponential moving averages of the model call time and of the
+    per-frame overhead (drawing, conversion) on frames without inference, and
+    picks the smallest stride whose average cost per frame,
+    (inference + (stride - 1) * overhead) / stride, fits the latency target.
+    A slow CPU gets a larger stride so the video does not fall behind real
+    time; a fast one gets stride 1. When fire is suspected the stride drops
+    to 1 so confirmation is fast.
+
+    Args:
+        target_latency_ms (float or None): Average processing time allowed per
+            frame. None uses 80% of the source frame period.
+        min_stride (int): Lower bound for the stride.
+        max_stride (int): Upper bound for the stride.
+        smoothing (float): EMA weight given to each new measurement.
+    """
+    def __init__(self, target_latency_ms=None, min_stride=1, max_stride=15, smoothing=0.2):
+        self.target_latency_ms = target_latency_ms
+        self.min_stride = min_stride
+        self.max_stride = max_stride
+        self.smoothing = smoothing
+        self.fps = 30
+        self.inference_ms = None
+        self.overhead_ms = 0.0
+        self.current_stride = min_stride
+
+    def record_inference(self, elapsed_ms):
+        self.inference_ms = self._ema(self.inference_ms, elapsed_ms)
+
+    def record_overhead(self, elapsed_ms):
+        self.overhead_ms = self._ema(self.overhead_ms, elapsed_ms)
+
+    def budget_ms(self):
+        if self.target_latency_ms is not None:
+            return self.target_latency_ms
+        return 0.8 * 1000.0 / self.fps
+
+    def stride(self, fire_suspected=False):
+        """
+        Returns:
+            int: Number of frames between two inferences.
+        """
+        if fire_suspected:
+            self.current_stride = 1
+        elif self.inference_ms is None:
+            # No measurement yet: start at the fastest rate and let timings push it up
+            self.current_stride = self.min_stride
+        else:
+            spare_ms = self.budget_ms() - self.overhead_ms
+            if spare_ms <= 0:
+                stride = self.max_stride
+            else:
+                stride = math.ceil((self.inference_ms - self.overhead_ms) / spare_ms)
+            self.current_stride = max(self.min_stride, min(stride, self.max_stride))
+        return self.current_stride
+
+    def _ema(self, current, value):
+        if current is None:
+            return value
+        return current + self.smoothing * (value - current)
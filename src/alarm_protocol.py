@@ -0,0 +1,88 @@
+"""
+Serial alarm protocol shared by the desktop and the ESP32.
+
+One command per line. A command may carry a sequence number ("FIRE 12"),
+which the board acknowledges with "ACK 12" so the desktop can measure the
+round trip; bare commands ("FIRE") are still accepted and not acknowledged.
+
+    FIRE   fire detected: red LED and siren on, latched until RESET
+    SAFE   fire no longer detected: only acknowledged, the alarm stays latched
+           (boards built with silence_on_safe turn the siren off; the red LED stays on)
+    RESET  operator reset: everything off
+    PING   heartbeat, only acknowledged
+
+This file is also uploaded to the board next to main.py, so it must stay
+MicroPython-compatible (no typing, dataclasses or f-strings).
+"""
+
+FIRE = "FIRE"
+SAFE = "SAFE"
+RESET = "RESET"
+PING = "PING"
+ACK = "ACK"
+NAK = "NAK"
+
+COMMANDS = (FIRE, SAFE, RESET, PING)
+
+
+def encode(command, seq=None):
+    """Line (bytes) for a command, with an optional sequence number."""
+    if seq is None:
+        return (command + "\n").encode()
+    return ("%s %d\n" % (command, seq)).encode()
+
+
+def parse_reply(line):
+    """
+    Parses a line sent by the board.
+    Returns:
+        tuple or None: (ACK or NAK, seq), or None for any other output (e.g. the boot banner).
+    """
+    parts = line.strip().split()
+    if len(parts) != 2 or parts[0] not in (ACK, NAK):
+        return None
+    try:
+        return parts[0], int(parts[1])
+    except ValueError:
+        return None
+
+
+class AlarmState:
+    """
+    Alarm state machine of the board, driven by received command lines.
+
+    Args:
+        silence_on_safe (bool): Let SAFE turn the siren off. By default a raised
+            alarm sounds until an operator RESET, whatever the detector says.
+    Attributes:
+        fire_active (bool): Siren (and red LED) on.
+        latched (bool): Red LED on; set by FIRE, cleared only by RESET.
+    """
+    def __init__(self, silence_on_safe=False):
+        self.silence_on_safe = silence_on_safe
+        self.fire_active = False
+        self.latched = False
+
+    def handle(self, line):
+        """
+        Applies one received line.
+        Returns:
+            str or None: Reply line to send back, if the command carried a sequence number.
+        """
+        parts = line.strip().split()
+        if not parts:
+            return None
+        command = parts[0]
+        seq = parts[1] if len(parts) > 1 else None
+        if command == FIRE:
+            self.fire_active = True
+            self.latched = True
+        elif command == SAFE:
+            if self.silence_on_safe:
+                self.fire_active = False
+        elif command == RESET:
+            self.fire_active = False
+            self.latched = False
+        elif command != PING:
+            return None if seq is None else "%s %s" % (NAK, seq)
+        return None if seq is None else "%s %s" % (ACK, seq)
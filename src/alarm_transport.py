@@ -0,0 +1,223 @@
+"""
+ESP32 alarm transport that never blocks the UI thread.
+
+The UI calls set_fire() on every frame and reset() on stop; both only touch
+an in-memory queue. A worker thread owns the serial link: it scans for the
+board (detect_and_connect_esp32), writes queued commands, reconnects after
+the link drops and sends PING heartbeats while idle. Every command carries a
+sequence number that the board acknowledges (see alarm_protocol), which gives
+the round-trip latency.
+
+The queue is bounded and coalescing: FIRE/SAFE describe a state, so a state
+message that has not been sent yet is replaced by a newer one, and a state
+already requested is not queued again.
+"""
+import collections
+import threading
+import time
+
+import alarm_protocol as protocol
+from esp32_link import detect_and_connect_esp32
+from fire_metrics import METRICS
+
+
+class AlarmTransport:
+    """
+    Args:
+        connect (callable): connect(verbose=...) returning an open serial-like object
+            (write, readline, close) or None; defaults to the ESP32 scan.
+        queue_size (int): Commands waiting to be written; the oldest is dropped when full.
+        heartbeat_s (float): PING interval while no other command is sent; 0 disables it.
+        reconnect_s (float): Delay between connection attempts.
+        ack_timeout_s (float): Commands not acknowledged within this time count as lost.
+    """
+    def __init__(self, connect=detect_and_connect_esp32, queue_size=8, heartbeat_s=2.0,
+                 reconnect_s=5.0, ack_timeout_s=2.0):
+        self._connect = connect
+        self.queue_size = queue_size
+        self.heartbeat_s = heartbeat_s
+        self.reconnect_s = reconnect_s
+        self.ack_timeout_s = ack_timeout_s
+        self.counters = {"sent": 0, "acked": 0, "lost": 0, "coalesced": 0, "dropped": 0, "reconnects": 0}
+        self.latencies = collections.deque(maxlen=100)
+        self.last_ack_time = None
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._state = None
+        self._link = None
+        self._seq = 0
+        self._in_flight = {}
+        self._closing = False
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._closing = False
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="alarm-transport", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Writes what is still queued (for at most timeout seconds), then closes the link."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+        self._close_link()
+
+    @property
+    def connected(self):
+        return self._link is not None
+
+    def set_fire(self, active):
+        """Requests the FIRE or SAFE state; cheap to call on every frame."""
+        command = protocol.FIRE if active else protocol.SAFE
+        with self._cond:
+            if command == self._state:
+                return
+            self._state = command
+            self._discard_state_messages()
+            self._enqueue(command)
+
+    def reset(self):
+        """Requests an alarm reset (siren and latched LED off)."""
+        with self._cond:
+            self._state = protocol.SAFE
+            self._discard_state_messages()
+            if not self._queue or self._queue[-1] != protocol.RESET:
+                self._enqueue(protocol.RESET)
+
+    def stats(self):
+        """Counters, link state and acknowledgement latency in milliseconds."""
+        latencies = sorted(self.latencies)
+        stats = dict(self.counters)
+        stats["connected"] = self.connected
+        stats["queued"] = len(self._queue)
+        if latencies:
+            stats["latency_ms_p50"] = round(latencies[len(latencies) // 2] * 1000, 2)
+            stats["latency_ms_max"] = round(latencies[-1] * 1000, 2)
+        return stats
+
+    def _discard_state_messages(self):
+        kept = [command for command in self._queue if command not in (protocol.FIRE, protocol.SAFE)]
+        self.counters["coalesced"] += len(self._queue) - len(kept)
+        self._queue = collections.deque(kept)
+
+    def _enqueue(self, command):
+        if len(self._queue) >= self.queue_size:
+            self._queue.popleft()
+            self.counters["dropped"] += 1
+        self._queue.append(command)
+        self._cond.notify()
+
+    def _run(self):
+        attempts = 0
+        last_sent = time.monotonic()
+        while not self._stop_event.is_set():
+            if self._link is None:
+                # Only the first failed scan is reported; retries stay quiet
+                link = self._connect(verbose=attempts == 0)
+                attempts += 1
+                if link is None:
+                    if self._closing:
+                        return
+                    self._stop_event.wait(self.reconnect_s)
+                    continue
+                self._open_link(link)
+                if attempts > 1:
+                    self.counters["reconnects"] += 1
+
+            with self._cond:
+                if not self._queue:
+                    if self._closing:
+                        return
+                    wait = self.heartbeat_s - (time.monotonic() - last_sent) if self.heartbeat_s else None
+                    if wait is None or wait > 0:
+                        self._cond.wait(wait)
+                command = self._queue.popleft() if self._queue else None
+            if command is None:
+                if not self.heartbeat_s or time.monotonic() - last_sent < self.heartbeat_s:
+                    continue
+                command = protocol.PING
+
+            if self._send(command):
+                last_sent = time.monotonic()
+            else:
+                self._close_link()
+                if command != protocol.PING:
+                    with self._cond:
+                        self._queue.appendleft(command)
+            self._expire_in_flight()
+
+    def _open_link(self, link):
+        self._link = link
+        reader = threading.Thread(target=self._read_loop, args=(link,), name="alarm-reader", daemon=True)
+        reader.start()
+        # The board may have rebooted while disconnected: restore a raised alarm
+        with self._cond:
+            if self._state == protocol.FIRE and protocol.FIRE not in self._queue:
+                self._queue.appendleft(protocol.FIRE)
+
+    def _close_link(self):
+        link, self._link = self._link, None
+        if link is not None:
+            try:
+                link.close()
+            except Exception:
+                pass
+
+    def _send(self, command):
+        link = self._link
+        if link is None:
+            return False
+        self._seq += 1
+        with self._cond:
+            self._in_flight[self._seq] = time.perf_counter()
+        try:
+            link.write(protocol.encode(command, self._seq))
+        except Exception as e:
+            print(f"Warning: ESP32 link lost ({e}); reconnecting")
+            with self._cond:
+                self._in_flight.pop(self._seq, None)
+            return False
+        self.counters["sent"] += 1
+        METRICS.inc("alarm_commands_sent")
+        return True
+
+    def _read_loop(self, link):
+        while self._link is link:
+            try:
+                line = link.readline()
+            except Exception:
+                return
+            if not line:
+                continue
+            reply = protocol.parse_reply(line.decode(errors="replace"))
+            if reply is None:
+                continue
+            with self._cond:
+                sent = self._in_flight.pop(reply[1], None)
+            if sent is None or reply[0] != protocol.ACK:
+                continue
+            latency = time.perf_counter() - sent
+            self.latencies.append(latency)
+            self.last_ack_time = time.monotonic()
+            self.counters["acked"] += 1
+            METRICS.observe("alarm_ack", latency)
+
+    def _expire_in_flight(self):
+        deadline = time.perf_counter() - self.ack_timeout_s
+        with self._cond:
+            expired = [seq for seq, sent in self._in_flight.items() if sent < deadline]
+            for seq in expired:
+                del self._in_flight[seq]
+        self.counters["lost"] += len(expired)
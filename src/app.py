@@ -2,8 +2,9 @@ import tkinter as tk
 from tkinter import messagebox
 import sys
 import os
-import threading
 import importlib
+from fire_metrics import enable_from_env
+from lazy_imports import run_in_background
 
 # Modern color scheme (matching existing files)
 BG_COLOR = "#232946"
@@ -14,24 +15,40 @@ BTN_TEXT = "#232946"
 TITLE_FONT = ("Segoe UI", 18, "bold")
 BTN_FONT = ("Segoe UI", 12, "bold")
 
-# Global placeholders for imported modules
-Fire_interface_v = None
-RealTimeFire = None
-
-def preload_modules():
-    """Background thread to import heavy modules."""
-    global Fire_interface_v, RealTimeFire
+# Windows opened by the launcher: module -> (label, default weights in model_registry)
+WINDOW_MODULES = {"Fire_interface_v": ("video interface", "VIDEO_MODEL"),
+                  "RealTimeFire": ("camera interface", "CAMERA_MODEL")}
+# Current step of each module's background preload, shown while a launch waits for it
+preload_status = {}
+
+def preload_module(name):
+    """
+    Background task importing one window module and warming up its default model.
+    Returns:
+        module: The imported module.
+    """
+    label, model_names = WINDOW_MODULES[name]
+    # This triggers imports of ultralytics, torch, cv2, etc.
+    preload_status[name] = f"Loading {label}..."
+    module = importlib.import_module(name)
+    print(f"Preloaded {name}")
+
+    # Load and warm up the default weights so the window opens ready to detect.
+    # A failure here is reported again by the window that needs the model.
     try:
-        if Fire_interface_v is None:
-            # This triggers imports of ultralytics, torch, cv2, etc.
-            Fire_interface_v = importlib.import_module("Fire_interface_v")
-            print("Preloaded Fire_interface_v")
-            
-        if RealTimeFire is None:
-            RealTimeFire = importlib.import_module("RealTimeFire")
-            print("Preloaded RealTimeFire")
+        preload_status[name] = "Loading detection model..."
+        model_registry = importlib.import_module("model_registry")
+        model_registry.REGISTRY.preload(*getattr(model_registry, model_names))
+        print(f"Preloaded {model_names.lower().replace('_', ' ')}")
     except Exception as e:
-        print(f"Error preloading modules: {e}")
+        print(f"Error preloading model: {e}")
+    preload_status[name] = "Ready"
+    return module
+
+def preload_modules():
+    """Preloads every window module in the calling thread."""
+    for name in WINDOW_MODULES:
+        preload_module(name)
 
 class MainLauncherApp:
     def __init__(self, root):
@@ -69,8 +86,12 @@ class MainLauncherApp:
         self.status_label = tk.Label(self.root, text="", font=("Segoe UI", 9), bg=BG_COLOR, fg=FG_COLOR)
         self.status_label.pack(side=tk.BOTTOM, pady=10)
 
-        # Start preloading
-        threading.Thread(target=preload_modules, daemon=True).start()
+        # Window opened from this launcher (kept for the startup benchmark)
+        self.child_app = None
+
+        # Start preloading each window separately, so one failing does not block the other;
+        # launches wait on these futures instead of importing on the UI thread
+        self.preloads = {name: run_in_background(preload_module, name) for name in WINDOW_MODULES}
 
     def center_window(self, width, height):
         screen_width = self.root.winfo_screenwidth()
@@ -80,57 +101,55 @@ class MainLauncherApp:
         self.root.geometry(f'{width}x{height}+{x}+{y}')
 
     def launch_video_interface(self):
-        global Fire_interface_v
-        if Fire_interface_v is None:
-            self.status_label.config(text="Loading detection modules...")
-            self.root.update()
-            try:
-                Fire_interface_v = importlib.import_module("Fire_interface_v")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load module: {e}")
-                self.status_label.config(text="")
-                return
-        
-        self.status_label.config(text="")
-        
-        
-        # Hide main window
-        self.root.withdraw()
-        
-        # Create Toplevel window
-        window = tk.Toplevel(self.root)
-        
-        def on_back():
-            self.root.deiconify()
-            
-        app = Fire_interface_v.FireDetectionApp(window, on_back=on_back)
+        self.launch_when_ready("Fire_interface_v",
+                               lambda module, window, on_back: module.FireDetectionApp(window, on_back=on_back))
 
     def launch_camera_interface(self):
-        global RealTimeFire
-        if RealTimeFire is None:
-            self.status_label.config(text="Loading detection modules...")
-            self.root.update()
-            try:
-                RealTimeFire = importlib.import_module("RealTimeFire")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load module: {e}")
-                self.status_label.config(text="")
-                return
-
+        self.launch_when_ready("RealTimeFire",
+                               lambda module, window, on_back: module.RealTimeFireApp(window, on_back=on_back))
+
+    def launch_when_ready(self, module_name, create_app, waiting=False):
+        """
+        Opens a detection window once its module has been preloaded. Until then
+        the buttons are disabled and the preload progress is shown, polling with
+        after() so the Tk main loop never blocks on imports or model loading.
+        A preload that failed before the button was pressed is started again.
+        """
+        future = self.preloads[module_name]
+        if not waiting and future.done() and future.exception() is not None:
+            # E.g. a missing package was installed meanwhile: try again instead of failing for good
+            future = self.preloads[module_name] = run_in_background(preload_module, module_name)
+        if not future.done():
+            self.set_buttons_state(tk.DISABLED)
+            self.status_label.config(text=preload_status.get(module_name, "Starting..."))
+            self.root.after(100, self.launch_when_ready, module_name, create_app, True)
+            return
+
+        self.set_buttons_state(tk.NORMAL)
         self.status_label.config(text="")
-        
+        error = future.exception()
+        if error is not None:
+            messagebox.showerror("Error", f"Failed to load module: {error}\n\nPress the button again to retry.")
+            return
+
         # Hide main window
         self.root.withdraw()
 
         # Create Toplevel window
         window = tk.Toplevel(self.root)
-        
+
         def on_back():
             self.root.deiconify()
 
-        app = RealTimeFire.RealTimeFireApp(window, on_back=on_back)
+        self.child_app = create_app(future.result(), window, on_back)
+
+    def set_buttons_state(self, state):
+        self.btn_video.config(state=state)
+        self.btn_camera.config(state=state)
 
 if __name__ == "__main__":
+    # Opt-in stage metrics (FIRE_METRICS_PORT / FIRE_METRICS_LOG_INTERVAL)
+    enable_from_env()
     root = tk.Tk()
     app = MainLauncherApp(root)
     root.mainloop()
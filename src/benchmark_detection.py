@@ -0,0 +1,251 @@
+"""
+Benchmark of the detection hot path.
+
+Drives FireVideoProcessor over a video and an image and times every stage
+separately: decode, preprocess, inference, postprocess (model-side and
+Python box extraction), drawing and the display thumbnail (downscale plus
+color conversion) done by the Tk apps. Writes a JSON report with p50/p95/p99 latencies,
+throughput and peak RSS that can be committed and diffed across commits.
+
+Usage:
+    python src/benchmark_detection.py -o bench.json
+    python src/benchmark_detection.py -o bench_new.json --baseline bench.json --max-regression 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+# Ensure we can import from the same directory
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import cv2
+import numpy as np
+from fire_detection_logic import FireVideoProcessor
+from frame_display import FrameDisplay
+from model_registry import resolve_model_path, VIDEO_MODEL
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_VIDEO = os.path.join(REPO_DIR, "videos", "fire_2.mp4")
+DEFAULT_IMAGE = os.path.join(REPO_DIR, "Images", "1.jpg")
+DISPLAY_SIZE = (300, 200)
+
+STAGES = ["decode", "preprocess", "inference", "postprocess", "box_extraction",
+          "cascade_confirm", "draw", "display_thumbnail", "total"]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in KB on Linux and in bytes on macOS
+        return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def summarize(samples_ms):
+    values = np.asarray(samples_ms, dtype=np.float64)
+    if values.size == 0:
+        return None
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"count": int(values.size), "mean_ms": round(float(values.mean()), 3),
+            "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3)}
+
+
+def time_frame(processor, display, frame, conf_thresh, timings):
+    """Runs one frame through every stage of the hot path, appending per-stage times in ms."""
+    start = time.perf_counter()
+    inputs = processor.inference_inputs(frame)
+    results = processor.run_model(inputs if len(inputs) > 1 else inputs[0], processor.screen_conf(conf_thresh))
+    model_done = time.perf_counter()
+    boxes = processor.boxes_from_inputs(frame.shape, results)
+    extract_done = time.perf_counter()
+    if processor.cascade:
+        # Only frames with suspects pay for the second stage; the others record ~0 ms
+        boxes = processor.cascade.confirm([frame], [boxes], conf_thresh)[0]
+        timings["cascade_confirm"].append((time.perf_counter() - extract_done) * 1000)
+        extract_done = time.perf_counter()
+    processor.draw_boxes(frame, boxes)
+    draw_done = time.perf_counter()
+    # Same display path as the Tk apps (the PhotoImage paste needs a Tk root and is left out)
+    display.thumbnail(frame)
+    thumbnail_done = time.perf_counter()
+
+    speed = getattr(results[0], "speed", None) or {}
+    timings["preprocess"].append(speed.get("preprocess", 0.0))
+    timings["inference"].append(speed.get("inference", (model_done - start) * 1000))
+    timings["postprocess"].append(speed.get("postprocess", 0.0))
+    timings["box_extraction"].append((extract_done - model_done) * 1000)
+    timings["draw"].append((draw_done - extract_done) * 1000)
+    timings["display_thumbnail"].append((thumbnail_done - draw_done) * 1000)
+    return thumbnail_done - start
+
+
+def bench_video(processor, display, video_path, conf_thresh, warmup, max_frames):
+    if not processor.load_video(video_path):
+        raise RuntimeError(f"Could not open {video_path}")
+    timings = {stage: [] for stage in STAGES}
+    frames = 0
+    wall_start = None
+    try:
+        while max_frames is None or frames < max_frames + warmup:
+            decode_start = time.perf_counter()
+            frame, _ = processor.read_frame()
+            decode_ms = (time.perf_counter() - decode_start) * 1000
+            if frame is None:
+                break
+            if frames == warmup:
+                wall_start = time.perf_counter()
+                timings = {stage: [] for stage in STAGES}
+            rest_s = time_frame(processor, display, frame, conf_thresh, timings)
+            timings["decode"].append(decode_ms)
+            timings["total"].append(decode_ms + rest_s * 1000)
+            frames += 1
+    finally:
+        processor.release_video()
+    measured = max(0, frames - warmup)
+    wall = time.perf_counter() - wall_start if wall_start else 0.0
+    return _report(video_path, timings, measured, wall)
+
+
+def bench_image(processor, display, image_path, conf_thresh, warmup, repeats):
+    data = np.fromfile(image_path, dtype=np.uint8)
+    timings = {stage: [] for stage in STAGES}
+    wall_start = None
+    for i in range(warmup + repeats):
+        if i == warmup:
+            wall_start = time.perf_counter()
+            timings = {stage: [] for stage in STAGES}
+        decode_start = time.perf_counter()
+        # Use imdecode to handle paths with special characters, as Fire_interface does
+        frame = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        decode_ms = (time.perf_counter() - decode_start) * 1000
+        rest_s = time_frame(processor, display, frame, conf_thresh, timings)
+        timings["decode"].append(decode_ms)
+        timings["total"].append(decode_ms + rest_s * 1000)
+    if wall_start is None:
+        # No measured repeats: report no timings rather than the warm-up ones
+        timings = {stage: [] for stage in STAGES}
+    wall = time.perf_counter() - wall_start if wall_start else 0.0
+    return _report(image_path, timings, max(0, repeats), wall)
+
+
+def _report(path, timings, frames, wall_seconds):
+    return {
+        "source": os.path.relpath(path, REPO_DIR),
+        "frames": frames,
+        "throughput_fps": round(frames / wall_seconds, 2) if wall_seconds > 0 else None,
+        "stages": {stage: summarize(values) for stage, values in timings.items()},
+    }
+
+
+def environment(model_path, backend):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor(), "cpu_count": os.cpu_count(), "opencv": cv2.__version__,
+            "model": os.path.basename(model_path), "backend": backend}
+
+
+def inference_settings(processor):
+    plan = processor.regions
+    return {"imgsz": processor.imgsz,
+            "rois": None if plan is None or plan.rois is None else plan.rois.tolist(),
+            "tile_size": None if plan is None else plan.tile_size,
+            "cascade_suspect_conf": processor.cascade.suspect_conf if processor.cascade else None}
+
+
+def find_regressions(report, baseline, max_regression):
+    """Lists stages whose p95 grew by more than max_regression (fraction) versus the baseline."""
+    regressions = []
+    for name, result in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        for stage, stats in result["stages"].items():
+            base_stats = base["stages"].get(stage)
+            if not stats or not base_stats or base_stats["p95_ms"] <= 0:
+                continue
+            change = stats["p95_ms"] / base_stats["p95_ms"] - 1
+            if change > max_regression:
+                regressions.append(f"{name}/{stage}: p95 {base_stats['p95_ms']:.2f} -> "
+                                   f"{stats['p95_ms']:.2f} ms (+{change:.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the fire detection hot path.")
+    parser.add_argument("-o", "--output", default="bench.json", help="JSON report to write")
+    parser.add_argument("--model", help="Path to YOLO weights (default: fire_8n30.pt)")
+    parser.add_argument("--backend", default="torch", help="torch, onnx, onnx_int8, openvino, auto or benchmark")
+    parser.add_argument("--imgsz", type=int, default=None, help="Inference resolution, e.g. 320, 416 or 640")
+    parser.add_argument("--roi", type=float, nargs=4, default=None, metavar=("X1", "Y1", "X2", "Y2"),
+                        help="Region of interest (pixels or 0-1 fractions)")
+    parser.add_argument("--tile-size", type=int, default=None, help="Split the frame/ROI into tiles of this size")
+    parser.add_argument("--cascade", nargs="?", const="", default=None, metavar="WEIGHTS",
+                        help="Confirm suspect frames with a larger model (default: fire_8l.pt)")
+    parser.add_argument("--suspect-conf", type=float, default=0.25, help="Screening threshold with --cascade")
+    parser.add_argument("--video", default=DEFAULT_VIDEO)
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--conf", type=float, default=0.5)
+    parser.add_argument("--warmup", type=int, default=5, help="Frames excluded from the statistics")
+    parser.add_argument("--max-frames", type=int, default=None, help="Limit the number of video frames")
+    parser.add_argument("--image-repeats", type=int, default=50)
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15,
+                        help="Allowed p95 growth per stage before failing (fraction)")
+    args = parser.parse_args(argv)
+
+    model_path = resolve_model_path(args.model) if args.model else resolve_model_path(*VIDEO_MODEL)
+
+    processor = FireVideoProcessor(model_path, backend=args.backend)
+    processor.set_inference_size(args.imgsz)
+    if args.roi or args.tile_size:
+        processor.enable_regions([args.roi] if args.roi else None, args.tile_size)
+    if args.cascade is not None:
+        processor.enable_cascade(args.cascade or None, backend=args.backend, suspect_conf=args.suspect_conf)
+    report = {"environment": environment(model_path, processor.backend),
+              "inference": inference_settings(processor), "results": {}}
+    display = FrameDisplay(size=DISPLAY_SIZE)
+    report["results"]["video"] = bench_video(processor, display, args.video, args.conf, args.warmup, args.max_frames)
+    report["results"]["image"] = bench_image(processor, display, args.image, args.conf, args.warmup, args.image_repeats)
+    report["peak_rss_mb"] = peak_rss_mb()
+    if processor.cascade:
+        report["cascade"] = processor.cascade.stats()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    for name, result in report["results"].items():
+        print(f"{name}: {result['throughput_fps']} fps")
+        for stage in STAGES:
+            stats = result["stages"][stage]
+            if stats:
+                print(f"  {stage:17} p50 {stats['p50_ms']:8.2f}  p95 {stats['p95_ms']:8.2f}  p99 {stats['p99_ms']:8.2f} ms")
+    print(f"peak RSS: {report['peak_rss_mb']} MB -> {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = find_regressions(report, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
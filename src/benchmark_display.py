@@ -0,0 +1,101 @@
+"""
+Benchmark of the display stage at high source resolutions.
+
+Compares the previous per-frame display path (full-frame BGR->RGB,
+Image.fromarray, LANCZOS resize, new PhotoImage) with FrameDisplay
+(INTER_AREA downscale, thumbnail-size conversion, in-place paste) on
+1080p and 4K frames, and reports the CPU time per frame saved. The Tk steps
+are only timed when a display is available.
+
+Usage:
+    python src/benchmark_display.py -o display.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+# Ensure we can import from the same directory
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+from frame_display import FrameDisplay
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_VIDEO = os.path.join(REPO_DIR, "videos", "fire_2.mp4")
+DISPLAY_SIZE = (300, 200)
+RESOLUTIONS = {"1080p": (1920, 1080), "4k": (3840, 2160)}
+
+
+def sample_frame(video_path, size):
+    """First frame of the sample video scaled to size, or noise if the video is missing."""
+    cap = cv2.VideoCapture(video_path)
+    ret, frame = cap.read()
+    cap.release()
+    if not ret:
+        return np.random.default_rng(0).integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+    return cv2.resize(frame, size, interpolation=cv2.INTER_CUBIC)
+
+
+def legacy_display(frame_bgr, label):
+    frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+    img = Image.fromarray(frame_rgb).resize(DISPLAY_SIZE, Image.LANCZOS)
+    if label is not None:
+        photo = ImageTk.PhotoImage(img)
+        label.config(image=photo)
+        label.image = photo
+
+
+def time_path(show, frame, repeats, warmup=3):
+    """Mean CPU and wall milliseconds per call of show(frame)."""
+    for _ in range(warmup):
+        show(frame)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for _ in range(repeats):
+        show(frame)
+    return {"cpu_ms": round((time.process_time() - cpu_start) * 1000 / repeats, 3),
+            "wall_ms": round((time.perf_counter() - wall_start) * 1000 / repeats, 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the display stage at 1080p and 4K.")
+    parser.add_argument("-o", "--output", default="display.json", help="JSON report to write")
+    parser.add_argument("--video", default=DEFAULT_VIDEO, help="Video providing the sample frame")
+    parser.add_argument("--repeats", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    root = label = None
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        label = tk.Label(root)
+    except Exception as e:
+        print(f"Warning: no display ({e}); PhotoImage steps are not timed")
+
+    display = FrameDisplay(label, DISPLAY_SIZE)
+    new_path = display.show if label is not None else display.thumbnail
+    report = {"tk": label is not None, "repeats": args.repeats, "results": {}}
+    for name, size in RESOLUTIONS.items():
+        frame = sample_frame(args.video, size)
+        legacy = time_path(lambda f: legacy_display(f, label), frame, args.repeats)
+        current = time_path(new_path, frame, args.repeats)
+        saved = round(legacy["cpu_ms"] - current["cpu_ms"], 3)
+        report["results"][name] = {"legacy": legacy, "frame_display": current, "cpu_ms_saved": saved}
+        print(f"{name}: legacy {legacy['cpu_ms']:.2f} ms  frame_display {current['cpu_ms']:.2f} ms  "
+              f"saved {saved:.2f} ms CPU/frame")
+
+    if root is not None:
+        root.destroy()
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"-> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Cold-start benchmark of the launcher.
+
+Starts the launcher in a fresh Python process per run and records, relative
+to process spawn:
+  - launcher_window: launcher window drawn
+  - first_window:    detection window opened through the launcher buttons
+  - first_detection: first inference on a frame of the sample video
+Without a display the Tk steps are skipped and only the module preload and
+first detection are timed. Medians are checked against optional budgets.
+
+Usage:
+    python src/benchmark_startup.py -o startup.json --runs 3
+    python src/benchmark_startup.py --budget-window 1.5 --budget-detection 8
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.join(SRC_DIR, "..")
+DEFAULT_VIDEO = os.path.join(REPO_DIR, "videos", "fire_2.mp4")
+MILESTONES = ["imports_done", "launcher_window", "first_window", "first_detection"]
+
+
+def run_child(mode, video_path, timeout):
+    """Measures one cold start inside this (freshly spawned) process. Returns wall-clock marks."""
+    marks = {}
+    sys.path.append(SRC_DIR)
+    import tkinter as tk
+    import app
+    marks["imports_done"] = time.time()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Warning: no display ({e}); timing preload and detection only", file=sys.stderr)
+        root = None
+
+    if root is not None:
+        launcher = app.MainLauncherApp(root)
+        root.update()
+        marks["launcher_window"] = time.time()
+
+        # Same path as a button click: waits for the preload without blocking the main loop
+        if mode == "camera":
+            launcher.launch_camera_interface()
+        else:
+            launcher.launch_video_interface()
+        deadline = time.time() + timeout
+        while launcher.child_app is None:
+            if time.time() > deadline:
+                raise TimeoutError("Detection window did not open in time")
+            root.update()
+            time.sleep(0.005)
+        root.update()
+        marks["first_window"] = time.time()
+        processor = launcher.child_app.processor
+    else:
+        app.preload_modules()
+        from fire_detection_logic import FireVideoProcessor
+        from model_registry import resolve_model_path, CAMERA_MODEL, VIDEO_MODEL
+        processor = FireVideoProcessor(resolve_model_path(*(CAMERA_MODEL if mode == "camera" else VIDEO_MODEL)))
+
+    if not processor.load_video(video_path):
+        raise RuntimeError(f"Could not open {video_path}")
+    frame, _ = processor.read_frame()
+    processor.detect(frame)
+    marks["first_detection"] = time.time()
+    processor.release_video()
+
+    if root is not None:
+        root.destroy()
+    return marks
+
+
+def measure(mode, video_path, timeout):
+    """Spawns one cold-start run. Returns seconds from spawn to each milestone."""
+    spawned = time.time()
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", "--mode", mode,
+                           "--video", video_path, "--timeout", str(timeout)],
+                          capture_output=True, text=True, timeout=timeout + 30)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Startup run failed:\n{proc.stderr}")
+    marks = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {name: round(marks[name] - spawned, 3) if marks.get(name) else None for name in MILESTONES}
+
+
+def summarize(runs):
+    summary = {}
+    for name in MILESTONES:
+        values = [run[name] for run in runs if run[name] is not None]
+        summary[name] = {"median_s": round(statistics.median(values), 3), "min_s": min(values),
+                         "max_s": max(values)} if values else None
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure launcher cold-start times.")
+    parser.add_argument("-o", "--output", default="startup.json", help="JSON report to write")
+    parser.add_argument("--mode", choices=["video", "camera"], default="video", help="Window to open")
+    parser.add_argument("--video", default=DEFAULT_VIDEO, help="Video used for the first detection")
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts to measure")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds allowed per run")
+    parser.add_argument("--budget-window", type=float, help="Max median seconds to the detection window")
+    parser.add_argument("--budget-detection", type=float, help="Max median seconds to the first detection")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_child(args.mode, args.video, args.timeout)))
+        return 0
+
+    runs = []
+    for i in range(args.runs):
+        runs.append(measure(args.mode, args.video, args.timeout))
+        print(f"run {i + 1}: " + "  ".join(f"{name}={value}s" for name, value in runs[-1].items() if value is not None))
+
+    report = {
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpu_count": os.cpu_count(), "mode": args.mode},
+        "runs": runs,
+        "summary": summarize(runs),
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"-> {args.output}")
+
+    failures = []
+    for name, budget in [("first_window", args.budget_window), ("first_detection", args.budget_detection)]:
+        stats = report["summary"][name]
+        if budget is not None and stats is not None and stats["median_s"] > budget:
+            failures.append(f"{name}: median {stats['median_s']:.2f}s > budget {budget:.2f}s")
+    for line in failures:
+        print(f"OVER BUDGET {line}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import itertools
+
+import numpy as np
+import detection_arrays
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    Pairwise IoU of two (N, 4) and (M, 4) arrays of x1, y1, x2, y2 boxes.
+    Returns:
+        ndarray: (N, M) IoU values.
+    """
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+
+class Track:
+    """
+    One tracked box with a constant-velocity alpha-beta filter (a steady-state
+    Kalman filter) on center x, center y, width and height.
+    """
+    def __init__(self, track_id, box, cls, conf):
+        x1, y1, x2, y2 = box
+        self.track_id = track_id
+        self.cls = cls
+        self.conf = conf
+        self.state = np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1], dtype=np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.hits = 1
+        self.missed_updates = 0
+        self.frames_since_update = 0
+
+    def predict(self, frames=1):
+        self.state += self.velocity * frames
+        self.state[2:] = np.maximum(self.state[2:], 1.0)
+        self.frames_since_update += frames
+
+    def correct(self, box, conf, alpha, beta):
+        x1, y1, x2, y2 = box
+        measured = np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1], dtype=np.float32)
+        residual = measured - self.state
+        self.state += alpha * residual
+        if self.frames_since_update > 0:
+            self.velocity += beta * residual / self.frames_since_update
+        self.conf = conf
+        self.hits += 1
+        self.missed_updates = 0
+        self.frames_since_update = 0
+
+    def box(self):
+        cx, cy, w, h = self.state
+        return (int(cx - w / 2), int(cy - h / 2), int(cx + w / 2), int(cy + h / 2))
+
+
+class BoxTracker:
+    """
+    Carries detections forward between inference frames.
+
+    Detections are associated with existing tracks by IoU (greedy, per class),
+    falling back to center distance for fast-moving boxes whose predicted
+    and detected boxes barely overlap yet, e.g. right after a track starts
+    with no velocity estimate. Matched tracks are corrected, unmatched
+    detections start new tracks with a stable ID, and tracks missing
+    max_missed consecutive inferences are dropped. On frames without
+    inference, predict() moves every track along its estimated velocity so
+    boxes follow moving flames and smoke.
+
+    Args:
+        iou_thresh (float): Minimum IoU for a detection to match a track.
+        max_center_shift (float): Below iou_thresh, a detection still matches if its
+            center is within this many track diagonals of the predicted center.
+        max_missed (int): Inference updates a track survives without a match.
+        min_hits (int): Matches needed before a track is reported.
+        alpha (float): Position/size gain of the filter.
+        beta (float): Velocity gain of the filter.
+    """
+    def __init__(self, iou_thresh=0.3, max_center_shift=1.0, max_missed=1, min_hits=1, alpha=0.6, beta=0.4):
+        self.iou_thresh = iou_thresh
+        self.max_center_shift = max_center_shift
+        self.max_missed = max_missed
+        self.min_hits = min_hits
+        self.alpha = alpha
+        self.beta = beta
+        self.tracks = []
+        self._ids = itertools.count(1)
+
+    def reset(self):
+        self.tracks = []
+
+    def predict(self, frames=1):
+        """Advances all tracks by the given number of frames."""
+        for track in self.tracks:
+            track.predict(frames)
+
+    def update(self, detections):
+        """
+        Corrects tracks with the detections of the current frame.
+        Args:
+            detections (ndarray): detection_arrays.DETECTION_DTYPE array.
+        """
+        boxes = detections["xyxy"]
+        confs = detections["conf"].tolist()
+        classes = detections["cls"].tolist()
+        unmatched_tracks = set(range(len(self.tracks)))
+        unmatched_boxes = set(range(len(boxes)))
+
+        if self.tracks and len(boxes):
+            scores = self._match_scores(boxes, detections["cls"])
+            # Greedy assignment, best pairs first
+            for flat in np.argsort(scores, axis=None)[::-1]:
+                ti, bi = divmod(int(flat), len(boxes))
+                if scores[ti, bi] <= 0:
+                    break
+                if ti in unmatched_tracks and bi in unmatched_boxes:
+                    self.tracks[ti].correct(boxes[bi], confs[bi], self.alpha, self.beta)
+                    unmatched_tracks.discard(ti)
+                    unmatched_boxes.discard(bi)
+
+        for ti in unmatched_tracks:
+            self.tracks[ti].missed_updates += 1
+        self.tracks = [t for t in self.tracks if t.missed_updates <= self.max_missed]
+        for bi in sorted(unmatched_boxes):
+            self.tracks.append(Track(next(self._ids), boxes[bi], classes[bi], confs[bi]))
+
+    def _match_scores(self, det_boxes, det_classes):
+        """
+        Track x detection scores: 1 + IoU for overlap matches, (0, 1) for
+        center-distance matches, 0 for no match. Overlap always wins.
+        """
+        track_boxes = np.array([t.box() for t in self.tracks], dtype=np.float32)
+        ious = iou_matrix(track_boxes, det_boxes)
+
+        track_centers = (track_boxes[:, :2] + track_boxes[:, 2:]) / 2
+        det_centers = (det_boxes[:, :2] + det_boxes[:, 2:]) / 2
+        dist = np.linalg.norm(track_centers[:, None, :] - det_centers[None, :, :], axis=2)
+        gate = self.max_center_shift * np.hypot(*(track_boxes[:, 2:] - track_boxes[:, :2]).T)[:, None]
+        near = np.clip(1.0 - dist / np.maximum(gate, 1e-6), 0.0, None)
+
+        scores = np.where(ious >= self.iou_thresh, 1.0 + ious, near)
+        # Never match across classes
+        track_classes = np.array([t.cls for t in self.tracks])
+        return np.where(track_classes[:, None] == det_classes[None, :], scores, 0.0)
+
+    def boxes(self, frame_idx=0):
+        """
+        Current boxes of reported tracks.
+        Returns:
+            ndarray: detection_arrays.DETECTION_DTYPE array with track_id set.
+        """
+        tracks = [t for t in self.tracks if t.hits >= self.min_hits and t.missed_updates == 0]
+        dets = detection_arrays.empty(len(tracks))
+        if tracks:
+            dets["xyxy"] = [t.box() for t in tracks]
+            dets["conf"] = [t.conf for t in tracks]
+            dets["cls"] = [t.cls for t in tracks]
+            dets["track_id"] = [t.track_id for t in tracks]
+            dets["frame_idx"] = frame_idx
+        return dets
+
+    def persistent_tracks(self, min_hits):
+        """
+        Tracks matched in at least min_hits inferences, including the latest one.
+        Used by the alarm logic, so a box that is a new track on every inference
+        (reflections, flicker jumping around) counts less than a steady one.
+        """
+        return [t for t in self.tracks if t.hits >= min_hits and t.missed_updates == 0]
@@ -0,0 +1,111 @@
+"""
+Compact detection arrays.
+
+Detections travel through the processor, tracker, drawing and alarm code as
+one NumPy structured array per frame (or batch) instead of lists of Python
+tuples, so filtering, coordinate conversion and labeling happen in bulk.
+Detection records are only built for the few callers that want objects.
+"""
+import cv2
+import numpy as np
+
+DETECTION_DTYPE = np.dtype([
+    ("xyxy", np.float32, (4,)),
+    ("conf", np.float32),
+    ("cls", np.int16),
+    ("frame_idx", np.int32),
+    ("track_id", np.int32),  # -1 for untracked detections
+])
+
+# #eebbc3 in BGR, as drawn by the video windows
+BOX_COLOR = (195, 187, 238)
+
+
+def empty(count=0):
+    dets = np.zeros(count, dtype=DETECTION_DTYPE)
+    dets["track_id"] = -1
+    return dets
+
+
+def from_arrays(xyxy, conf, cls, frame_idx=0, conf_thresh=None):
+    """
+    Builds a detection array from parallel arrays.
+    Args:
+        frame_idx (int or array): Frame index of every detection.
+        conf_thresh (float or None): Drops detections below it. Not needed
+            for model output, which is already filtered by the conf passed to the model.
+    """
+    if conf_thresh is not None:
+        keep = np.asarray(conf) >= conf_thresh
+        xyxy, conf, cls = np.asarray(xyxy)[keep], np.asarray(conf)[keep], np.asarray(cls)[keep]
+        if np.ndim(frame_idx):
+            frame_idx = np.asarray(frame_idx)[keep]
+    dets = empty(len(conf))
+    dets["xyxy"] = np.asarray(xyxy).reshape(-1, 4)
+    dets["conf"] = conf
+    dets["cls"] = cls
+    dets["frame_idx"] = frame_idx
+    return dets
+
+
+def from_result(result, frame_idx=0, conf_thresh=None):
+    """Detection array from one ultralytics result, without touching individual boxes."""
+    boxes = result.boxes
+    if len(boxes) == 0:
+        return empty()
+    return from_arrays(boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy(),
+                       frame_idx, conf_thresh)
+
+
+def labels(dets, names):
+    """Display labels ("fire: 0.85", prefixed with "#<id> " for tracks) for every detection."""
+    return [f"#{track_id} {names[cls]}: {conf:.2f}" if track_id >= 0 else f"{names[cls]}: {conf:.2f}"
+            for cls, conf, track_id in zip(dets["cls"].tolist(), dets["conf"].tolist(),
+                                           dets["track_id"].tolist())]
+
+
+def draw(frame, dets, names, color=BOX_COLOR):
+    """
+    Draws all detections onto the frame in place.
+    Returns:
+        bool: True if at least one box was drawn (fire detected).
+    """
+    if len(dets) == 0:
+        return False
+    coords = dets["xyxy"].astype(np.int32).tolist()
+    for (x1, y1, x2, y2), label in zip(coords, labels(dets, names)):
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+    return True
+
+
+class Detection:
+    """One detection as an object, for callers that need records rather than arrays."""
+    __slots__ = ("x1", "y1", "x2", "y2", "conf", "cls", "frame_idx", "track_id", "label")
+
+    def __init__(self, x1, y1, x2, y2, conf, cls, frame_idx, track_id, label):
+        self.x1 = x1
+        self.y1 = y1
+        self.x2 = x2
+        self.y2 = y2
+        self.conf = conf
+        self.cls = cls
+        self.frame_idx = frame_idx
+        self.track_id = track_id
+        self.label = label
+
+    @property
+    def box(self):
+        return (self.x1, self.y1, self.x2, self.y2)
+
+    def __repr__(self):
+        return f"Detection({self.label!r}, box={self.box}, frame={self.frame_idx})"
+
+
+def to_records(dets, names):
+    """Detection objects with integer pixel coordinates, one per array row."""
+    coords = dets["xyxy"].astype(np.int32).tolist()
+    return [Detection(x1, y1, x2, y2, conf, cls, frame_idx, track_id, label)
+            for (x1, y1, x2, y2), conf, cls, frame_idx, track_id, label in zip(
+                coords, dets["conf"].tolist(), dets["cls"].tolist(), dets["frame_idx"].tolist(),
+                dets["track_id"].tolist(), labels(dets, names))]
@@ -0,0 +1,127 @@
+"""
+Persistent cache of raw detections for re-scanned media.
+
+Entries are keyed on (file content hash, weights hash, inference size and
+sampling settings) and hold the detection array of the whole file, produced
+at the low confidence floor CONF_FLOOR. Any threshold at or above the floor
+is then an array filter: NMS only ever suppresses a box in favour of a
+higher-scoring one, so filtering the floor output gives the same boxes as
+running the model at that threshold.
+
+Everything lives in one SQLite file (arrays stored as raw DETECTION_DTYPE
+bytes). Content hashes are memoized by (path, size, mtime), so unchanged
+archives are not even re-read. When the stored arrays exceed max_bytes,
+the least recently used entries are evicted.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+from detection_arrays import DETECTION_DTYPE
+
+# Confidence the model runs at when its output is cached
+CONF_FLOOR = 0.05
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    key TEXT PRIMARY KEY, data BLOB NOT NULL, meta TEXT, size INTEGER NOT NULL, last_used REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS detections_last_used ON detections (last_used);
+CREATE TABLE IF NOT EXISTS hashes (
+    path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL, digest TEXT NOT NULL);
+"""
+
+
+def default_cache_path():
+    return os.environ.get("FIRE_DETECTION_CACHE",
+                          os.path.join(os.path.expanduser("~"), ".cache", "fire_detection", "detections.sqlite"))
+
+
+def filter_conf(dets, conf_thresh):
+    """Detections at or above conf_thresh."""
+    return dets[dets["conf"] >= conf_thresh]
+
+
+class DetectionCache:
+    """
+    Args:
+        path (str or None): SQLite file; defaults to $FIRE_DETECTION_CACHE or ~/.cache/fire_detection.
+        max_bytes (int): Size bound of the stored detection arrays.
+    """
+    def __init__(self, path=None, max_bytes=256 << 20):
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Scanner workers share the file: WAL lets readers and one writer run concurrently
+        self._db = sqlite3.connect(self.path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def content_hash(self, path, chunk_size=1 << 20):
+        """SHA-256 of a file, recomputed only when its size or mtime changed."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self._db.execute("SELECT size, mtime, digest FROM hashes WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+            return row[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?)",
+                             (path, stat.st_size, stat.st_mtime, digest.hexdigest()))
+        return digest.hexdigest()
+
+    def key(self, media_path, weights_path, imgsz=None, params=""):
+        """
+        Cache key of a media file scanned with the given weights.
+        Args:
+            imgsz (int or None): Inference resolution (None: model default).
+            params (str): Anything else that changes which detections are produced,
+                e.g. the frame sampling of a video scan.
+        """
+        parts = [self.content_hash(media_path), self.content_hash(weights_path), str(imgsz or "default"), params]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Returns:
+            tuple or None: (detections, meta) with the read-only detection array
+                at CONF_FLOOR and the meta dict stored with it, or None on a miss.
+        """
+        row = self._db.execute("SELECT data, meta FROM detections WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with self._db:
+            self._db.execute("UPDATE detections SET last_used = ? WHERE key = ?", (time.time(), key))
+        return np.frombuffer(row[0], dtype=DETECTION_DTYPE), json.loads(row[1] or "{}")
+
+    def put(self, key, dets, meta=None):
+        """Stores the detections (produced at CONF_FLOOR) of one file, then evicts down to max_bytes."""
+        data = np.ascontiguousarray(dets, dtype=DETECTION_DTYPE).tobytes()
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO detections VALUES (?, ?, ?, ?, ?)",
+                             (key, data, json.dumps(meta or {}), len(data), time.time()))
+            self._evict()
+
+    def stats(self):
+        entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM detections").fetchone()
+        return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM detections").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in self._db.execute("SELECT key, size FROM detections ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM detections WHERE key = ?", evicted)
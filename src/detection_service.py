@@ -0,0 +1,499 @@
+"""
+Local detection service over HTTP and WebSocket (asyncio, standard library only).
+
+Lets other systems (VMS, alarm panels, dashboards) use the detector without
+a Tk window. Endpoints, bound to 127.0.0.1 unless --host says otherwise:
+
+    GET    /health             service, queue and model status
+    POST   /detect?conf=0.5    body: an encoded image (JPEG/PNG); returns its detections
+    GET    /streams            registered streams and their counters
+    POST   /streams            {"id": "cam1", "source": "rtsp://...", "priority": 0, "imgsz": 320}
+    DELETE /streams/<id>
+    GET    /events             WebSocket: JSON fire/safe/status events of all streams
+
+Uploaded images from all clients wait in one bounded queue and are
+micro-batched into shared model calls (up to --max-batch-size images, or
+whatever arrived within --batch-wait-ms). Streams run in a
+StreamMultiplexer on the same model; both take the multiplexer's model lock.
+A full queue answers 503 and a client over its rate limit 429, both with
+Retry-After. Slow WebSocket clients lose their oldest events instead of
+holding up the others.
+
+Usage:
+    python src/detection_service.py --port 8765 --stream videos/fire_2.mp4
+    curl --data-binary @Images/1.jpg "http://127.0.0.1:8765/detect?conf=0.4"
+"""
+import argparse
+import asyncio
+import base64
+import concurrent.futures
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+import urllib.parse
+from collections import OrderedDict
+# Ensure we can import from the same directory
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import cv2
+import numpy as np
+import detection_arrays
+from detection_cache import filter_conf
+from fire_detection_logic import FireVideoProcessor
+from fire_metrics import METRICS
+from model_registry import resolve_model_path, CAMERA_MODEL
+from stream_mux import StreamMultiplexer, parse_source
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 429: "Too Many Requests", 503: "Service Unavailable"}
+# Inference sizes accepted for streams registered over HTTP
+IMGSZ_RANGE = (32, 1920)
+
+
+class HttpError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `burst`."""
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class Request:
+    __slots__ = ("method", "path", "query", "headers", "body", "client")
+
+    def __init__(self, method, path, query, headers, body, client):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+        self.client = client
+
+
+async def read_request(reader, peer, max_body_bytes):
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        raise HttpError(400, "Request headers too large")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length") or 0)
+    if length > max_body_bytes:
+        raise HttpError(413, f"Body larger than {max_body_bytes} bytes")
+    body = await reader.readexactly(length) if length else b""
+    url = urllib.parse.urlsplit(target)
+    # Rate limits go by peer address: anything the client sends about itself can be changed per request
+    client = peer[0] if peer else "unknown"
+    return Request(method.upper(), url.path, dict(urllib.parse.parse_qsl(url.query)), headers, body, client)
+
+
+def write_response(writer, status, payload=None, headers=None):
+    body = b"" if payload is None else json.dumps(payload).encode()
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", "Content-Type: application/json",
+             f"Content-Length: {len(body)}", "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+
+
+def parse_imgsz(value):
+    """Inference size from a request: None, or a multiple of 32 within IMGSZ_RANGE."""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value % 32 \
+            or not IMGSZ_RANGE[0] <= value <= IMGSZ_RANGE[1]:
+        raise HttpError(400, f"imgsz must be a multiple of 32 from {IMGSZ_RANGE[0]} to {IMGSZ_RANGE[1]}")
+    return value
+
+
+def decode_image(data):
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def detections_json(dets, names):
+    return [{"box": list(d.box), "conf": round(d.conf, 3), "class": names[d.cls], "track_id": d.track_id}
+            for d in detection_arrays.to_records(dets, names)]
+
+
+class WebSocketClient:
+    """Server side of one WebSocket connection (text frames out, control frames in)."""
+    def __init__(self, reader, writer, queue_size=64):
+        self.reader = reader
+        self.writer = writer
+        self.events_dropped = 0
+        self._queue = asyncio.Queue(maxsize=queue_size)
+
+    def send(self, event):
+        """Queues an event; a client that does not keep up loses its oldest events."""
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.events_dropped += 1
+        self._queue.put_nowait(event)
+
+    async def run(self):
+        sender = asyncio.create_task(self._send_loop())
+        try:
+            await self._receive_loop()
+        finally:
+            sender.cancel()
+
+    async def _send_loop(self):
+        while True:
+            event = await self._queue.get()
+            self.writer.write(self._frame(0x1, json.dumps(event).encode()))
+            await self.writer.drain()
+
+    async def _receive_loop(self):
+        try:
+            while True:
+                first, second = await self.reader.readexactly(2)
+                opcode, length = first & 0x0F, second & 0x7F
+                if length == 126:
+                    length = struct.unpack("!H", await self.reader.readexactly(2))[0]
+                elif length == 127:
+                    length = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+                if length > 1 << 16:
+                    return
+                mask = await self.reader.readexactly(4) if second & 0x80 else b"\0\0\0\0"
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(await self.reader.readexactly(length)))
+                if opcode == 0x8:
+                    self.writer.write(self._frame(0x8, payload[:2]))
+                    return
+                if opcode == 0x9:
+                    self.writer.write(self._frame(0xA, payload))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+
+    @staticmethod
+    def _frame(opcode, payload):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        return header + payload
+
+
+class DetectionService:
+    """
+    Args:
+        model_path (str): Weights shared by the image path and all streams.
+        host (str): Interface to listen on; keep the loopback default unless
+            the network is trusted (there is no authentication).
+        port (int): TCP port; 0 picks a free one (see self.port once started).
+        conf_thresh (float): Default threshold of /detect and of the streams.
+        max_batch_size (int): Images per shared model call.
+        batch_wait_ms (float): How long the first queued image waits for others.
+        max_pending (int): Queued images before /detect answers 503.
+        rate_limit (float): Requests per second allowed per client.
+        rate_burst (int): Requests a client may send at once.
+        max_clients (int): Rate-limit buckets kept at once; idle clients are forgotten first.
+        max_body_bytes (int): Largest accepted upload.
+        backend (str): Inference backend, see inference_backends.load_model.
+        model: Already-loaded model to serve instead of loading model_path.
+    """
+    def __init__(self, model_path, host="127.0.0.1", port=8765, conf_thresh=0.5, max_batch_size=8,
+                 batch_wait_ms=10, max_pending=32, rate_limit=10.0, rate_burst=20,
+                 max_body_bytes=20 << 20, backend="auto", max_clients=1024, model=None):
+        self.host = host
+        self.port = port
+        self.conf_thresh = conf_thresh
+        self.max_batch_size = max_batch_size
+        self.batch_wait_s = batch_wait_ms / 1000
+        self.max_pending = max_pending
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self.max_clients = max_clients
+        self.max_body_bytes = max_body_bytes
+        # Streams report confirmed alarms, so event consumers do not see single-frame flicker
+        self.mux = StreamMultiplexer(model_path, conf_thresh, on_result=self._on_stream_result,
+                                     model=model, backend=backend, confirmation_options={})
+        self.processor = FireVideoProcessor(model=self.mux.model)
+        self.images_detected = 0
+        self.batches_run = 0
+        # Rate-limit bucket per peer address, least recently used first
+        self._buckets = OrderedDict()
+        self._clients = set()
+        # Alarm state per stream; only touched on the event loop
+        self._fire_state = {}
+        # Last state seen per stream; only touched on the mux scheduler thread
+        self._seen_state = {}
+        self._loop = None
+        self._image_queue = None
+        # The model is not safe to call concurrently: one thread runs all image batches
+        self._model_executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="service-model")
+
+    def run(self, streams=()):
+        """Serves until interrupted."""
+        try:
+            asyncio.run(self.serve(streams))
+        except KeyboardInterrupt:
+            pass
+
+    async def serve(self, streams=(), started=None):
+        """
+        Args:
+            streams (iterable): Sources registered at start-up (ids stream0, stream1, ...).
+            started (callable or None): Called with the bound port once listening.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._image_queue = asyncio.Queue(maxsize=self.max_pending)
+        for i, source in enumerate(streams):
+            if not self.mux.add_stream(f"stream{i}", parse_source(source)):
+                print(f"Warning: Could not open {source}")
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self.mux.start()
+        batcher = asyncio.create_task(self._batch_loop())
+        print(f"Detection service on http://{self.host}:{self.port} (events: ws://{self.host}:{self.port}/events)")
+        if started:
+            started(self.port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self.mux.stop()
+            self._model_executor.shutdown(wait=False)
+
+    # --- HTTP ---
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            request = await read_request(reader, writer.get_extra_info("peername"), self.max_body_bytes)
+            if request.path == "/events" and request.headers.get("upgrade", "").lower() == "websocket":
+                await self._websocket(request, reader, writer)
+                return
+            status, payload = await self._dispatch(request)
+            write_response(writer, status, payload)
+        except HttpError as e:
+            write_response(writer, e.status, {"error": str(e)}, e.headers)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        except Exception as e:
+            write_response(writer, 400, {"error": str(e)})
+        try:
+            await writer.drain()
+            writer.close()
+        except ConnectionError:
+            pass
+
+    async def _dispatch(self, request):
+        if not self._take_token(request.client):
+            raise HttpError(429, "Rate limit exceeded", {"Retry-After": "1"})
+        METRICS.inc("service_requests")
+
+        if request.path == "/health":
+            return 200, {"status": "ok", "queued_images": self._image_queue.qsize(), "max_pending": self.max_pending,
+                         "images_detected": self.images_detected, "batches_run": self.batches_run,
+                         "streams": len(self.mux.streams), "event_clients": len(self._clients)}
+        if request.path == "/detect":
+            if request.method != "POST":
+                raise HttpError(405, "Use POST with the image as body")
+            return 200, await self._detect(request)
+        if request.path == "/streams":
+            if request.method == "POST":
+                return 201, await self._add_stream(request)
+            return 200, self.mux.stats()
+        if request.path.startswith("/streams/"):
+            if request.method != "DELETE":
+                raise HttpError(405, "Use DELETE to remove a stream")
+            stream_id = urllib.parse.unquote(request.path[len("/streams/"):])
+            if stream_id not in self.mux.streams:
+                raise HttpError(404, f"No stream {stream_id}")
+            await self._loop.run_in_executor(None, self.mux.remove_stream, stream_id)
+            return 200, {"id": stream_id, "removed": True}
+        raise HttpError(404, f"No such endpoint: {request.path}")
+
+    def _take_token(self, client):
+        bucket = self._buckets.pop(client, None) or TokenBucket(self.rate_limit, self.rate_burst)
+        self._buckets[client] = bucket
+        allowed = bucket.take()
+        if len(self._buckets) > self.max_clients:
+            # A bucket idle long enough to be full again is the same as a new one
+            refill_s = self.rate_burst / self.rate_limit if self.rate_limit else float("inf")
+            now = time.monotonic()
+            for key in list(self._buckets):
+                if now - self._buckets[key].last < refill_s:
+                    break
+                del self._buckets[key]
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return allowed
+
+    async def _detect(self, request):
+        try:
+            conf_thresh = float(request.query.get("conf", self.conf_thresh))
+        except ValueError:
+            raise HttpError(400, "conf must be a number")
+        image = await self._loop.run_in_executor(None, decode_image, request.body)
+        if image is None:
+            raise HttpError(400, "Body is not a decodable image")
+        future = self._loop.create_future()
+        try:
+            self._image_queue.put_nowait((image, conf_thresh, future))
+        except asyncio.QueueFull:
+            raise HttpError(503, "Detection queue full", {"Retry-After": "1"})
+        dets = await future
+        return {"fire_detected": len(dets) > 0, "detections": detections_json(dets, self.processor.names)}
+
+    async def _add_stream(self, request):
+        try:
+            config = json.loads(request.body or b"{}")
+            source = parse_source(config["source"])
+        except (ValueError, KeyError, TypeError):
+            raise HttpError(400, 'Body must be JSON with a "source"')
+        imgsz = parse_imgsz(config.get("imgsz"))
+        stream_id = str(config.get("id") or f"stream{len(self.mux.streams)}")
+        if stream_id in self.mux.streams:
+            raise HttpError(409, f"Stream {stream_id} already exists")
+        # Opening an RTSP source can take seconds: keep it off the event loop
+        opened = await self._loop.run_in_executor(None, self.mux.add_stream, stream_id, source,
+                                                  int(config.get("priority", 0)), None, imgsz)
+        if not opened:
+            raise HttpError(400, f"Could not open {source}")
+        return {"id": stream_id, "source": str(source)}
+
+    # --- Micro-batching ---
+
+    async def _batch_loop(self):
+        while True:
+            batch = [await self._image_queue.get()]
+            deadline = self._loop.time() + self.batch_wait_s
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._image_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # One model call at the lowest requested threshold, then each request filters its own
+            images = [image for image, _, _ in batch]
+            conf_thresh = min(conf for _, conf, _ in batch)
+            try:
+                results = await self._loop.run_in_executor(self._model_executor, self._detect_images,
+                                                           images, conf_thresh)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(HttpError(503, f"Detection failed: {e}"))
+                continue
+            for (_, conf, future), dets in zip(batch, results):
+                if not future.done():
+                    future.set_result(filter_conf(dets, conf))
+
+    def _detect_images(self, images, conf_thresh):
+        with METRICS.stage("service_batch"), self.mux.model_lock:
+            results = self.processor.detect_batch(images, conf_thresh)
+        self.images_detected += len(images)
+        self.batches_run += 1
+        return results
+
+    # --- Events ---
+
+    async def _websocket(self, request, reader, writer):
+        key = request.headers.get("sec-websocket-key")
+        if not key:
+            raise HttpError(400, "Missing Sec-WebSocket-Key")
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        client = WebSocketClient(reader, writer)
+        # Current state first, so a new dashboard does not wait for the next change
+        client.send({"type": "hello", "streams": {stream_id: {"fire_detected": fire}
+                                                  for stream_id, fire in self._fire_state.items()}})
+        self._clients.add(client)
+        try:
+            await client.run()
+        finally:
+            self._clients.discard(client)
+            writer.close()
+
+    def _on_stream_result(self, stream_id, frame, fire_detected, status):
+        # Scheduler thread: hand changes to the event loop, which owns _fire_state.
+        # last_boxes is replaced, never modified, so the array can be passed as is
+        if status == "ok" and fire_detected == self._seen_state.get(stream_id, False):
+            return
+        if status == "ok":
+            self._seen_state[stream_id] = fire_detected
+        else:
+            self._seen_state.pop(stream_id, None)
+        stream = self.mux.streams.get(stream_id)
+        boxes = stream.processor.last_boxes if fire_detected and stream is not None else None
+        self._loop.call_soon_threadsafe(self._update_state, stream_id, fire_detected, status, boxes,
+                                        time.time())
+
+    def _update_state(self, stream_id, fire_detected, status, boxes, timestamp):
+        if status == "ok":
+            self._fire_state[stream_id] = fire_detected
+        else:
+            self._fire_state.pop(stream_id, None)
+        event = {"type": ("fire" if fire_detected else "safe") if status == "ok" else "status",
+                 "stream": stream_id, "status": status, "time": timestamp}
+        if boxes is not None:
+            event["detections"] = detections_json(boxes, self.processor.names)
+        self._broadcast(event)
+
+    def _broadcast(self, event):
+        for client in list(self._clients):
+            client.send(event)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP/WebSocket fire detection service.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: loopback only)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model", help="Path to YOLO weights (default: fire_8n.pt)")
+    parser.add_argument("--conf", type=float, default=0.5, help="Default confidence threshold")
+    parser.add_argument("--stream", action="append", default=[], help="Source registered at start-up; repeatable")
+    parser.add_argument("--max-batch-size", type=int, default=8, help="Uploaded images per model call")
+    parser.add_argument("--batch-wait-ms", type=float, default=10, help="Wait for more images before a model call")
+    parser.add_argument("--max-pending", type=int, default=32, help="Queued images before answering 503")
+    parser.add_argument("--rate-limit", type=float, default=10.0, help="Requests per second per client")
+    parser.add_argument("--rate-burst", type=int, default=20, help="Burst size per client")
+    parser.add_argument("--backend", default="auto", help="torch, onnx, onnx_int8, openvino, auto or benchmark")
+    args = parser.parse_args(argv)
+
+    if args.host not in ("127.0.0.1", "localhost", "::1"):
+        print(f"Warning: listening on {args.host}; the service has no authentication")
+    model_path = resolve_model_path(args.model) if args.model else resolve_model_path(*CAMERA_MODEL)
+    service = DetectionService(model_path, args.host, args.port, args.conf, args.max_batch_size,
+                               args.batch_wait_ms, args.max_pending, args.rate_limit, args.rate_burst,
+                               backend=args.backend)
+    service.run(args.stream)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+ESP32 alarm board discovery.
+
+pyserial is only imported once a USB serial device node is present, so
+machines without the board attached do not pay for it at window start-up.
+On Windows there is no cheap device-node check and pyserial is always used.
+Set ESP32_PORT (e.g. to the pty printed by fake_esp32.py) to skip the scan.
+"""
+import glob
+import os
+import sys
+
+# Common identifiers for ESP32 USB drivers
+TARGET_DESCRIPTORS = ["CP210", "CH340", "USB Serial", "USB-to-Serial", "USB UART"]
+
+# Device nodes created by USB serial adapters on Linux and macOS
+_DEVICE_PATTERNS = ["/dev/ttyUSB*", "/dev/ttyACM*", "/dev/cu.usbserial*", "/dev/cu.SLAB_USBtoUART*",
+                    "/dev/cu.wchusbserial*", "/dev/cu.usbmodem*"]
+
+
+def serial_device_present():
+    """Cheap check for a USB serial adapter, without importing pyserial."""
+    if sys.platform.startswith("win"):
+        return True
+    return any(glob.glob(pattern) for pattern in _DEVICE_PATTERNS)
+
+
+def detect_and_connect_esp32(baudrate=115200, port=None, verbose=True):
+    """
+    Automatically detects and connects to an ESP32 device.
+    Args:
+        port (str or None): Device to open instead of scanning; defaults to $ESP32_PORT.
+        verbose (bool): Print a warning when no board is found.
+    Returns:
+        serial.Serial or None: Open connection, or None if no board was found.
+    """
+    port = port or os.environ.get("ESP32_PORT")
+    if port is None and not serial_device_present():
+        if verbose:
+            print("Warning: No ESP32-like device found.")
+        return None
+    try:
+        import serial
+        import serial.tools.list_ports
+        if port is not None:
+            return serial.Serial(port, baudrate, timeout=1, write_timeout=1)
+        for info in serial.tools.list_ports.comports():
+            if any(desc in info.description for desc in TARGET_DESCRIPTORS):
+                print(f"Connecting to ESP32 on {info.device} ({info.description})...")
+                return serial.Serial(info.device, baudrate, timeout=1, write_timeout=1)
+        if verbose:
+            print("Warning: No ESP32-like device found.")
+        return None
+    except Exception as e:
+        if verbose:
+            print(f"Warning: Could not connect to ESP32. {e}")
+        return None
@@ -0,0 +1,222 @@
+"""
+Evidence clips of fire events, encoded off the detection path.
+
+FireVideoProcessor hands every annotated frame to an EventClipWriter with
+its timestamp and alarm state. The detection thread only appends a
+reference to a bounded queue; if the encoder falls behind, frames are
+dropped rather than waited for, except while an annotated copy of a file
+is written: every frame has to reach it, so the file waits instead. The
+worker thread keeps the last few
+seconds as JPEG in a pre-roll ring buffer (bounded by duration and
+bytes), and when an alarm is raised writes an MP4 clip starting with the
+pre-roll and ending a few seconds after the alarm clears. For file
+sources it can also write a complete annotated copy.
+
+Enable from the environment (read by the video and camera windows):
+    FIRE_CLIP_DIR=clips              # write event clips into ./clips
+    FIRE_EXPORT_ANNOTATED=1          # also write <video>_annotated.mp4 there
+"""
+import collections
+import datetime
+import os
+import queue
+import threading
+
+import cv2
+
+FOURCC = "mp4v"
+
+
+def export_options_from_env():
+    """EventClipWriter options from FIRE_CLIP_DIR / FIRE_EXPORT_ANNOTATED, or None if unset."""
+    clip_dir = os.environ.get("FIRE_CLIP_DIR")
+    if not clip_dir:
+        return None
+    return {"clip_dir": clip_dir, "annotated_copy": os.environ.get("FIRE_EXPORT_ANNOTATED") == "1"}
+
+
+def source_name(source):
+    """Base name for the outputs of a source: file stem, or camera<N> for device indices."""
+    if isinstance(source, int):
+        return f"camera{source}"
+    name = os.path.splitext(os.path.basename(str(source).rstrip("/")))[0]
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in name) or "stream"
+
+
+class EventClipWriter:
+    """
+    Args:
+        clip_dir (str): Folder for the clips and annotated copies.
+        pre_roll_s (float): Seconds of video kept before an event starts.
+        post_roll_s (float): Seconds written after the alarm clears.
+        max_clip_s (float): Longer events are split into clips of at most this length.
+        annotated_copy (bool): Also write every frame of file sources to <name>_annotated.mp4.
+        jpeg_quality (int): Quality of the frames held in the pre-roll buffer.
+        pre_roll_max_bytes (int): Memory bound of the pre-roll buffer.
+        queue_size (int): Frames waiting for the encoder. When full, newer frames are
+            dropped, or waited for while an annotated copy is written.
+    """
+    def __init__(self, clip_dir="clips", pre_roll_s=5.0, post_roll_s=5.0, max_clip_s=120.0,
+                 annotated_copy=False, jpeg_quality=85, pre_roll_max_bytes=64 << 20, queue_size=16):
+        self.clip_dir = clip_dir
+        self.pre_roll_s = pre_roll_s
+        self.post_roll_s = post_roll_s
+        self.max_clip_s = max_clip_s
+        self.annotated_copy = annotated_copy
+        self.jpeg_quality = jpeg_quality
+        self.pre_roll_max_bytes = pre_roll_max_bytes
+        self.saved_clips = []
+        self.frames_dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        # Caller-side: whether submit() waits for room (annotated copy of a file source)
+        self._lossless = False
+        # Worker-side state
+        self._name = "stream"
+        self._fps = 30.0
+        self._live = False
+        self._pre_roll = collections.deque()
+        self._pre_roll_bytes = 0
+        self._clip = None
+        self._clip_path = None
+        self._clip_start = 0.0
+        self._last_active = 0.0
+        self._annotated = None
+
+    def start(self):
+        if self._thread is None:
+            os.makedirs(self.clip_dir, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="event-clips", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout=10.0):
+        """Finishes open outputs and stops the worker."""
+        if self._thread is not None:
+            self._put_control(("stop",), timeout)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def open(self, source, fps, live=False):
+        """Starts a new source; outputs of the previous one are finished first."""
+        self._lossless = self.annotated_copy and not live
+        self._put_control(("open", source_name(source), fps, live))
+
+    def finish(self):
+        """Finishes the open clip and annotated copy of the current source."""
+        self._put_control(("finish",))
+
+    def submit(self, frame, timestamp, fire_active, timeout=5.0):
+        """
+        Queues an annotated BGR frame. The frame must not be modified afterwards.
+        Returns at once, except while an annotated copy of a file is written:
+        then it waits up to timeout seconds for the encoder, so no frame is lost.
+        """
+        try:
+            if self._lossless:
+                self._queue.put(("frame", frame, timestamp, fire_active), timeout=timeout)
+            else:
+                self._queue.put_nowait(("frame", frame, timestamp, fire_active))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def _put_control(self, message, timeout=5.0):
+        # Control messages are never dropped, but a stuck encoder must not hang the caller
+        try:
+            self._queue.put(message, timeout=timeout)
+        except queue.Full:
+            print(f"Warning: Clip writer is not responding; '{message[0]}' was not delivered")
+
+    def _run(self):
+        while True:
+            message = self._queue.get()
+            kind = message[0]
+            try:
+                if kind == "frame":
+                    self._handle_frame(*message[1:])
+                elif kind == "open":
+                    self._finish_outputs()
+                    self._name, self._fps, self._live = message[1], message[2], message[3]
+                else:
+                    self._finish_outputs()
+            except Exception as e:
+                print(f"Warning: Clip export failed. {e}")
+                self._clip = self._annotated = None
+            if kind == "stop":
+                return
+
+    def _handle_frame(self, frame, timestamp, fire_active):
+        if self.annotated_copy and not self._live:
+            if self._annotated is None:
+                self._annotated = self._writer(os.path.join(self.clip_dir, f"{self._name}_annotated.mp4"), frame)
+            self._annotated.write(frame)
+
+        if fire_active:
+            self._last_active = timestamp
+        if self._clip is None:
+            if fire_active:
+                self._start_clip(frame, timestamp)
+            else:
+                self._push_pre_roll(frame, timestamp)
+                return
+        self._clip.write(frame)
+        if (not fire_active and timestamp - self._last_active >= self.post_roll_s) \
+                or timestamp - self._clip_start >= self.max_clip_s:
+            self._finish_clip()
+
+    def _push_pre_roll(self, frame, timestamp):
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return
+        self._pre_roll.append((timestamp, jpeg))
+        self._pre_roll_bytes += jpeg.nbytes
+        while self._pre_roll and (timestamp - self._pre_roll[0][0] > self.pre_roll_s
+                                  or self._pre_roll_bytes > self.pre_roll_max_bytes):
+            self._pre_roll_bytes -= self._pre_roll.popleft()[1].nbytes
+
+    def _start_clip(self, frame, timestamp):
+        if self._live:
+            stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")[:-3]
+        else:
+            stamp = f"t{timestamp:08.3f}s"
+        self._clip_path = self._unused_path(os.path.join(self.clip_dir, f"{self._name}_fire_{stamp}.mp4"))
+        self._clip = self._writer(self._clip_path, frame)
+        self._clip_start = timestamp
+        for _, jpeg in self._pre_roll:
+            self._clip.write(cv2.imdecode(jpeg, cv2.IMREAD_COLOR))
+        self._pre_roll.clear()
+        self._pre_roll_bytes = 0
+
+    def _finish_clip(self):
+        if self._clip is not None:
+            self._clip.release()
+            self._clip = None
+            self.saved_clips.append(self._clip_path)
+            print(f"Saved fire clip: {self._clip_path}")
+
+    def _finish_outputs(self):
+        self._finish_clip()
+        if self.frames_dropped:
+            print(f"Warning: {self.frames_dropped} frames of {self._name} were not exported (encoder behind)")
+            self.frames_dropped = 0
+        if self._annotated is not None:
+            self._annotated.release()
+            self._annotated = None
+        self._pre_roll.clear()
+        self._pre_roll_bytes = 0
+
+    @staticmethod
+    def _unused_path(path):
+        """path, or path with a _2, _3, ... suffix if a clip of that name exists."""
+        stem, ext = os.path.splitext(path)
+        count = 1
+        while os.path.exists(path):
+            count += 1
+            path = f"{stem}_{count}{ext}"
+        return path
+
+    def _writer(self, path, frame):
+        height, width = frame.shape[:2]
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*FOURCC), self._fps, (width, height))
+        if not writer.isOpened():
+            raise RuntimeError(f"Could not open {path} for writing")
+        return writer
@@ -0,0 +1,124 @@
+"""
+Simulated ESP32 alarm board on a pseudo-terminal (Linux/macOS).
+
+Runs the same AlarmState as main.py behind a pty, so the apps and
+AlarmTransport can be exercised without hardware. The board prints the
+same boot banner, acknowledges sequenced commands and can be paused to
+simulate a stalled USB-serial link.
+
+Usage:
+    python src/fake_esp32.py --delay-ms 20
+    ESP32_PORT=/dev/pts/N python src/RealTimeFire.py
+"""
+import argparse
+import os
+import select
+import sys
+import threading
+import time
+import tty
+# Ensure we can import from the same directory
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from alarm_protocol import AlarmState
+
+
+class FakeESP32:
+    """
+    Args:
+        delay_s (float): Processing delay per received line, like a busy board loop.
+        silence_on_safe (bool): Board built with SILENCE_ON_SAFE (see AlarmState).
+    Attributes:
+        port (str): Device path to open (set by start()).
+        state (AlarmState): Current alarm state of the simulated board.
+        received (list): Every command line received, in order.
+    """
+    def __init__(self, delay_s=0.0, silence_on_safe=False):
+        self.delay_s = delay_s
+        self.state = AlarmState(silence_on_safe)
+        self.received = []
+        self.port = None
+        self._master = None
+        self._slave = None
+        self._paused = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="fake-esp32", daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def pause(self):
+        """Stops reading, like a hung board: the host's writes eventually block."""
+        self._paused.set()
+
+    def resume(self):
+        self._paused.clear()
+
+    def _run(self):
+        os.write(self._master, b"ESP32 Fire Alert System Ready...\r\n")
+        buffer = b""
+        while not self._stop_event.is_set():
+            if self._paused.is_set():
+                time.sleep(0.05)
+                continue
+            ready, _, _ = select.select([self._master], [], [], 0.1)
+            if not ready:
+                continue
+            try:
+                buffer += os.read(self._master, 1024)
+            except OSError:
+                return
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line = line.decode(errors="replace").strip()
+                self.received.append(line)
+                if self.delay_s:
+                    time.sleep(self.delay_s)
+                reply = self.state.handle(line)
+                if reply:
+                    # MicroPython's print() ends lines with CRLF on the USB console
+                    os.write(self._master, (reply + "\r\n").encode())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulated ESP32 alarm board on a pty.")
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="Processing delay per command")
+    parser.add_argument("--silence-on-safe", action="store_true", help="Let SAFE turn the siren off")
+    args = parser.parse_args(argv)
+
+    board = FakeESP32(args.delay_ms / 1000, args.silence_on_safe)
+    port = board.start()
+    print(f"Fake ESP32 on {port}  (run the apps with ESP32_PORT={port})")
+    last = None
+    try:
+        while True:
+            current = (board.state.fire_active, board.state.latched)
+            if current != last:
+                print(f"siren={'ON' if current[0] else 'off'}  red_led={'ON' if current[1] else 'off'}")
+                last = current
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        board.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
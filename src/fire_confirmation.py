@@ -0,0 +1,121 @@
+"""
+Temporal confirmation of fire alarms.
+
+Single-frame detections flicker: one positive frame should not trip the
+alarm and one missed frame should not clear it. FireConfirmation keeps the
+last n per-frame scores (the highest detection confidence, 0 when nothing
+was detected) in a ring buffer and combines:
+  - k-of-n voting over the window,
+  - an exponential moving average of the score, time-weighted by frame
+    timestamps,
+  - hysteresis: separate raise and clear thresholds, each of which must
+    hold for a minimum time before the state flips.
+Only frame timestamps are used, never the wall clock, so replaying the same
+frames always gives the same alarm sequence.
+"""
+import math
+
+import numpy as np
+
+RAISED = "raised"
+CLEARED = "cleared"
+# Score thresholds derived from the detection threshold, as fractions of it
+RAISE_RATIO = 0.8
+CLEAR_RATIO = 0.4
+
+
+class FireConfirmation:
+    """
+    Args:
+        window (int): n, number of recent frames that vote.
+        votes_to_raise (int): k, positive frames in the window needed to raise.
+        votes_to_clear (int): Positive frames in the window at or below which the alarm may clear.
+        conf_thresh (float): Detection confidence threshold (the UI slider). The
+            score thresholds not given explicitly are derived from it, see set_conf_thresh.
+        positive_conf (float or None): A frame votes positive if it has a detection
+            scoring at least this (default: conf_thresh).
+        raise_conf (float or None): Score EMA needed to raise (default: RAISE_RATIO * conf_thresh).
+        clear_conf (float or None): Score EMA below which the alarm may clear, <= raise_conf
+            (default: CLEAR_RATIO * conf_thresh).
+        ema_halflife_s (float): Seconds of frame time for an old score to lose half its weight.
+        raise_hold_s (float): Seconds the raise conditions must hold before raising.
+        clear_hold_s (float): Seconds the clear conditions must hold before clearing.
+    """
+    def __init__(self, window=8, votes_to_raise=5, votes_to_clear=1, conf_thresh=0.5, positive_conf=None,
+                 raise_conf=None, clear_conf=None, ema_halflife_s=0.5, raise_hold_s=0.0, clear_hold_s=1.0):
+        if not 0 < votes_to_raise <= window:
+            raise ValueError("votes_to_raise must be between 1 and window")
+        self.window = window
+        self.votes_to_raise = votes_to_raise
+        self.votes_to_clear = votes_to_clear
+        # Thresholds given explicitly stay fixed when the detection threshold changes
+        self._fixed = {"positive_conf": positive_conf, "raise_conf": raise_conf, "clear_conf": clear_conf}
+        self.set_conf_thresh(conf_thresh)
+        if votes_to_clear >= votes_to_raise or self.clear_conf > self.raise_conf:
+            raise ValueError("Clear thresholds must be below raise thresholds")
+        self.ema_tau_s = ema_halflife_s / math.log(2)
+        self.raise_hold_s = raise_hold_s
+        self.clear_hold_s = clear_hold_s
+        self._positives = np.zeros(window, dtype=bool)
+        self.reset()
+
+    def set_conf_thresh(self, conf_thresh):
+        """
+        Follows a new detection threshold: a frame votes positive if it has a
+        box passing it, and the score EMA raises at RAISE_RATIO and may clear
+        below CLEAR_RATIO of it. The current alarm state is kept.
+        """
+        self.conf_thresh = conf_thresh
+        derived = {"positive_conf": conf_thresh, "raise_conf": RAISE_RATIO * conf_thresh,
+                   "clear_conf": CLEAR_RATIO * conf_thresh}
+        for name, value in self._fixed.items():
+            setattr(self, name, derived[name] if value is None else value)
+
+    def reset(self):
+        self._positives[:] = False
+        self._index = 0
+        self.votes = 0
+        self.ema = 0.0
+        self.active = False
+        self._last_timestamp = None
+        self._condition_since = None
+
+    def update(self, timestamp, score):
+        """
+        Adds one frame.
+        Args:
+            timestamp (float): Frame time in seconds (stream position or capture clock).
+            score (float): Highest detection confidence of the frame, 0 if none.
+        Returns:
+            str or None: RAISED or CLEARED when the alarm state changes, else None.
+        """
+        positive = score > 0 and score >= self.positive_conf
+        self.votes += int(positive) - int(self._positives[self._index])
+        self._positives[self._index] = positive
+        self._index = (self._index + 1) % self.window
+
+        if self._last_timestamp is None:
+            self.ema = score
+        else:
+            dt = max(0.0, timestamp - self._last_timestamp)
+            weight = 1.0 - math.exp(-dt / self.ema_tau_s) if self.ema_tau_s > 0 else 1.0
+            self.ema += weight * (score - self.ema)
+        self._last_timestamp = timestamp
+
+        if self.active:
+            condition = self.votes <= self.votes_to_clear and self.ema < self.clear_conf
+            hold_s = self.clear_hold_s
+        else:
+            condition = self.votes >= self.votes_to_raise and self.ema >= self.raise_conf
+            hold_s = self.raise_hold_s
+        if not condition:
+            self._condition_since = None
+            return None
+        if self._condition_since is None:
+            self._condition_since = timestamp
+        if timestamp - self._condition_since < hold_s:
+            return None
+
+        self.active = not self.active
+        self._condition_since = None
+        return RAISED if self.active else CLEARED
@@ -1,20 +1,272 @@
 
+import time
+from collections import deque
+
 import cv2
 import numpy as np
-from ultralytics import YOLO
+from model_registry import get_model
+from motion_gate import MotionGate
+from adaptive_stride import AdaptiveStride
+from box_tracker import BoxTracker
+from fire_confirmation import FireConfirmation
+from region_inference import RegionPlan, result_arrays
+import detection_arrays
+from fire_metrics import METRICS
+from video_decode import VideoDecoder
+from event_clips import EventClipWriter
+from model_cascade import ModelCascade, load_cascade
+
+
+class BatchSizeTuner:
+    """
+    Picks the inference batch size for offline video so that one batched
+    model call stays within a latency budget.
+    Grows the batch by one while calls finish well under budget and shrinks
+    it proportionally when a call overshoots.
+    """
+    def __init__(self, latency_budget_ms=250, min_size=1, max_size=16, start_size=2):
+        self.latency_budget_ms = latency_budget_ms
+        self.min_size = min_size
+        self.max_size = max_size
+        self.batch_size = max(min_size, min(start_size, max_size))
+
+    def update(self, batch_size, elapsed_ms):
+        """
+        Records the latency of a batched call and adjusts the batch size.
+        Returns:
+            int: The batch size to use for the next call.
+        """
+        # Partial batches (end of file) say little about the full-size cost
+        if batch_size < self.batch_size:
+            return self.batch_size
+        if elapsed_ms > self.latency_budget_ms:
+            scaled = int(batch_size * self.latency_budget_ms / elapsed_ms)
+            self.batch_size = max(self.min_size, min(scaled, self.batch_size - 1))
+        elif elapsed_ms < 0.8 * self.latency_budget_ms:
+            self.batch_size = min(self.max_size, self.batch_size + 1)
+        return self.batch_size
+
+
+class FrameResult:
+    """
+    One frame yielded by FireVideoProcessor.iter_frames. Only the detections
+    are computed eagerly; boxes are drawn and colors converted when
+    annotated() is called, so event consumers never pay for them.
+    """
+    __slots__ = ("index", "timestamp", "detections", "fire_detected", "inferred", "frame", "_names", "_drawn")
+
+    def __init__(self, index, timestamp, detections, fire_detected, inferred, frame, names):
+        self.index = index
+        self.timestamp = timestamp
+        # Boxes shown for this frame (carried forward or tracked between inferences)
+        self.detections = detections
+        self.fire_detected = fire_detected
+        # Whether the model ran on this frame
+        self.inferred = inferred
+        # BGR frame as read; annotated() draws onto it
+        self.frame = frame
+        self._names = names
+        self._drawn = False
+
+    def annotated(self, rgb=False):
+        """The frame with its boxes drawn (once, in place); RGB if rgb is True."""
+        if not self._drawn:
+            with METRICS.stage("draw"):
+                detection_arrays.draw(self.frame, self.detections, self._names)
+            self._drawn = True
+        if not rgb:
+            return self.frame
+        with METRICS.stage("color_convert"):
+            return cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB)
+
+    def records(self):
+        """The detections as detection_arrays.Detection objects."""
+        return detection_arrays.to_records(self.detections, self._names)
+
+    def __repr__(self):
+        return (f"FrameResult(index={self.index}, t={self.timestamp:.2f}, "
+                f"detections={len(self.detections)}, fire={self.fire_detected})")
+
 
 class FireVideoProcessor:
     """
     Handles video processing and fire detection logic using YOLOv8.
     Separated from the GUI for better testability and modularity.
     """
-    def __init__(self, model_path="models/fire_8n30.pt"):
-        self.model = YOLO(model_path)
-        self.cap = None
+    def __init__(self, model_path="models/fire_8n30.pt", model=None, backend="auto"):
+        # An already-loaded model can be shared by several processors (one per stream);
+        # otherwise the process-wide registry loads each set of weights only once
+        if model is None:
+            model, backend = get_model(model_path, backend)
+        self.model = model
+        self.backend = backend
+        self.decoder = None
+        # VideoDecoder options (hw_accel, threads) used by load_video
+        self.decode_options = {}
         self.fps = 30
-        self.last_boxes = []
+        self.last_boxes = detection_arrays.empty()
         self.frame_count = 0
         self.names = self.model.names
+        # Batch mode (offline files only): None means one model call per sampled frame
+        self.batch_size = None
+        self.batch_tuner = None
+        self._pending_results = deque()
+        # Optional pre-filter that skips inference on static scenes
+        self.motion_gate = None
+        # Optional scheduler replacing the fixed process_interval
+        self.stride_scheduler = None
+        self._frames_since_inference = 0
+        # Optional tracker moving boxes between inference frames
+        self.tracker = None
+        # Apps showing frames through FrameDisplay turn this off: it converts at thumbnail size
+        self.convert_rgb = True
+        # Inference resolution (None: library default) and optional ROI/tiling plan
+        self.imgsz = None
+        self.regions = None
+        # Optional temporal confirmation deciding the reported fire state
+        self.confirmation = None
+        # Optional writer of event clips / annotated copies, fed every annotated frame
+        self.exporter = None
+        # Optional second stage: a larger model confirms frames the model flagged as suspect
+        self.cascade = None
+        # Set when frames come from a FramePool: the exporter then gets copies,
+        # since pooled buffers are overwritten once they are recycled
+        self.pooled_frames = False
+        # Frames read from the source and the timestamp (seconds) of the last one
+        self.frames_read = 0
+        self.last_frame_time = 0.0
+        self.live_source = False
+        self.frame_total = 0
+
+    def enable_tracking(self, **tracker_options):
+        """
+        Carries boxes forward between inferences with a BoxTracker instead of
+        redrawing stale ones. Keyword arguments are passed to BoxTracker.
+        Returns:
+            BoxTracker: The tracker, whose tracks carry stable IDs.
+        """
+        self.tracker = BoxTracker(**tracker_options)
+        return self.tracker
+
+    def enable_adaptive_stride(self, **stride_options):
+        """
+        Replaces the fixed process_interval with a stride derived from measured
+        inference time. Keyword arguments are passed to AdaptiveStride.
+        Returns:
+            AdaptiveStride: The scheduler.
+        """
+        self.stride_scheduler = AdaptiveStride(**stride_options)
+        self.stride_scheduler.fps = self.fps
+        return self.stride_scheduler
+
+    def enable_motion_gate(self, **gate_options):
+        """
+        Skips the model on sampled frames where nothing moved.
+        Keyword arguments are passed to MotionGate.
+        Returns:
+            MotionGate: The gate, whose stats() report skipped inferences.
+        """
+        self.motion_gate = MotionGate(**gate_options)
+        return self.motion_gate
+
+    def enable_cascade(self, confirm_model_path=None, model=None, backend="auto", **cascade_options):
+        """
+        Turns the processor's model into the screening stage of a ModelCascade:
+        it runs at the cascade's suspect_conf, and suspect frames are confirmed
+        by a larger model (fire_8l.pt unless confirm_model_path or an already
+        loaded model is given). Keyword arguments are passed to ModelCascade.
+        Returns:
+            ModelCascade: The cascade, whose stats() report the hit rate of each stage.
+        """
+        if model is None:
+            self.cascade = load_cascade(confirm_model_path, backend, **cascade_options)
+        else:
+            self.cascade = ModelCascade(model, **cascade_options)
+        return self.cascade
+
+    def disable_cascade(self):
+        self.cascade = None
+
+    def screen_conf(self, conf_thresh):
+        """Threshold the processor's own model runs at: the suspect threshold with a cascade."""
+        return self.cascade.suspect_conf if self.cascade else conf_thresh
+
+    def enable_confirmation(self, min_track_hits=3, **confirmation_options):
+        """
+        Reports fire only once a FireConfirmation (k-of-n voting, score EMA,
+        hysteresis) confirms it, instead of on every frame with a box.
+        Args:
+            min_track_hits (int): With tracking enabled, only tracks matched in at
+                least this many inferences vote, so persistence is judged per track.
+            **confirmation_options: Passed to FireConfirmation.
+        """
+        self.min_track_hits = min_track_hits
+        self.confirmation = FireConfirmation(**confirmation_options)
+
+    def enable_export(self, **export_options):
+        """
+        Writes annotated MP4 clips around every fire event (and optionally a
+        full annotated copy of file sources) on a background encoder thread.
+        Options are passed to EventClipWriter.
+        """
+        self.disable_export()
+        self.exporter = EventClipWriter(**export_options)
+        self.exporter.start()
+        if self.decoder:
+            self.exporter.open(self.decoder.source, self.fps, self.live_source)
+
+    def disable_export(self):
+        """Finishes open clips and stops the encoder thread."""
+        if self.exporter:
+            self.exporter.close()
+            self.exporter = None
+
+    def set_inference_size(self, imgsz):
+        """
+        Sets the resolution frames are letterboxed to before inference
+        (e.g. 320, 416 or 640). Lower is faster but misses smaller fires.
+        None restores the model's default.
+        """
+        self.imgsz = imgsz
+
+    def enable_regions(self, rois=None, tile_size=None, tile_overlap=0.2):
+        """
+        Runs the model only on regions of interest of each frame, optionally
+        split into overlapping tiles. Boxes are mapped back to frame coordinates.
+
+        Args:
+            rois (list or None): (x1, y1, x2, y2) regions in pixels or frame fractions;
+                None keeps the whole frame (useful with tiling alone).
+            tile_size (int or None): Split regions larger than this into tiles.
+            tile_overlap (float): Overlap between neighboring tiles.
+        """
+        self.regions = RegionPlan(rois, tile_size, tile_overlap)
+
+    def disable_regions(self):
+        self.regions = None
+
+    def enable_batching(self, batch_size="auto", latency_budget_ms=250, max_batch_size=16):
+        """
+        Runs sampled frames through the model in batches instead of one by one.
+        Only meant for files: frames are buffered until a batch is full.
+
+        Args:
+            batch_size (int or str): Fixed batch size, or "auto" to tune it
+                against latency_budget_ms.
+            latency_budget_ms (float): Target duration of one batched call.
+            max_batch_size (int): Upper bound for the auto-tuned size.
+        """
+        if batch_size == "auto":
+            self.batch_tuner = BatchSizeTuner(latency_budget_ms, max_size=max_batch_size)
+            self.batch_size = self.batch_tuner.batch_size
+        else:
+            self.batch_tuner = None
+            self.batch_size = max(1, int(batch_size))
+
+    def disable_batching(self):
+        self.batch_size = None
+        self.batch_tuner = None
+        self._pending_results.clear()
 
     def load_video(self, video_path):
         """
@@ -22,41 +274,420 @@ class FireVideoProcessor:
         Returns:
             bool: True if video loaded successfully, False otherwise.
         """
-        self.cap = cv2.VideoCapture(video_path)
-        if self.cap.isOpened():
-            self.fps = self.cap.get(cv2.CAP_PROP_FPS)
-            # Handle invalid FPS values
-            if not self.fps or self.fps <= 0:
-                self.fps = 30
+        self.release_video()
+        self.decoder = VideoDecoder(video_path, **self.decode_options)
+        # Cameras and network streams are timed by the capture clock, files by their position
+        self.live_source = self.decoder.is_live
+        if self.decoder.is_opened():
+            self.fps = self.decoder.fps
+            self.frame_total = self.decoder.frame_total
             self.frame_count = 0
-            self.last_boxes = []
+            self.frames_read = 0
+            self.last_frame_time = 0.0
+            self.last_boxes = detection_arrays.empty()
+            self._pending_results.clear()
+            if self.confirmation:
+                self.confirmation.reset()
+            if self.exporter:
+                self.exporter.open(video_path, self.fps, self.live_source)
+            if self.motion_gate:
+                self.motion_gate.reset()
+            if self.stride_scheduler:
+                self.stride_scheduler.fps = self.fps
+            self._frames_since_inference = 0
+            if self.tracker:
+                self.tracker.reset()
             return True
         return False
 
     def release_video(self):
         """Releases the video capture resource."""
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        if self.decoder:
+            self.decoder.release()
+            self.decoder = None
+            if self.exporter:
+                self.exporter.finish()
+        self._pending_results.clear()
 
     def get_first_frame(self):
         """
-        Gets the first frame for preview purposes without advancing substantially.
+        Gets the first frame for preview purposes. The decoder keeps it, so
+        playback starts from it without seeking back.
         Returns:
-            tuple: (frame_rgb, success)
+            tuple: (frame_rgb, success); the frame stays BGR if convert_rgb is False.
         """
-        if not self.cap or not self.cap.isOpened():
+        if not self.decoder or not self.decoder.is_opened():
             return None, False
 
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-        ret, frame = self.cap.read()
-        if ret:
-            # Convert to RGB for GUI display
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            # Reset pointer so playing starts from beginning
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            return frame_rgb, True
-        return None, False
+        if self.decoder.position != 0:
+            self.decoder.seek(0)
+        frame = self.decoder.peek()
+        if frame is None:
+            return None, False
+        # Convert to RGB for GUI display
+        return self.to_display(frame), True
+
+    def read_frame(self, out=None):
+        """
+        Reads the next raw frame from the capture source and sets
+        last_frame_time to its timestamp.
+        Args:
+            out (ndarray or None): Buffer to decode into (e.g. from a FramePool).
+        Returns:
+            tuple: (frame_bgr, status)
+                frame_bgr: The frame as read by OpenCV (or None if finished/error)
+                status: String status ("ok", "finished", "error")
+        """
+        if not self.decoder or not self.decoder.is_opened():
+            return None, "error"
+
+        with METRICS.stage("capture"):
+            ret, frame = self.decoder.read(out)
+        if not ret:
+            return None, "finished"
+        METRICS.inc("frames_read")
+        self.frames_read += 1
+        self.last_frame_time = time.monotonic() if self.live_source else (self.decoder.position - 1) / self.fps
+        return frame, "ok"
+
+    def skip_frames(self, count):
+        """
+        Advances past frames that are neither shown nor inferred, without
+        retrieving them as images.
+        Returns:
+            int: Frames skipped (fewer at the end of the video).
+        """
+        if not self.decoder or not self.decoder.is_opened():
+            return 0
+        with METRICS.stage("capture"):
+            skipped = self.decoder.skip(count)
+        self.frames_read += skipped
+        return skipped
+
+    def detect(self, frame, conf_thresh=0.5):
+        """
+        Runs the model on a single BGR frame.
+        Returns:
+            ndarray: detection_arrays.DETECTION_DTYPE array, frame_idx set to frame_count.
+        """
+        inputs = self.inference_inputs(frame)
+        with METRICS.stage("inference"):
+            results = self.run_model(inputs if len(inputs) > 1 else inputs[0], self.screen_conf(conf_thresh))
+        METRICS.inc("inferences")
+        with METRICS.stage("postprocess"):
+            dets = self.boxes_from_inputs(frame.shape, results, self.frame_count)
+        if self.cascade:
+            dets = self.cascade.confirm([frame], [dets], conf_thresh)[0]
+        return dets
+
+    def detect_batch(self, frames, conf_thresh=0.5, frame_indices=None):
+        """
+        Runs the model once on a list of BGR frames.
+        Args:
+            frame_indices (list or None): frame_idx of each frame (default: position in the list).
+        Returns:
+            list: One detection array per input frame.
+        """
+        if not frames:
+            return []
+        inputs = [self.inference_inputs(frame) for frame in frames]
+        with METRICS.stage("inference_batch"):
+            results = self.run_model([img for frame_inputs in inputs for img in frame_inputs],
+                                     self.screen_conf(conf_thresh))
+        METRICS.inc("inferences", len(frames))
+        if frame_indices is None:
+            frame_indices = range(len(frames))
+        boxes = []
+        start = 0
+        with METRICS.stage("postprocess"):
+            for frame, frame_inputs, frame_idx in zip(frames, inputs, frame_indices):
+                boxes.append(self.boxes_from_inputs(frame.shape, results[start:start + len(frame_inputs)],
+                                                    frame_idx))
+                start += len(frame_inputs)
+        if self.cascade:
+            boxes = self.cascade.confirm(frames, boxes, conf_thresh)
+        return boxes
+
+    def run_model(self, inputs, conf_thresh=0.5):
+        """Calls the model on one image or a list, at the configured inference size."""
+        if self.imgsz:
+            return self.model(inputs, conf=conf_thresh, imgsz=self.imgsz, verbose=False)
+        return self.model(inputs, conf=conf_thresh, verbose=False)
+
+    def inference_inputs(self, frame):
+        """Images the model runs on for a frame: the frame itself, or its ROI crops/tiles."""
+        if self.regions is None:
+            return [frame]
+        return self.regions.crops(frame)
+
+    def boxes_from_inputs(self, frame_shape, results, frame_idx=0):
+        """
+        Detection array in frame coordinates from the model results for
+        inference_inputs(frame). The model already applied the confidence
+        threshold, so nothing is filtered again here.
+        """
+        if self.regions is None:
+            if len(results) == 1:
+                return detection_arrays.from_result(results[0], frame_idx)
+            return np.concatenate([detection_arrays.from_result(r, frame_idx) for r in results])
+        xyxy, conf, cls = self.regions.merge(frame_shape, [result_arrays(r) for r in results])
+        return detection_arrays.from_arrays(xyxy, conf, cls, frame_idx)
+
+    def draw_boxes(self, frame, boxes):
+        """
+        Draws a detection array onto the frame in place.
+        Returns:
+            bool: True if at least one box was drawn (fire detected).
+        """
+        return detection_arrays.draw(frame, boxes, self.names)
+
+    def update_boxes(self, detections=None):
+        """
+        Advances last_boxes by one frame.
+        Args:
+            detections (ndarray or None): Detection array from the model for
+                this frame, or None if the model did not run on it.
+        """
+        if self.tracker is None:
+            if detections is not None:
+                self.last_boxes = detections
+            return
+        with METRICS.stage("tracking"):
+            self.tracker.predict()
+            if detections is not None:
+                self.tracker.update(detections)
+            self.last_boxes = self.tracker.boxes(self.frame_count)
+
+    def should_infer(self, frame, process_interval=3):
+        """
+        Decides whether the model runs on this frame: every process_interval
+        frames (or every adaptive stride), unless the motion gate reports a
+        static scene.
+        """
+        if self.stride_scheduler is not None:
+            stride = self.stride_scheduler.stride(fire_suspected=len(self.last_boxes) > 0)
+            due = self.frame_count == 0 or self._frames_since_inference + 1 >= stride
+        else:
+            due = self.frame_count % process_interval == 0
+        if due and self.motion_gate is not None:
+            with METRICS.stage("motion_gate"):
+                due = self.motion_gate.should_infer(frame)
+        self._frames_since_inference = 0 if due else self._frames_since_inference + 1
+        return due
+
+    def confirm(self, timestamp, conf_thresh=None):
+        """
+        Fire state reported for the current frame: whether any box is shown,
+        or the confirmed alarm state once confirmation is enabled.
+        conf_thresh is the threshold the boxes were detected at; the
+        confirmation follows it when it changes (e.g. the UI slider moved).
+        """
+        if self.confirmation is None:
+            return len(self.last_boxes) > 0
+        if conf_thresh is not None and conf_thresh != self.confirmation.conf_thresh:
+            self.confirmation.set_conf_thresh(conf_thresh)
+        if self.tracker is not None:
+            # Score of the best persistent track, not of whatever box this frame shows
+            tracks = self.tracker.persistent_tracks(self.min_track_hits)
+            score = max((t.conf for t in tracks), default=0.0)
+        else:
+            score = float(self.last_boxes["conf"].max()) if len(self.last_boxes) else 0.0
+        self.confirmation.update(timestamp, score)
+        return self.confirmation.active
+
+    def export_frame(self, frame, timestamp, fire_detected):
+        """Hands an annotated BGR frame to the clip writer, if export is enabled."""
+        if self.exporter:
+            self.exporter.submit(frame.copy() if self.pooled_frames else frame, timestamp, fire_detected)
+
+    def process_frame(self, frame, conf_thresh=0.5, process_interval=3, timestamp=None):
+        """
+        Runs detection (every N frames), draws and converts an already-read frame.
+        This is the inference stage used by both process_next_frame and the
+        threaded FramePipeline.
+
+        Args:
+            frame (ndarray): BGR frame as returned by read_frame.
+            conf_thresh (float): Confidence threshold for detection.
+            process_interval (int): Run detection every N frames.
+            timestamp (float or None): Frame time in seconds; defaults to last_frame_time.
+
+        Returns:
+            tuple: (frame_rgb, fire_detected, status)
+        """
+        if timestamp is None:
+            timestamp = self.last_frame_time
+        start_time = time.perf_counter()
+        # Run detection logic periodically
+        detections = self._detect_if_due(frame, conf_thresh, process_interval)
+        self.update_boxes(detections)
+
+        # Draw current (cached or tracked) boxes on every frame
+        with METRICS.stage("draw"):
+            self.draw_boxes(frame, self.last_boxes)
+        fire_detected = self.confirm(timestamp, conf_thresh)
+        self.export_frame(frame, timestamp, fire_detected)
+
+        self.frame_count += 1
+
+        # Convert to RGB for display
+        frame_rgb = self.to_display(frame)
+
+        if self.stride_scheduler and detections is None:
+            self.stride_scheduler.record_overhead((time.perf_counter() - start_time) * 1000)
+
+        return frame_rgb, fire_detected, "ok"
+
+    def _detect_if_due(self, frame, conf_thresh, process_interval):
+        """Detection array of the frame, or None if the model skips it."""
+        if not self.should_infer(frame, process_interval):
+            return None
+        infer_start = time.perf_counter()
+        detections = self.detect(frame, conf_thresh)
+        if self.stride_scheduler:
+            self.stride_scheduler.record_inference((time.perf_counter() - infer_start) * 1000)
+        return detections
+
+    def to_display(self, frame):
+        """Full-frame BGR->RGB conversion, skipped when convert_rgb is False."""
+        if not self.convert_rgb:
+            return frame
+        with METRICS.stage("color_convert"):
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    def frames_per_batch(self, process_interval=3):
+        """
+        Number of consecutive frames, starting at the current frame_count,
+        that contain exactly batch_size sampled frames.
+        """
+        batch_size = self.batch_size or 1
+        if self.stride_scheduler is not None:
+            stride = self.stride_scheduler.current_stride
+            first_offset = 0 if self.frame_count == 0 else max(0, stride - 1 - self._frames_since_inference)
+            return first_offset + (batch_size - 1) * stride + 1
+        first_sampled = -(-self.frame_count // process_interval) * process_interval
+        last_sampled = first_sampled + (batch_size - 1) * process_interval
+        return last_sampled - self.frame_count + 1
+
+    def process_frames(self, frames, conf_thresh=0.5, process_interval=3, timestamps=None):
+        """
+        Batched counterpart of process_frame for consecutive frames of a file.
+        All sampled frames (every process_interval) go through a single model
+        call; boxes are carried forward to the frames in between.
+        timestamps defaults to the file position of each frame.
+
+        Returns:
+            list: One (frame_rgb, fire_detected, status) tuple per input frame.
+        """
+        boxes_by_index = self._detect_batch_if_due(frames, conf_thresh, process_interval)
+
+        draw_start = time.perf_counter()
+        results = []
+        if timestamps is None:
+            timestamps = self._batch_timestamps(len(frames))
+        for i, frame in enumerate(frames):
+            self.update_boxes(boxes_by_index.get(i))
+            with METRICS.stage("draw"):
+                self.draw_boxes(frame, self.last_boxes)
+            fire_detected = self.confirm(timestamps[i], conf_thresh)
+            self.export_frame(frame, timestamps[i], fire_detected)
+            self.frame_count += 1
+            results.append((self.to_display(frame), fire_detected, "ok"))
+        if self.stride_scheduler and frames:
+            self.stride_scheduler.record_overhead((time.perf_counter() - draw_start) * 1000 / len(frames))
+        return results
+
+    def _detect_batch_if_due(self, frames, conf_thresh, process_interval):
+        """
+        One model call over the frames that are due for inference.
+        Returns:
+            dict: Detection array by position in frames, for the sampled frames only.
+        """
+        sampled = []
+        frame_count = self.frame_count
+        for i, frame in enumerate(frames):
+            self.frame_count = frame_count + i
+            if self.should_infer(frame, process_interval):
+                sampled.append(i)
+        self.frame_count = frame_count
+
+        start_time = time.perf_counter()
+        batch_boxes = self.detect_batch([frames[i] for i in sampled], conf_thresh,
+                                        [frame_count + i for i in sampled])
+        if sampled:
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            if self.batch_tuner:
+                self.batch_size = self.batch_tuner.update(len(sampled), elapsed_ms)
+            if self.stride_scheduler:
+                self.stride_scheduler.record_inference(elapsed_ms / len(sampled))
+        return dict(zip(sampled, batch_boxes))
+
+    def _batch_timestamps(self, count):
+        # File positions of the last `count` frames read
+        first = self.last_frame_time - (count - 1) / self.fps
+        return [first + i / self.fps for i in range(count)]
+
+    def iter_frames(self, source=None, conf_thresh=0.5, process_interval=3):
+        """
+        Generator over the frames of a source, one FrameResult each, until the
+        source ends. Nothing is drawn or converted unless a result's
+        annotated() is called (or export is enabled, which needs annotated
+        frames), so it composes cheaply with itertools, e.g.
+        ``itertools.islice((r for r in processor.iter_frames(path) if r.fire_detected), 1)``.
+
+        Args:
+            source (str, int or None): Video file, camera index or stream URL to
+                load first; None continues the video already loaded.
+            conf_thresh (float): Confidence threshold for detection.
+            process_interval (int): Run detection every N frames.
+
+        Raises:
+            RuntimeError: If source cannot be opened.
+        """
+        if source is not None and not self.load_video(source):
+            raise RuntimeError(f"Could not open {source}")
+        try:
+            while True:
+                frames = []
+                for _ in range(self.frames_per_batch(process_interval) if self.batch_size else 1):
+                    frame, _ = self.read_frame()
+                    if frame is None:
+                        break
+                    frames.append(frame)
+                if not frames:
+                    return
+                if self.batch_size:
+                    boxes_by_index = self._detect_batch_if_due(frames, conf_thresh, process_interval)
+                    timestamps = self._batch_timestamps(len(frames))
+                else:
+                    boxes_by_index = {0: self._detect_if_due(frames[0], conf_thresh, process_interval)}
+                    timestamps = [self.last_frame_time]
+                for i, frame in enumerate(frames):
+                    detections = boxes_by_index.get(i)
+                    self.update_boxes(detections)
+                    fire_detected = self.confirm(timestamps[i], conf_thresh)
+                    result = FrameResult(self.frame_count, timestamps[i], self.last_boxes, fire_detected,
+                                         detections is not None, frame, self.names)
+                    if self.exporter:
+                        self.export_frame(result.annotated(), timestamps[i], fire_detected)
+                    self.frame_count += 1
+                    yield result
+        finally:
+            # Also runs when the consumer stops early (break, islice, close())
+            if source is not None:
+                self.release_video()
+
+    def _fill_pending_results(self, conf_thresh, process_interval):
+        frames = []
+        status = "ok"
+        for _ in range(self.frames_per_batch(process_interval)):
+            frame, status = self.read_frame()
+            if frame is None:
+                break
+            frames.append(frame)
+        self._pending_results.extend(self.process_frames(frames, conf_thresh, process_interval))
+        if status != "ok":
+            self._pending_results.append((None, False, status))
 
     def process_next_frame(self, conf_thresh=0.5, process_interval=3):
         """
@@ -68,40 +699,16 @@ class FireVideoProcessor:
             
         Returns:
             tuple: (frame_rgb, fire_detected, status)
-                frame_rgb: The processed frame in RGB (or None if finished/error)
+                frame_rgb: The processed frame in RGB, BGR if convert_rgb is False (or None if finished/error)
                 fire_detected: Boolean indicating if fire was detected
                 status: String status ("ok", "finished", "error")
         """
-        if not self.cap or not self.cap.isOpened():
-            return None, False, "error"
-            
-        ret, frame = self.cap.read()
-        if not ret:
-            return None, False, "finished"
-            
-        # Run detection logic periodically
-        if self.frame_count % process_interval == 0:
-            self.last_boxes = []
-            results = self.model(frame, conf=conf_thresh, verbose=False)
-            for r in results:
-                boxes = r.boxes
-                for box in boxes:
-                    if float(box.conf[0]) >= conf_thresh:
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
-                        label = f"{self.names[int(box.cls[0])]}: {box.conf[0]:.2f}"
-                        self.last_boxes.append((x1, y1, x2, y2, label))
-        
-        # Draw cached boxes on every frame
-        fire_detected = False
-        for (x1, y1, x2, y2, label) in self.last_boxes:
-            fire_detected = True
-            # Color: (238, 187, 195) is #eebbc3 in BGR (approx)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (195, 187, 238), 3)
-            cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (195, 187, 238), 2)
-            
-        self.frame_count += 1
-        
-        # Convert to RGB for display
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        return frame_rgb, fire_detected, "ok"
+        if self.batch_size:
+            if not self._pending_results:
+                self._fill_pending_results(conf_thresh, process_interval)
+            return self._pending_results.popleft()
+
+        frame, status = self.read_frame()
+        if frame is None:
+            return None, False, status
+        return self.process_frame(frame, conf_thresh, process_interval)
@@ -0,0 +1,193 @@
+"""
+Opt-in per-stage instrumentation for the detection loops.
+
+Code wraps each stage in `with METRICS.stage("inference"):`. While metrics
+are disabled (the default), stage() returns a shared no-op context manager,
+so the cost is one attribute check per stage. Once enabled, durations are
+collected into Prometheus-style histograms, served as text on localhost and
+optionally summarized periodically on stdout.
+
+Enable from the environment (read by the apps and CLIs):
+    FIRE_METRICS_PORT=9108           # serve http://127.0.0.1:9108/metrics
+    FIRE_METRICS_LOG_INTERVAL=60     # print a summary every 60 s
+"""
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _Histogram:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+
+class StageMetrics:
+    """Thread-safe stage timers and event counters."""
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._server = None
+        self._log_thread = None
+        self._stop_event = threading.Event()
+
+    def stage(self, name):
+        """Context manager timing one stage. A shared no-op while disabled."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, name)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = _Histogram()
+            hist.count += 1
+            hist.total += seconds
+            hist.max = max(hist.max, seconds)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    hist.buckets[i] += 1
+                    break
+
+    def inc(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self):
+        """Copies of all histograms and counters, taken under the lock."""
+        with self._lock:
+            histograms = {name: (h.count, h.total, h.max, list(h.buckets)) for name, h in self._histograms.items()}
+            return histograms, dict(self._counters)
+
+    def render_prometheus(self):
+        """Current metrics in the Prometheus text exposition format."""
+        histograms, counters = self.snapshot()
+        lines = ["# HELP fire_stage_seconds Time spent in each detection stage.",
+                 "# TYPE fire_stage_seconds histogram"]
+        for name in sorted(histograms):
+            count, total, _, buckets = histograms[name]
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f'fire_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'fire_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'fire_stage_seconds_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'fire_stage_seconds_count{{stage="{name}"}} {count}')
+        lines += ["# HELP fire_events_total Detection loop event counters.",
+                  "# TYPE fire_events_total counter"]
+        for name in sorted(counters):
+            lines.append(f'fire_events_total{{event="{name}"}} {counters[name]}')
+        return "\n".join(lines) + "\n"
+
+    def enable(self, port=None, log_interval=None):
+        """
+        Starts collecting. Optionally serves /metrics on 127.0.0.1:port and
+        prints a summary every log_interval seconds.
+        """
+        self.enabled = True
+        self._stop_event.clear()
+        if port and self._server is None:
+            self._server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(self))
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+            print(f"Metrics available at http://127.0.0.1:{self._server.server_address[1]}/metrics")
+        if log_interval and self._log_thread is None:
+            self._log_thread = threading.Thread(target=self._log_loop, args=(log_interval,), daemon=True)
+            self._log_thread.start()
+
+    def disable(self):
+        self.enabled = False
+        self._stop_event.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self._log_thread = None
+
+    def _log_loop(self, interval):
+        previous = {}
+        while not self._stop_event.wait(interval):
+            histograms, counters = self.snapshot()
+            parts = []
+            for name in sorted(histograms):
+                count, total, max_seconds, _ = histograms[name]
+                prev_count, prev_total = previous.get(name, (0, 0.0))
+                if count > prev_count:
+                    mean_ms = (total - prev_total) / (count - prev_count) * 1000
+                    parts.append(f"{name}={mean_ms:.1f}ms")
+                previous[name] = (count, total)
+            if parts:
+                print(f"[metrics] last {interval:g}s mean: " + " ".join(parts)
+                      + "".join(f" {name}={value}" for name, value in sorted(counters.items())))
+
+
+def _make_handler(metrics):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+# Process-wide instance used by all modules
+METRICS = StageMetrics()
+
+
+def enable_from_env():
+    """Enables METRICS if FIRE_METRICS_PORT or FIRE_METRICS_LOG_INTERVAL is set."""
+    port = int(os.environ.get("FIRE_METRICS_PORT", "0") or 0)
+    log_interval = float(os.environ.get("FIRE_METRICS_LOG_INTERVAL", "0") or 0)
+    if port or log_interval:
+        METRICS.enable(port=port or None, log_interval=log_interval or None)
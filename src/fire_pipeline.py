@@ -0,0 +1,194 @@
+import queue
+import threading
+
+from fire_metrics import METRICS
+from frame_pool import FramePool
+
+# Queue policies when a stage produces faster than the next one consumes
+DROP_OLDEST = "drop_oldest"  # Cameras: always keep the freshest frames
+BLOCK = "block"              # Files: never lose a frame, slow the producer down
+
+
+class FramePipeline:
+    """
+    Runs a FireVideoProcessor as a three-stage pipeline:
+    a capture thread reading frames, an inference worker running detection,
+    drawing and color conversion, and a UI consumer polling get_result().
+
+    Stages are joined by bounded queues. With DROP_OLDEST the capture keeps
+    running at sensor rate and stale frames are discarded when inference falls
+    behind; with BLOCK every frame is processed in order. If the processor
+    has batching enabled (see FireVideoProcessor.enable_batching), a BLOCK
+    pipeline feeds the worker whole batches instead of single frames.
+
+    With pool_frames, frames are decoded into a fixed FramePool instead of
+    new arrays (bounded memory for long sessions). The consumer then hands
+    every frame it got from get_result() back with recycle() once it is shown.
+    """
+    def __init__(self, processor, drop_policy=BLOCK, queue_size=4, conf_thresh=0.5, process_interval=3,
+                 pool_frames=False):
+        if drop_policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.processor = processor
+        self.drop_policy = drop_policy
+        # Written by the UI thread, read by the inference worker
+        self.conf_thresh = conf_thresh
+        self.process_interval = process_interval
+
+        self.frame_queue = queue.Queue(maxsize=queue_size)
+        self.result_queue = queue.Queue(maxsize=queue_size)
+        self.dropped_frames = 0
+        # Both queues full, plus the frames being read, processed (a whole batch in batch mode) and shown
+        in_process = processor.frames_per_batch(process_interval) if processor.batch_size else 1
+        self.frame_pool = FramePool(2 * queue_size + 3 + in_process) if pool_frames else None
+        self._frame_shape = None
+
+        self._stop_event = threading.Event()
+        self._capture_thread = None
+        self._inference_thread = None
+
+    def start(self):
+        """Starts the capture and inference threads."""
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self.processor.pooled_frames = self.frame_pool is not None
+        self._capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._inference_thread = threading.Thread(target=self._inference_loop, daemon=True)
+        self._capture_thread.start()
+        self._inference_thread.start()
+
+    def stop(self, timeout=5.0):
+        """
+        Signals both threads to stop and waits for them.
+        Must be called before releasing the processor's video source.
+        """
+        self._stop_event.set()
+        for thread in (self._capture_thread, self._inference_thread):
+            if thread is not None:
+                thread.join(timeout)
+        self._capture_thread = None
+        self._inference_thread = None
+        self._clear(self.frame_queue)
+        self._clear(self.result_queue)
+        self.processor.pooled_frames = False
+
+    def is_running(self):
+        return self._capture_thread is not None and self._capture_thread.is_alive()
+
+    def get_result(self):
+        """
+        Non-blocking fetch for the UI thread.
+        Returns:
+            tuple or None: (frame_rgb, fire_detected, status) as returned by
+            FireVideoProcessor.process_next_frame, or None if nothing is ready yet.
+        """
+        try:
+            return self.result_queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def recycle(self, frame):
+        """Returns a frame from get_result() to the pool once the consumer is done with it."""
+        if self.frame_pool is not None:
+            self.frame_pool.release(frame)
+
+    def _capture_loop(self):
+        while not self._stop_event.is_set():
+            buffer = None
+            if self.frame_pool is not None and self._frame_shape is not None:
+                buffer = self.frame_pool.acquire(self._frame_shape)
+            frame, status = self.processor.read_frame(buffer)
+            if frame is not None:
+                self._frame_shape = frame.shape
+            else:
+                self.recycle(buffer)
+            # The timestamp travels with the frame: read_frame overwrites last_frame_time
+            if not self._put(self.frame_queue, (frame, status, self.processor.last_frame_time)):
+                return
+            if frame is None:
+                # End of stream or read error: forwarded downstream, nothing more to read
+                return
+
+    def _inference_loop(self):
+        if self.processor.batch_size and self.drop_policy == BLOCK:
+            self._batched_inference_loop()
+            return
+
+        while not self._stop_event.is_set():
+            try:
+                frame, status, timestamp = self.frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            if frame is None:
+                self._put(self.result_queue, (None, False, status))
+                return
+
+            result = self.processor.process_frame(frame, self.conf_thresh, self.process_interval, timestamp)
+            if result[0] is not frame:
+                # Converted to a new RGB array: the decoded buffer is free again
+                self.recycle(frame)
+            if not self._put(self.result_queue, result):
+                return
+
+    def _batched_inference_loop(self):
+        while not self._stop_event.is_set():
+            frames = []
+            timestamps = []
+            status = "ok"
+            needed = self.processor.frames_per_batch(self.process_interval)
+            while len(frames) < needed and not self._stop_event.is_set():
+                try:
+                    frame, status, timestamp = self.frame_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if frame is None:
+                    break
+                frames.append(frame)
+                timestamps.append(timestamp)
+
+            results = self.processor.process_frames(frames, self.conf_thresh, self.process_interval, timestamps)
+            for frame, result in zip(frames, results):
+                if result[0] is not frame:
+                    self.recycle(frame)
+                if not self._put(self.result_queue, result):
+                    return
+            if status != "ok":
+                self._put(self.result_queue, (None, False, status))
+                return
+
+    def _put(self, q, item):
+        """
+        Puts an item on a queue according to the drop policy.
+        Returns:
+            bool: False if the pipeline was stopped before the item was queued.
+        """
+        if self.drop_policy == DROP_OLDEST:
+            while not self._stop_event.is_set():
+                try:
+                    q.put_nowait(item)
+                    return True
+                except queue.Full:
+                    try:
+                        self.recycle(q.get_nowait()[0])
+                        self.dropped_frames += 1
+                        METRICS.inc("frames_dropped")
+                    except queue.Empty:
+                        pass
+            return False
+
+        while not self._stop_event.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _clear(self, q):
+        while True:
+            try:
+                self.recycle(q.get_nowait()[0])
+            except queue.Empty:
+                return
@@ -0,0 +1,394 @@
+"""
+Headless batch scanner for image folders and video archives.
+
+Walks directories recursively, runs FireVideoProcessor over every image and
+video across a pool of worker processes (one model per worker) and streams
+one result per file to a JSON Lines or CSV file. Successfully scanned files
+are appended to a checkpoint so a killed job can be resumed with the same
+command; files that failed are tried again.
+Raw detections are kept in the detection cache, so re-scanning unchanged
+files (also with another --conf) skips the model.
+
+Usage:
+    python src/fire_scan.py /archive/cctv /archive/dumps -o results.jsonl --workers 4
+    python src/fire_scan.py /archive/cctv -o results.jsonl --every-seconds 2 --keyframes-only
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+# Ensure workers can import from the same directory
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from model_registry import resolve_model_path, VIDEO_MODEL, IMAGE_MODEL
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp"}
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv"}
+
+CSV_FIELDS = ["path", "type", "frames_scanned", "detections", "fire_detected",
+              "first_fire_frame", "seconds", "error"]
+
+# One processor per worker process, created by _init_worker
+_processor = None
+_settings = {}
+
+
+def iter_media_files(paths):
+    """Yields image and video files under the given files/directories in a stable order."""
+    for path in paths:
+        if os.path.isfile(path):
+            if media_type(path):
+                yield os.path.abspath(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if media_type(filename):
+                    yield os.path.abspath(os.path.join(dirpath, filename))
+
+
+def media_type(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return "image"
+    if ext in VIDEO_EXTENSIONS:
+        return "video"
+    return None
+
+
+def load_checkpoint(checkpoint_path):
+    """Returns the set of files already written by a previous run."""
+    if not os.path.exists(checkpoint_path):
+        return set()
+    with open(checkpoint_path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def prune_results(output_path, output_format, keep_paths):
+    """
+    Drops the records of files not in keep_paths from a previous run's output:
+    failed files (and a file written just before a crash) are scanned again,
+    so their new record replaces the old one instead of adding to it.
+    """
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, newline="", encoding="utf-8") as f:
+        if output_format == "csv":
+            rows = [row for row in csv.DictReader(f) if row["path"] in keep_paths]
+        else:
+            lines = [line for line in f if line.strip() and json.loads(line)["path"] in keep_paths]
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        if output_format == "csv":
+            csv_writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            csv_writer.writeheader()
+            csv_writer.writerows(rows)
+        else:
+            f.writelines(lines)
+    os.replace(tmp_path, output_path)
+
+
+def _prepare_backend(model_path, backend):
+    """Exports the model once in a throwaway process so workers only load the cached artifact."""
+    from inference_backends import load_model
+    return load_model(model_path, backend)[1]
+
+
+def _init_worker(model_path, conf_thresh, process_interval, batch_size, threads, backend,
+                 every_seconds=None, keyframes_only=False, use_cache=True, cache_path=None,
+                 cascade_model=None, suspect_conf=0.25):
+    global _processor, _settings
+    try:
+        _setup_worker(model_path, conf_thresh, process_interval, batch_size, threads, backend, every_seconds,
+                      keyframes_only, use_cache, cache_path, cascade_model, suspect_conf)
+    except Exception as e:
+        # Raising here would make the pool respawn the worker forever; fail the first file instead
+        _processor = None
+        _settings = {"setup_error": f"{type(e).__name__}: {e}"}
+
+
+def _setup_worker(model_path, conf_thresh, process_interval, batch_size, threads, backend, every_seconds,
+                  keyframes_only, use_cache, cache_path, cascade_model, suspect_conf):
+    global _processor, _settings
+    if threads:
+        # Keep workers from oversubscribing the CPU with intra-op threads
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+    # Imported here so the parent process never loads torch/ultralytics
+    from fire_detection_logic import FireVideoProcessor
+    if threads:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+    _processor = FireVideoProcessor(model_path, backend=backend)
+    if batch_size > 1:
+        _processor.enable_batching(batch_size)
+    if threads:
+        _processor.decode_options = {"threads": threads}
+    if cascade_model:
+        _processor.enable_cascade(cascade_model, backend=backend, suspect_conf=suspect_conf)
+    cache = None
+    if use_cache:
+        from detection_cache import DetectionCache
+        try:
+            cache = DetectionCache(cache_path)
+        except Exception as e:
+            print(f"Warning: Detection cache unavailable. {e}")
+    # Frame sampling is part of the cache key of videos: other settings scan other frames
+    sampling = (f"every={every_seconds},keyframes_only={keyframes_only}" if every_seconds
+                else f"interval={process_interval}")
+    # So is the confirmation stage, down to the contents of its weights
+    cascade = ""
+    if cascade_model and cache is not None:
+        cascade = f",cascade={cache.content_hash(cascade_model)},suspect={suspect_conf}"
+    _settings = {"conf_thresh": conf_thresh, "process_interval": process_interval,
+                 "every_seconds": every_seconds, "keyframes_only": keyframes_only,
+                 "model_path": model_path, "cache": cache, "sampling": sampling, "cascade": cascade}
+
+
+def scan_file(path):
+    """
+    Scans one file inside a worker. Errors of the file are reported in the
+    result; only a worker that could not load the model raises, which stops the scan.
+    """
+    if "setup_error" in _settings:
+        raise RuntimeError(f"Worker setup failed: {_settings['setup_error']}")
+    start_time = time.time()
+    result = {"path": path, "type": media_type(path), "frames_scanned": 0, "detections": [],
+              "fire_detected": False, "first_fire_frame": None, "error": None}
+    try:
+        dets, result["frames_scanned"] = _scan_cached(path, result["type"])
+        _record(result, dets)
+    except Exception as e:
+        result["error"] = str(e)
+    result["fire_detected"] = bool(result["detections"])
+    result["seconds"] = round(time.time() - start_time, 3)
+    return result
+
+
+def _scan_cached(path, media):
+    """
+    Detections above the confidence threshold and the number of frames
+    scanned, from the cache if this file was scanned before with the same
+    weights and settings.
+    """
+    from detection_cache import CONF_FLOOR, filter_conf
+    cache, conf_thresh = _settings["cache"], _settings["conf_thresh"]
+    if cache is None or conf_thresh < CONF_FLOOR:
+        return _scan(path, media, conf_thresh)
+    params = ("image" if media == "image" else _settings["sampling"]) + _settings["cascade"]
+    key = cache.key(path, _settings["model_path"], _processor.imgsz, params)
+    cached = cache.get(key)
+    if cached is not None:
+        dets, meta = cached
+        return filter_conf(dets, conf_thresh), meta["frames_scanned"]
+    dets, frames_scanned = _scan(path, media, CONF_FLOOR)
+    cache.put(key, dets, {"frames_scanned": frames_scanned})
+    return filter_conf(dets, conf_thresh), frames_scanned
+
+
+def _scan(path, media, conf_thresh):
+    if media == "image":
+        return _scan_image(path, conf_thresh), 1
+    return _scan_video(path, conf_thresh)
+
+
+def _scan_image(path, conf_thresh):
+    import cv2
+    import numpy as np
+    # Use imdecode to handle paths with special characters
+    img = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Could not decode image")
+    return _processor.detect(img, conf_thresh)
+
+
+def _scan_video(path, conf_thresh):
+    """
+    Returns:
+        tuple: (detection array of all sampled frames, number of frames scanned)
+    """
+    import numpy as np
+    import detection_arrays
+    processor = _processor
+    if not processor.load_video(path):
+        raise ValueError("Could not open video")
+    all_dets = [detection_arrays.empty()]
+    frames_scanned = 0
+    try:
+        samples = _sampled_frames(processor)
+        finished = False
+        while not finished:
+            # Collect the next batch of sampled frames
+            batch, indices = [], []
+            while len(batch) < (processor.batch_size or 1):
+                sample = next(samples, None)
+                if sample is None:
+                    finished = True
+                    break
+                indices.append(sample[0])
+                batch.append(sample[1])
+            all_dets.extend(processor.detect_batch(batch, conf_thresh, indices))
+            frames_scanned += len(batch)
+    finally:
+        processor.release_video()
+    return np.concatenate(all_dets), frames_scanned
+
+
+def _sampled_frames(processor):
+    """
+    Yields (frame_idx, frame) for the frames to scan: one every N seconds
+    (seeking through the keyframe index), or every process_interval frames
+    with the frames in between grabbed but never retrieved.
+    """
+    if _settings["every_seconds"]:
+        yield from processor.decoder.sample_every(_settings["every_seconds"], _settings["keyframes_only"])
+        return
+    process_interval = _settings["process_interval"]
+    frame_idx = 0
+    while True:
+        frame, _ = processor.read_frame()
+        if frame is None:
+            return
+        yield frame_idx, frame
+        frame_idx += 1 + processor.skip_frames(process_interval - 1)
+
+
+def _record(result, dets):
+    import detection_arrays
+    if len(dets) == 0:
+        return
+    # Bulk conversion of the detection array to JSON-ready lists
+    boxes = dets["xyxy"].astype(int).tolist()
+    frames = dets["frame_idx"].tolist()
+    labels = detection_arrays.labels(dets, _processor.names)
+    result["detections"].extend({"frame": frame_idx, "box": box, "label": label}
+                                for frame_idx, box, label in zip(frames, boxes, labels))
+    if result["first_fire_frame"] is None:
+        result["first_fire_frame"] = frames[0]
+
+
+class ResultWriter:
+    """Appends results to a JSON Lines or CSV file, flushing after every file."""
+    def __init__(self, output_path, output_format):
+        self.output_format = output_format
+        is_new = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+        self.file = open(output_path, "a", newline="", encoding="utf-8")
+        self.csv_writer = None
+        if output_format == "csv":
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+            if is_new:
+                self.csv_writer.writeheader()
+
+    def write(self, result):
+        if self.csv_writer:
+            row = {field: result.get(field) for field in CSV_FIELDS}
+            row["detections"] = len(result["detections"])
+            self.csv_writer.writerow(row)
+        else:
+            self.file.write(json.dumps(result) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def run_scan(paths, output_path, output_format="jsonl", model_path=None, conf_thresh=0.5,
+             process_interval=3, workers=None, batch_size=1, threads_per_worker=None,
+             checkpoint_path=None, backend="auto", every_seconds=None, keyframes_only=False,
+             use_cache=True, cache_path=None, cascade_model=None, suspect_conf=0.25):
+    """
+    Scans all media under paths and streams results to output_path.
+    Returns:
+        int: Number of files scanned in this run (excluding resumed ones).
+    """
+    model_path = resolve_model_path(model_path) if model_path else resolve_model_path(*VIDEO_MODEL)
+    if cascade_model is not None:
+        cascade_model = resolve_model_path(cascade_model) if cascade_model else resolve_model_path(*IMAGE_MODEL)
+    for weights in (model_path, cascade_model):
+        # Checked here, before workers spend time importing torch only to fail
+        if weights is not None and not os.path.isfile(weights):
+            raise RuntimeError(f"Model weights not found: {weights}")
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint"
+    done = load_checkpoint(checkpoint_path)
+    pending = (path for path in iter_media_files(paths) if path not in done)
+    if os.path.exists(checkpoint_path):
+        print(f"Resuming: {len(done)} files already scanned")
+        prune_results(output_path, output_format, done)
+    workers = workers or os.cpu_count() or 1
+    if threads_per_worker is None and workers > 1:
+        # As in parallel_detect: one intra-op thread per process instead of cores x cores threads
+        threads_per_worker = 1
+
+    if backend != "torch":
+        with multiprocessing.Pool(1) as pool:
+            backend = pool.apply(_prepare_backend, (model_path, backend))
+        print(f"Inference backend: {backend}")
+
+    writer = ResultWriter(output_path, output_format)
+    scanned = 0
+    init_args = (model_path, conf_thresh, process_interval, batch_size, threads_per_worker, backend,
+                 every_seconds, keyframes_only, use_cache, cache_path, cascade_model, suspect_conf)
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+            multiprocessing.Pool(workers, initializer=_init_worker, initargs=init_args) as pool:
+        try:
+            for result in pool.imap_unordered(scan_file, pending):
+                # Result first, then checkpoint: a crash in between re-scans one file at most
+                writer.write(result)
+                if not result["error"]:
+                    # Failed files (unreadable, still being copied, ...) are scanned again on resume
+                    checkpoint.write(result["path"] + "\n")
+                    checkpoint.flush()
+                scanned += 1
+                status = "FIRE" if result["fire_detected"] else ("ERROR" if result["error"] else "ok")
+                print(f"[{scanned}] {status:5} {result['path']}")
+        finally:
+            writer.close()
+    return scanned
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless fire detection over image folders and video archives.")
+    parser.add_argument("paths", nargs="+", help="Files or directories to scan recursively")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.jsonl or .csv)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Output format (default: from extension)")
+    parser.add_argument("--model", help="Path to YOLO weights (default: fire_8n30.pt)")
+    parser.add_argument("--conf", type=float, default=0.5, help="Confidence threshold")
+    parser.add_argument("--interval", type=int, default=3, help="Run detection every N video frames")
+    parser.add_argument("--every-seconds", type=float, default=None,
+                        help="Scan one video frame every N seconds instead of every --interval frames")
+    parser.add_argument("--keyframes-only", action="store_true",
+                        help="With --every-seconds, snap samples to keyframes (one decode per sample)")
+    parser.add_argument("--cache", default=None, help="Detection cache file (default: $FIRE_DETECTION_CACHE "
+                                                           "or ~/.cache/fire_detection/detections.sqlite)")
+    parser.add_argument("--no-cache", action="store_true", help="Always run the model, do not read or fill the cache")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=1, help="Sampled frames per model call")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="Torch and decode threads per worker (default: 1 with several workers)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--backend", default="auto", help="torch, onnx, onnx_int8, openvino, auto or benchmark")
+    parser.add_argument("--cascade", nargs="?", const="", default=None, metavar="WEIGHTS",
+                        help="Confirm suspect frames with a larger model (default: fire_8l.pt)")
+    parser.add_argument("--suspect-conf", type=float, default=0.25,
+                        help="With --cascade, threshold above which frames are sent to the larger model")
+    args = parser.parse_args(argv)
+
+    output_format = args.format or ("csv" if args.output.lower().endswith(".csv") else "jsonl")
+    try:
+        scanned = run_scan(args.paths, args.output, output_format, args.model, args.conf, args.interval,
+                           args.workers, args.batch_size, args.threads_per_worker, args.checkpoint, args.backend,
+                           args.every_seconds, args.keyframes_only, not args.no_cache, args.cache,
+                           args.cascade, args.suspect_conf)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Scanned {scanned} files -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
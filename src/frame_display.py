@@ -0,0 +1,62 @@
+"""
+Display stage of the Tk apps.
+
+Frames are shrunk to the thumbnail size first (cv2.INTER_AREA), converted
+BGR->RGBA only at that size, both into buffers allocated once, and pasted
+into one persistent PhotoImage. Compared with converting the full frame,
+wrapping it in a PIL image, resizing with LANCZOS and building a new
+PhotoImage per frame, this avoids every full-resolution copy. RGBA rather
+than RGB because PIL only wraps 4-channel buffers without copying them.
+"""
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+from fire_metrics import METRICS
+
+
+class FrameDisplay:
+    """
+    Shows BGR frames as fixed-size thumbnails in a Tk label.
+
+    Args:
+        label (tk.Label or None): Label showing the image. None builds
+            thumbnails only (no Tk root needed, e.g. for benchmarks).
+        size (tuple): Thumbnail (width, height).
+    """
+    def __init__(self, label=None, size=(300, 200)):
+        self.label = label
+        self.size = size
+        width, height = size
+        self._small_bgr = np.empty((height, width, 3), dtype=np.uint8)
+        self._small_rgba = np.empty((height, width, 4), dtype=np.uint8)
+        # PIL image sharing memory with _small_rgba, so a paste reads the buffer directly
+        self._small_image = Image.frombuffer("RGBA", size, self._small_rgba, "raw", "RGBA", 0, 1)
+        self.photo = None
+        if label is not None:
+            self.photo = ImageTk.PhotoImage("RGBA", size)
+            label.config(image=self.photo)
+
+    def thumbnail(self, frame_bgr):
+        """
+        Downscales and converts a BGR frame into the reused RGBA buffer.
+        Returns:
+            ndarray: (height, width, 4) RGBA buffer, overwritten by the next call.
+        """
+        with METRICS.stage("display_resize"):
+            cv2.resize(frame_bgr, self.size, dst=self._small_bgr, interpolation=cv2.INTER_AREA)
+        with METRICS.stage("display_convert"):
+            cv2.cvtColor(self._small_bgr, cv2.COLOR_BGR2RGBA, dst=self._small_rgba)
+        return self._small_rgba
+
+    def show(self, frame_bgr):
+        """Updates the persistent PhotoImage in place with a BGR frame."""
+        self.thumbnail(frame_bgr)
+        with METRICS.stage("display_paste"):
+            self.photo.paste(self._small_image)
+        METRICS.inc("frames_displayed")
+
+    def show_image(self, img_pil):
+        """Shows a PIL image (placeholder, preview), resized to the thumbnail size."""
+        if img_pil.size != self.size:
+            img_pil = img_pil.resize(self.size, Image.BILINEAR)
+        self.photo.paste(img_pil.convert("RGBA"))
@@ -0,0 +1,68 @@
+"""
+Preallocated frame buffers for long-running camera sessions.
+
+Without a pool every captured frame is a new full-size array, and at 30 fps
+the allocator and garbage collector see several hundred megabytes churn
+through per minute. A FramePool hands out a fixed set of buffers that the
+decoder reads into (cv2.VideoCapture.read fills a buffer of the right size
+in place); buffers come back when their frame is displayed or dropped.
+"""
+import threading
+
+import numpy as np
+from fire_metrics import METRICS
+
+
+class FramePool:
+    """
+    Args:
+        count (int): Buffers in the pool. It has to cover every frame that
+            can be in flight at once: being read, queued, processed and shown.
+    """
+    def __init__(self, count=12):
+        self.count = count
+        self.shape = None
+        self.allocated = 0
+        # Frames that had to be allocated because all buffers were in use
+        self.misses = 0
+        self._free = []
+        # Every buffer owned by the pool, to ignore frames that are not ours. The arrays
+        # themselves are kept: the id() of a freed array can be reused by a foreign one
+        self._buffers = []
+        self._lock = threading.Lock()
+
+    def acquire(self, shape):
+        """
+        A free buffer of the given shape, or None if the pool is exhausted
+        (the caller then reads into a new array, which is never recycled).
+        Buffers of another shape are discarded, e.g. after a camera changed resolution.
+        """
+        with self._lock:
+            if shape != self.shape:
+                self.shape = shape
+                self._free.clear()
+                self._buffers.clear()
+                self.allocated = 0
+            if self._free:
+                return self._free.pop()
+            if self.allocated < self.count:
+                buffer = np.empty(shape, dtype=np.uint8)
+                self._buffers.append(buffer)
+                self.allocated += 1
+                return buffer
+            self.misses += 1
+        METRICS.inc("frame_pool_misses")
+        return None
+
+    def release(self, frame):
+        """Returns a buffer to the pool; frames the pool does not own are ignored."""
+        if frame is None:
+            return
+        with self._lock:
+            if any(buffer is frame for buffer in self._buffers) \
+                    and all(buffer is not frame for buffer in self._free):
+                self._free.append(frame)
+
+    def stats(self):
+        with self._lock:
+            return {"buffers": self.allocated, "free": len(self._free), "misses": self.misses}
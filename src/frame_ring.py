@@ -0,0 +1,107 @@
+"""
+Ring buffer of decoded frames in shared memory, for multi-process inference.
+
+A FrameRing is one multiprocessing.shared_memory block cut into fixed-size
+slots. Producers (capture processes) copy a frame into a free slot and
+publish the slot number with a few bytes of metadata; consumers (inference
+workers) map the slot as a NumPy array without copying it and hand the slot
+back once the model is done with it. Only slot numbers and metadata travel
+through the queues, never pixels.
+
+The ring is created by the parent process and passed to child processes
+as an argument; children attach to the same block by name.
+"""
+import multiprocessing
+import os
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class FrameRing:
+    """
+    Args:
+        slots (int): Number of frames the ring holds.
+        max_shape (tuple): (height, width, channels) of the largest frame a slot takes.
+        ctx: multiprocessing context the queues are created with.
+    """
+    def __init__(self, slots=16, max_shape=(1080, 1920, 3), ctx=None):
+        ctx = ctx or multiprocessing.get_context()
+        self.slots = slots
+        self.max_shape = tuple(max_shape)
+        self.slot_bytes = int(np.prod(self.max_shape))
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * slots)
+        # Forked children inherit this object as is, so ownership goes by process
+        self._owner_pid = os.getpid()
+        self._free = ctx.Queue()
+        self._ready = ctx.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shm"] = self._shm.name
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = shared_memory.SharedMemory(name=state["_shm"])
+
+    def fits(self, shape):
+        return int(np.prod(shape)) <= self.slot_bytes
+
+    def put(self, frame, meta, timeout=None):
+        """
+        Copies a uint8 frame into a free slot and publishes it with meta (any
+        small picklable value, e.g. (stream, frame_idx, timestamp)).
+        Args:
+            timeout (float or None): Seconds to wait for a free slot; None waits
+                indefinitely, 0 returns at once.
+        Returns:
+            bool: False if no slot became free in time (the frame is dropped).
+        """
+        try:
+            slot = self._free.get(timeout=timeout) if timeout != 0 else self._free.get_nowait()
+        except queue.Empty:
+            return False
+        view = self.view(slot, frame.shape)
+        view[...] = frame
+        self._ready.put((slot, frame.shape, meta))
+        return True
+
+    def get(self, timeout=None):
+        """
+        Next published frame, mapped zero-copy. The caller owns the slot until
+        release(slot); the view must not be used afterwards.
+        Returns:
+            tuple or None: (slot, frame_view, meta), or None once stop() was called.
+        Raises:
+            queue.Empty: If no frame was published within timeout.
+        """
+        item = self._ready.get(timeout=timeout) if timeout != 0 else self._ready.get_nowait()
+        if item is None:
+            return None
+        slot, shape, meta = item
+        return slot, self.view(slot, shape), meta
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def view(self, slot, shape):
+        return np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+
+    def stop(self, consumers=1):
+        """Wakes consumers blocked in get() after the frames already queued."""
+        for _ in range(consumers):
+            self._ready.put(None)
+
+    def close(self):
+        """Detaches this process; the creating process also frees the block."""
+        try:
+            self._shm.close()
+        except BufferError:
+            # A frame view is still referenced (e.g. by the model's last batch); unmapped at exit
+            pass
+        if self._owner_pid == os.getpid():
+            self._shm.unlink()
@@ -0,0 +1,179 @@
+"""
+Pluggable inference backends for the fire detection models.
+
+The .pt weights are exported once per backend to ONNX (optionally INT8
+quantized) or OpenVINO IR, and the exported artifact is cached under a key
+derived from the weights' SHA-256 hash. Ultralytics loads every format
+through the same YOLO class, so detections come back as the same Results
+objects whichever runtime runs underneath.
+"""
+import hashlib
+import importlib.util
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from ultralytics import YOLO
+
+TORCH = "torch"
+ONNX = "onnx"
+ONNX_INT8 = "onnx_int8"
+OPENVINO = "openvino"
+
+# Fastest first on CPU-only machines
+BACKEND_PREFERENCE = [OPENVINO, ONNX, TORCH]
+
+# Python packages each backend needs at runtime/export time
+_REQUIRED_PACKAGES = {
+    TORCH: [],
+    ONNX: ["onnx", "onnxruntime"],
+    ONNX_INT8: ["onnx", "onnxruntime"],
+    OPENVINO: ["openvino"],
+}
+
+
+def default_cache_dir():
+    return os.environ.get("FIRE_EXPORT_CACHE",
+                          os.path.join(os.path.expanduser("~"), ".cache", "fire_detection", "exports"))
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file, read in chunks so large weights do not load into memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def available_backends():
+    """Backends whose runtime packages are importable, in preference order."""
+    return [backend for backend in BACKEND_PREFERENCE + [ONNX_INT8]
+            if all(importlib.util.find_spec(pkg) is not None for pkg in _REQUIRED_PACKAGES[backend])]
+
+
+def exported_path(weights_path, backend, imgsz=640, cache_dir=None):
+    """
+    Location of the cached export for these weights, or None if not exported yet.
+    For TORCH, the weights themselves.
+    """
+    if backend == TORCH:
+        return weights_path
+    entry_dir = _cache_entry_dir(weights_path, backend, imgsz, cache_dir)
+    target = os.path.join(entry_dir, _artifact_name(weights_path, backend))
+    return target if os.path.exists(target) else None
+
+
+def export_model(weights_path, backend, imgsz=640, cache_dir=None):
+    """
+    Exports the weights for a backend unless a cached export already exists.
+    Safe to call from several processes: each exports into its own temporary
+    directory, and the first one to finish publishes its result.
+
+    Returns:
+        str: Path to load with YOLO (file or OpenVINO model directory).
+    """
+    entry_dir = _cache_entry_dir(weights_path, backend, imgsz, cache_dir)
+    target = os.path.join(entry_dir, _artifact_name(weights_path, backend))
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=".export-", dir=os.path.dirname(entry_dir))
+    try:
+        # Ultralytics writes exports next to the weights, so export a private copy
+        local_weights = os.path.join(work_dir, os.path.basename(weights_path))
+        shutil.copy2(weights_path, local_weights)
+        if backend == OPENVINO:
+            YOLO(local_weights).export(format="openvino", imgsz=imgsz, dynamic=True)
+        else:
+            onnx_path = YOLO(local_weights).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+            if backend == ONNX_INT8:
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+                quantize_dynamic(onnx_path, os.path.join(work_dir, _artifact_name(weights_path, backend)),
+                                 weight_type=QuantType.QUInt8)
+        os.remove(local_weights)
+        try:
+            os.rename(work_dir, entry_dir)
+        except OSError:
+            # Another process published the same export first
+            shutil.rmtree(work_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+    return target
+
+
+def load_model(weights_path, backend="auto", imgsz=640, cache_dir=None):
+    """
+    Loads the weights on the requested backend, exporting them first if needed.
+
+    Args:
+        weights_path (str): Path to the .pt weights.
+        backend (str): TORCH, ONNX, ONNX_INT8, OPENVINO, "auto" (fastest
+            available by preference) or "benchmark" (time each available
+            backend on a dummy frame and keep the fastest).
+        imgsz (int): Inference resolution the export is built for.
+
+    Returns:
+        tuple: (model, backend) where model behaves like ultralytics.YOLO.
+            Falls back to TORCH if no accelerated backend can be loaded.
+    """
+    if backend == "benchmark":
+        return _load_fastest(weights_path, imgsz, cache_dir)
+    if backend == "auto":
+        candidates = [b for b in BACKEND_PREFERENCE if b in available_backends()]
+    else:
+        candidates = [backend, TORCH] if backend != TORCH else [TORCH]
+
+    for candidate in candidates:
+        try:
+            return _load(weights_path, candidate, imgsz, cache_dir), candidate
+        except Exception as e:
+            print(f"Warning: {candidate} backend unavailable for {os.path.basename(weights_path)}: {e}")
+    raise RuntimeError(f"Could not load {weights_path} on any backend")
+
+
+def _load(weights_path, backend, imgsz, cache_dir):
+    if backend == TORCH:
+        return YOLO(weights_path)
+    return YOLO(export_model(weights_path, backend, imgsz, cache_dir), task="detect")
+
+
+def _load_fastest(weights_path, imgsz, cache_dir, runs=5):
+    dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    best = None
+    for backend in available_backends():
+        try:
+            model = _load(weights_path, backend, imgsz, cache_dir)
+            model(dummy, verbose=False)  # warm-up
+            start_time = time.perf_counter()
+            for _ in range(runs):
+                model(dummy, verbose=False)
+            elapsed = (time.perf_counter() - start_time) / runs
+        except Exception as e:
+            print(f"Warning: skipping {backend} backend: {e}")
+            continue
+        print(f"Backend {backend}: {elapsed * 1000:.1f} ms/frame")
+        if best is None or elapsed < best[0]:
+            best = (elapsed, model, backend)
+    if best is None:
+        raise RuntimeError(f"Could not load {weights_path} on any backend")
+    return best[1], best[2]
+
+
+def _cache_entry_dir(weights_path, backend, imgsz, cache_dir):
+    stem = os.path.splitext(os.path.basename(weights_path))[0]
+    key = f"{stem}-{file_hash(weights_path)[:16]}-{backend}-{imgsz}"
+    return os.path.join(cache_dir or default_cache_dir(), key)
+
+
+def _artifact_name(weights_path, backend):
+    stem = os.path.splitext(os.path.basename(weights_path))[0]
+    if backend == OPENVINO:
+        return f"{stem}_openvino_model"
+    if backend == ONNX_INT8:
+        return f"{stem}_int8.onnx"
+    return f"{stem}.onnx"
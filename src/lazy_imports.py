@@ -0,0 +1,63 @@
+"""
+Deferred imports for heavy modules.
+
+`cv2 = lazy_import("cv2")` binds a proxy that imports the real module on
+first attribute access, so importing a window module (or the launcher) does
+not pay for OpenCV/NumPy/pyserial until they are actually used.
+run_in_background() does slow imports/model loads off the Tk main thread
+and hands back a Future the UI can poll.
+"""
+import importlib
+import sys
+import threading
+from concurrent.futures import Future
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        # importlib holds the import lock, so concurrent first uses import once
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """Returns the module if it is already imported, otherwise a LazyModule proxy."""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+
+def is_imported(name):
+    return name in sys.modules
+
+
+def run_in_background(func, *args):
+    """
+    Runs func(*args) on a daemon thread, so closing the app never waits for it.
+    Returns:
+        concurrent.futures.Future: Resolves to the result or raised exception.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
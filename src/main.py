@@ -3,11 +3,13 @@ import machine
 import uselect
 import sys
 import time
+from alarm_protocol import AlarmState
 
 # --- Configuration ---
 RED_PIN = 5       # ON on FIRE
 YELLOW_PIN = 18   # Flicker ALWAYS (System Power)
 BUZZER_PIN = 23   # ON on FIRE
+SILENCE_ON_SAFE = False  # True: SAFE stops the siren (red LED stays on until RESET)
 
 # Initialize Pins
 red_led = machine.Pin(RED_PIN, machine.Pin.OUT)
@@ -21,7 +23,7 @@ poll_obj.register(sys.stdin, uselect.POLLIN)
 
 print("ESP32 Fire Alert System Ready...")
 
-fire_active = False
+state = AlarmState(SILENCE_ON_SAFE)
 last_yellow_time = 0
 last_alarm_time = 0
 alarm_high_pitch = False
@@ -41,14 +43,13 @@ while True:
     poll_results = poll_obj.poll(0)
     
     if poll_results:
-        command = sys.stdin.readline().strip()
-        if command == "FIRE":
-            fire_active = True
-        elif command == "RESET":
-            fire_active = False
+        # FIRE / SAFE / RESET / PING, acknowledged when sent with a sequence number
+        reply = state.handle(sys.stdin.readline())
+        if reply:
+            print(reply)
 
     # --- Alarm Logic ---
-    if fire_active:
+    if state.fire_active:
         # Fire Detected: Red ON, Buzzer ON (Latched until RESET)
         red_led.value(1)
         
@@ -59,6 +60,6 @@ while True:
             buzzer.duty(50) # Reduced volume (approx 5% duty cycle)
             last_alarm_time = current_time
     else:
-        # Safe: Red OFF, Buzzer OFF
-        red_led.value(0)
+        # Safe: Buzzer OFF; Red OFF, or still ON after a fire silenced by SAFE
+        red_led.value(1 if state.latched else 0)
         buzzer.duty(0) # Silence buzzer (Volume OFF)
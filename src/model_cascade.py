@@ -0,0 +1,146 @@
+"""
+Two-stage detection: a small model screens, a large model confirms.
+
+The fast model (e.g. fire_8n.pt) runs on every sampled frame at a low
+"suspect" threshold. Frames without suspects are done after that single
+cheap pass, which on a camera is nearly all of them. For the rest, padded
+crops around the suspect boxes (or the whole frame) go through the large
+model (fire_8l.pt) in one call, and its boxes, mapped back to frame
+coordinates, are what the frame reports. Suspects scored very high by the
+small model can optionally be accepted without the second stage.
+
+Both stages are counted, so stats() shows how often the large model was
+needed and how often it agreed.
+"""
+import numpy as np
+import detection_arrays
+from fire_metrics import METRICS
+from model_registry import get_model, resolve_model_path, IMAGE_MODEL
+from region_inference import nms, result_arrays
+
+CROPS = "crops"
+FRAME = "frame"
+
+
+def load_cascade(confirm_model_path=None, backend="auto", **cascade_options):
+    """ModelCascade confirming with weights from the shared registry (fire_8l.pt by default)."""
+    model, _ = get_model(confirm_model_path or resolve_model_path(*IMAGE_MODEL), backend)
+    return ModelCascade(model, **cascade_options)
+
+
+class ModelCascade:
+    """
+    Args:
+        model: Loaded confirmation model (ultralytics YOLO or compatible).
+        suspect_conf (float): Threshold of the screening model; anything at or
+            above it is sent to the confirmation model.
+        accept_conf (float or None): Screening boxes at or above this are kept
+            without confirmation. None confirms every suspect frame.
+        mode (str): CROPS sends padded crops around the suspects, FRAME the whole frame.
+        crop_padding (float): Context added around a suspect box, as a fraction of its larger side.
+        min_crop (int): Smallest crop side in pixels; the large model needs some context.
+        max_crops (int): Frames with more suspects than this are confirmed on the whole frame.
+        imgsz (int or None): Inference resolution of the confirmation model.
+    """
+    def __init__(self, model, suspect_conf=0.25, accept_conf=None, mode=CROPS, crop_padding=0.5,
+                 min_crop=160, max_crops=4, imgsz=None):
+        if mode not in (CROPS, FRAME):
+            raise ValueError(f"Unknown cascade mode: {mode}")
+        self.model = model
+        self.suspect_conf = suspect_conf
+        self.accept_conf = accept_conf
+        self.mode = mode
+        self.crop_padding = crop_padding
+        self.min_crop = min_crop
+        self.max_crops = max_crops
+        self.imgsz = imgsz
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.frames_screened = 0
+        self.frames_suspect = 0
+        self.frames_accepted = 0
+        self.frames_confirmed = 0
+        self.crops_checked = 0
+
+    def stats(self):
+        """Per-stage counts and hit rates."""
+        checked = self.frames_suspect - self.frames_accepted
+        return {"frames_screened": self.frames_screened,
+                "frames_suspect": self.frames_suspect,
+                "suspect_rate": round(self.frames_suspect / self.frames_screened, 4) if self.frames_screened else 0.0,
+                "frames_accepted": self.frames_accepted,
+                "frames_checked": checked,
+                "crops_checked": self.crops_checked,
+                "frames_confirmed": self.frames_confirmed,
+                "confirm_rate": round(self.frames_confirmed / checked, 4) if checked else 0.0}
+
+    def windows(self, frame_shape, xyxy):
+        """
+        Crops (x1, y1, x2, y2) checked by the confirmation model for the
+        suspect boxes of one frame.
+        """
+        height, width = frame_shape[:2]
+        if self.mode == FRAME or len(xyxy) > self.max_crops:
+            return np.array([[0, 0, width, height]], dtype=np.int64)
+        centers = (xyxy[:, :2] + xyxy[:, 2:]) / 2
+        sides = (xyxy[:, 2:] - xyxy[:, :2]).max(axis=1) * (1 + 2 * self.crop_padding)
+        half = np.maximum(sides, self.min_crop)[:, None] / 2
+        windows = np.concatenate([centers - half, centers + half], axis=1)
+        # Shift crops that stick out of the frame back inside, then clip what is still too large
+        shift = np.maximum(0, -windows[:, :2]) - np.maximum(0, windows[:, 2:] - [width, height])
+        windows += np.tile(shift, 2)
+        windows = np.clip(windows, 0, [width, height, width, height])
+        return np.round(windows).astype(np.int64)
+
+    def confirm(self, frames, screened, conf_thresh=0.5):
+        """
+        Second stage for a batch of frames.
+        Args:
+            frames (list): BGR frames.
+            screened (list): Detection array of each frame from the screening
+                model, run at suspect_conf.
+            conf_thresh (float): Confidence threshold of the reported detections.
+        Returns:
+            list: Confirmed detection array of each frame.
+        """
+        confirmed = [None] * len(frames)
+        jobs = []
+        for i, (frame, dets) in enumerate(zip(frames, screened)):
+            self.frames_screened += 1
+            if not len(dets):
+                confirmed[i] = dets
+                continue
+            self.frames_suspect += 1
+            if self.accept_conf is not None and dets["conf"].max() >= self.accept_conf:
+                self.frames_accepted += 1
+                confirmed[i] = dets[dets["conf"] >= conf_thresh]
+                continue
+            jobs.append((i, self.windows(frame.shape, dets["xyxy"])))
+        METRICS.inc("cascade_screened", len(frames))
+        if not jobs:
+            return confirmed
+
+        crops = [frames[i][y1:y2, x1:x2] for i, windows in jobs for x1, y1, x2, y2 in windows]
+        self.crops_checked += len(crops)
+        with METRICS.stage("cascade_confirm"):
+            if self.imgsz:
+                results = self.model(crops, conf=conf_thresh, imgsz=self.imgsz, verbose=False)
+            else:
+                results = self.model(crops, conf=conf_thresh, verbose=False)
+        METRICS.inc("cascade_checked", len(jobs))
+        start = 0
+        for i, windows in jobs:
+            arrays = [result_arrays(r) for r in results[start:start + len(windows)]]
+            start += len(windows)
+            counts = [len(conf) for _, conf, _ in arrays]
+            xyxy = np.concatenate([a[0] for a in arrays]) + np.tile(np.repeat(windows[:, :2], counts, axis=0), 2)
+            conf = np.concatenate([a[1] for a in arrays])
+            cls = np.concatenate([a[2] for a in arrays])
+            if len(windows) > 1 and len(conf) > 1:
+                # Crops of nearby suspects overlap and see the same fire
+                keep = nms(xyxy, conf, cls)
+                xyxy, conf, cls = xyxy[keep], conf[keep], cls[keep]
+            confirmed[i] = detection_arrays.from_arrays(xyxy, conf, cls, int(screened[i]["frame_idx"][0]))
+            self.frames_confirmed += int(len(conf) > 0)
+        return confirmed
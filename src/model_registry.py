@@ -0,0 +1,111 @@
+"""
+Process-wide registry of loaded detection models.
+
+Resolves model names against the known model folders once, loads each set
+of weights once (through inference_backends, so the fastest runtime is
+used), warms it up with a dummy inference and hands the same instance to
+every window that asks for it. When more model sizes are in use than
+max_models, the least recently used one is dropped from the registry.
+
+The shared instance is meant for one detection loop at a time (the
+launcher only shows one window); ultralytics predictors are not safe to
+call from several threads concurrently.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Searched in order: src/models, then <repo>/models
+MODEL_DIRS = [os.path.join(BASE_DIR, "models"), os.path.join(BASE_DIR, "..", "models")]
+
+# Default weights per mode, with fallbacks tried if the first one is missing
+CAMERA_MODEL = ("fire_8n.pt", "fire_8n30.pt")
+VIDEO_MODEL = ("fire_8n30.pt",)
+IMAGE_MODEL = ("fire_8l.pt",)
+
+
+def resolve_model_path(*model_names):
+    """
+    Finds the first of the given model names in MODEL_DIRS.
+    Explicit paths to existing files are returned unchanged. If nothing is
+    found, returns the src/models path of the first name so the error names it.
+    """
+    for name in model_names:
+        if os.path.isfile(name):
+            return os.path.abspath(name)
+        for model_dir in MODEL_DIRS:
+            path = os.path.join(model_dir, name)
+            if os.path.exists(path):
+                return os.path.abspath(path)
+    return os.path.join(MODEL_DIRS[0], model_names[0])
+
+
+class ModelRegistry:
+    """
+    Thread-safe LRU cache of loaded models keyed on (weights path, backend).
+
+    Args:
+        max_models (int): Number of models kept loaded at once.
+        warmup_size (int or None): Side of the dummy frame used to warm up a
+            freshly loaded model; None skips the warm-up.
+    """
+    def __init__(self, max_models=2, warmup_size=640):
+        self.max_models = max_models
+        self.warmup_size = warmup_size
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, model, backend="auto"):
+        """
+        Returns the shared model for a name or path, loading it on first use.
+        Returns:
+            tuple: (model, backend) as returned by inference_backends.load_model.
+        """
+        key = (resolve_model_path(model), backend)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock; the per-key lock stops two threads loading the same weights
+        with key_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key]
+            # Imported here so path resolution stays usable without loading torch/ultralytics
+            from inference_backends import load_model
+            entry = load_model(key[0], backend)
+            if self.warmup_size:
+                entry[0](np.zeros((self.warmup_size, self.warmup_size, 3), dtype=np.uint8), verbose=False)
+            with self._lock:
+                self._models[key] = entry
+                while len(self._models) > self.max_models:
+                    evicted, _ = self._models.popitem(last=False)
+                    print(f"Model registry: evicted {os.path.basename(evicted[0])}")
+            return entry
+
+    def preload(self, *model_names, backend="auto"):
+        """Loads and warms up a model ahead of time (e.g. from a background thread)."""
+        return self.get(resolve_model_path(*model_names), backend)
+
+    def is_loaded(self, model, backend="auto"):
+        with self._lock:
+            return (resolve_model_path(model), backend) in self._models
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+
+# Process-wide instance shared by all windows
+REGISTRY = ModelRegistry()
+
+
+def get_model(model, backend="auto"):
+    return REGISTRY.get(model, backend)
@@ -0,0 +1,102 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Cheap pre-filter that decides whether a frame is worth sending to YOLO.
+
+    Works on a downscaled, blurred grayscale copy of the frame and compares it
+    to a running-average background. Frames with too few changed pixels are
+    skipped. Optionally, the changed pixels must also be flame-colored (HSV
+    range), which rejects people walking through a corridor. A forced
+    inference every force_every checks acts as a safety net for slow fires,
+    smoke and anything the filter misses.
+
+    Args:
+        scale_width (int): Width of the downscaled analysis copy.
+        diff_thresh (int): Gray-level difference counted as a changed pixel.
+        min_motion_ratio (float): Fraction of changed pixels needed to pass.
+        learning_rate (float): Background update rate (cv2.accumulateWeighted).
+        min_flame_ratio (float or None): If set, fraction of the frame that must be
+            both changed and flame-colored (HSV range). None disables the color check.
+        force_every (int): Force an inference after this many skipped checks.
+    """
+    FLAME_HSV_LOWER = (0, 80, 150)
+    FLAME_HSV_UPPER = (35, 255, 255)
+
+    def __init__(self, scale_width=160, diff_thresh=25, min_motion_ratio=0.003, learning_rate=0.05,
+                 min_flame_ratio=None, force_every=10):
+        self.scale_width = scale_width
+        self.diff_thresh = diff_thresh
+        self.min_motion_ratio = min_motion_ratio
+        self.learning_rate = learning_rate
+        self.min_flame_ratio = min_flame_ratio
+        self.force_every = force_every
+        self.background = None
+        self.reset_stats()
+
+    def reset(self):
+        """Forgets the background, e.g. when a new video is loaded."""
+        self.background = None
+        self._skipped_in_row = 0
+
+    def reset_stats(self):
+        self.frames_checked = 0
+        self.inferences_run = 0
+        self.inferences_skipped = 0
+        self.inferences_forced = 0
+        self._skipped_in_row = 0
+
+    def stats(self):
+        return {
+            "frames_checked": self.frames_checked,
+            "inferences_run": self.inferences_run,
+            "inferences_skipped": self.inferences_skipped,
+            "inferences_forced": self.inferences_forced,
+        }
+
+    def should_infer(self, frame):
+        """
+        Checks a BGR frame against the background and updates it.
+        Returns:
+            bool: True if the model should run on this frame.
+        """
+        self.frames_checked += 1
+        height, width = frame.shape[:2]
+        scale = self.scale_width / float(width)
+        small = cv2.resize(frame, (self.scale_width, max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+        if self.background is None or self.background.shape != gray.shape:
+            # Nothing to compare against yet: always run the model on the first frame
+            self.background = gray.astype(np.float32)
+            return self._passed()
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+        _, motion_mask = cv2.threshold(diff, self.diff_thresh, 255, cv2.THRESH_BINARY)
+        changed = cv2.countNonZero(motion_mask)
+        passed = changed >= self.min_motion_ratio * motion_mask.size
+
+        if passed and self.min_flame_ratio is not None:
+            hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+            flame_mask = cv2.inRange(hsv, self.FLAME_HSV_LOWER, self.FLAME_HSV_UPPER)
+            flame_changed = cv2.countNonZero(cv2.bitwise_and(flame_mask, motion_mask))
+            passed = flame_changed >= self.min_flame_ratio * motion_mask.size
+
+        if passed:
+            return self._passed()
+
+        if self._skipped_in_row + 1 >= self.force_every:
+            self.inferences_forced += 1
+            return self._passed()
+
+        self._skipped_in_row += 1
+        self.inferences_skipped += 1
+        return False
+
+    def _passed(self):
+        self._skipped_in_row = 0
+        self.inferences_run += 1
+        return True
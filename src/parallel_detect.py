@@ -0,0 +1,340 @@
+"""
+Multi-process fire detection over many sources on one machine.
+
+Threads do not spread FireVideoProcessor over cores: pre- and
+post-processing, drawing and conversion hold the GIL. Here every source gets
+a capture process that decodes its sampled frames into a shared FrameRing,
+and N inference worker processes (one model copy each) read those frames
+zero-copy. Only detection arrays and small metadata tuples are pickled
+between processes. The parent puts results back into frame order per
+stream and decides the fire state.
+
+File sources wait for a free slot, so every sampled frame is scanned;
+live sources drop frames when all workers are busy instead of falling behind.
+A child process that dies is noticed: a dead capture marks its stream
+failed, and the frames a dead worker had taken are skipped so the other
+frames of their streams keep flowing.
+
+Usage:
+    python src/parallel_detect.py videos/*.mp4 rtsp://cam1/stream --workers 16
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from multiprocessing import connection
+# Ensure we can import from the same directory
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from frame_ring import FrameRing
+from model_registry import resolve_model_path, CAMERA_MODEL
+from stream_mux import parse_source
+
+# Seconds the parent waits for a message before checking that its children are alive
+LIVENESS_INTERVAL_S = 1.0
+
+
+def _capture_main(ring, conn, stream_idx, source, process_interval, decode_threads):
+    seq = dropped = 0
+    status = "error"
+    decoder = None
+    try:
+        import cv2
+        from video_decode import VideoDecoder
+        decoder = VideoDecoder(source, threads=decode_threads)
+        if not decoder.is_opened():
+            return
+        status = "finished"
+        # Live frames are dropped when no slot is free; files wait for one
+        timeout = 0 if decoder.is_live else None
+        while True:
+            ret, frame = decoder.read()
+            if not ret:
+                break
+            frame_idx = decoder.position - 1
+            timestamp = time.time() if decoder.is_live else frame_idx / decoder.fps
+            if not ring.fits(frame.shape):
+                scale = min(ring.max_shape[0] / frame.shape[0], ring.max_shape[1] / frame.shape[1])
+                frame = cv2.resize(frame, (int(frame.shape[1] * scale), int(frame.shape[0] * scale)))
+            if ring.put(frame, (stream_idx, seq, frame_idx, timestamp), timeout):
+                seq += 1
+            else:
+                dropped += 1
+            decoder.skip(process_interval - 1)
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        if decoder is not None:
+            decoder.release()
+        conn.send(("end", stream_idx, seq, dropped, status))
+        conn.close()
+        ring.close()
+
+
+def _worker_main(ring, conn, model_path, conf_thresh, batch_size, imgsz, backend, threads):
+    if threads:
+        # One model per core: keep each worker from oversubscribing the CPU
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+    stopping = False
+    try:
+        # Imported here so the parent and capture processes never load torch/ultralytics
+        from fire_detection_logic import FireVideoProcessor
+        if threads:
+            try:
+                import torch
+                torch.set_num_threads(threads)
+            except ImportError:
+                pass
+        processor = FireVideoProcessor(model_path, backend=backend)
+        processor.set_inference_size(imgsz)
+        while not stopping:
+            item = ring.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < batch_size:
+                try:
+                    item = ring.get(timeout=0)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            # Pipe writes are synchronous: if this process dies, the parent knows which frames it held
+            conn.send(("taken", [meta[:2] for _, _, meta in batch]))
+            try:
+                dets = processor.detect_batch([view for _, view, _ in batch], conf_thresh,
+                                              [meta[2] for _, _, meta in batch])
+            finally:
+                for slot, _, _ in batch:
+                    ring.release(slot)
+            for (_, _, meta), frame_dets in zip(batch, dets):
+                conn.send(("frame",) + meta + (frame_dets,))
+            batch = item = None
+    finally:
+        conn.send(("worker_done",))
+        conn.close()
+        ring.close()
+
+
+class ParallelDetector:
+    """
+    Args:
+        model_path (str): Weights loaded once per worker process.
+        workers (int): Inference processes; one per physical core is a good start.
+        conf_thresh (float): Confidence threshold.
+        process_interval (int): Scan every Nth frame of each source.
+        batch_size (int): Frames a worker takes from the ring per model call.
+        ring_slots (int or None): Frames in the shared ring (default: 2 per worker).
+        max_shape (tuple): Largest (height, width, channels) frame; larger ones are scaled down.
+        threads_per_worker (int): Intra-op threads of each worker's model.
+        confirmation_options (dict or None): FireConfirmation options; None reports
+            a stream as on fire whenever a sampled frame has detections.
+        on_result (callable): Called in the parent as
+            on_result(stream_idx, frame_idx, timestamp, detections, fire_detected),
+            in frame order for each stream.
+    """
+    def __init__(self, model_path, workers=None, conf_thresh=0.5, process_interval=3, batch_size=1,
+                 ring_slots=None, max_shape=(1080, 1920, 3), imgsz=None, backend="torch",
+                 threads_per_worker=1, confirmation_options=None, on_result=None):
+        self.model_path = model_path
+        self.workers = workers or os.cpu_count() or 1
+        self.conf_thresh = conf_thresh
+        self.process_interval = process_interval
+        self.batch_size = batch_size
+        self.ring_slots = ring_slots or 2 * self.workers
+        self.max_shape = max_shape
+        self.imgsz = imgsz
+        self.backend = backend
+        self.threads_per_worker = threads_per_worker
+        self.confirmation_options = confirmation_options
+        self.on_result = on_result
+        self.stream_stats = {}
+
+    def run(self, sources):
+        """
+        Scans all sources until each one ends (live sources: until interrupted).
+        Returns:
+            dict: Run statistics (frames scanned, throughput, per-stream counters).
+        """
+        from fire_confirmation import FireConfirmation
+        ctx = multiprocessing.get_context()
+        ring = FrameRing(self.ring_slots, self.max_shape, ctx)
+        self.stream_stats = {i: {"source": str(source), "scanned": 0, "dropped": 0, "lost": 0, "fire_frames": 0,
+                                 "status": "running"} for i, source in enumerate(sources)}
+        self._confirmations = {}
+        if self.confirmation_options is not None:
+            options = dict({"conf_thresh": self.conf_thresh}, **self.confirmation_options)
+            self._confirmations = {i: FireConfirmation(**options) for i in self.stream_stats}
+        # Results of each stream waiting for an earlier frame from a slower worker,
+        # and frames that will never arrive because their worker died
+        self._pending = {i: {} for i in self.stream_stats}
+        self._lost = {i: set() for i in self.stream_stats}
+        self._next_seq = dict.fromkeys(self.stream_stats, 0)
+
+        start = time.perf_counter()
+        # Every child reports over its own pipe, read here until the child closes it (or dies)
+        children = {}
+        try:
+            for i in range(self.workers):
+                self._start_child(ctx, children, ("worker", i), _worker_main,
+                                  (ring, self.model_path, self.conf_thresh, self.batch_size,
+                                   self.imgsz, self.backend, self.threads_per_worker))
+            for i, source in enumerate(sources):
+                self._start_child(ctx, children, ("capture", i), _capture_main,
+                                  (ring, i, parse_source(source), self.process_interval, 1))
+            self._collect(children, ring)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for process, _ in children.values():
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+            ring.close()
+        for stream_idx, stats in self.stream_stats.items():
+            if stats["status"] == "running":
+                # Capture still running when no worker was left to scan its frames
+                stats["status"] = "failed"
+            # Frames behind a gap nobody reported (e.g. after an interrupt) are delivered in order
+            for seq in sorted(self._pending[stream_idx]):
+                self._deliver(stream_idx, *self._pending[stream_idx].pop(seq),
+                              self._confirmations.get(stream_idx))
+        elapsed = time.perf_counter() - start
+        scanned = sum(s["scanned"] for s in self.stream_stats.values())
+        return {"frames_scanned": scanned, "seconds": round(elapsed, 2),
+                "frames_per_second": round(scanned / elapsed, 1) if elapsed else 0.0,
+                "workers": self.workers, "streams": self.stream_stats}
+
+    @staticmethod
+    def _start_child(ctx, children, role, target, args):
+        reader, writer = ctx.Pipe(duplex=False)
+        kind, idx = role
+        process = ctx.Process(target=target, name=f"{'inference' if kind == 'worker' else kind}-{idx}",
+                              args=args[:1] + (writer,) + args[1:], daemon=True)
+        process.start()
+        # Only the child may hold the write end, so its exit shows up here as end of file
+        writer.close()
+        children[reader] = (process, role)
+
+    def _collect(self, children, ring):
+        """Reads the children's messages until all workers are gone."""
+        open_conns = dict(children)
+        workers_left = {idx for _, (kind, idx) in children.values() if kind == "worker"}
+        captures_left = {idx for _, (kind, idx) in children.values() if kind == "capture"}
+        # (stream_idx, seq) taken by each worker and not yet reported
+        in_flight = {idx: set() for idx in workers_left}
+        ring_stopped = False
+        while workers_left:
+            ready = connection.wait(list(open_conns), timeout=LIVENESS_INTERVAL_S)
+            if not ready:
+                # Exited children whose pipe did not close (e.g. inherited by a grandchild)
+                ready = [conn for conn, (process, _) in open_conns.items()
+                         if process.exitcode is not None and not conn.poll()]
+            for conn in ready:
+                process, (kind, idx) = open_conns[conn]
+                try:
+                    message = conn.recv() if conn.poll() else None
+                except (EOFError, OSError):
+                    message = None
+                if message is None:
+                    # The child exited: everything it sent has been read
+                    del open_conns[conn]
+                    process.join(1.0)
+                    if kind == "capture" and idx in captures_left:
+                        print(f"Warning: Capture of {self.stream_stats[idx]['source']} exited "
+                              f"with code {process.exitcode}")
+                        self.stream_stats[idx]["status"] = "failed"
+                        captures_left.discard(idx)
+                    elif kind == "worker" and idx in workers_left:
+                        print(f"Warning: Inference worker {idx} exited with code {process.exitcode}")
+                        workers_left.discard(idx)
+                        for stream_idx, seq in in_flight.pop(idx):
+                            self._lost[stream_idx].add(seq)
+                            self._advance(stream_idx)
+                    continue
+                if message[0] == "frame":
+                    _, stream_idx, seq, frame_idx, timestamp, dets = message
+                    in_flight[idx].discard((stream_idx, seq))
+                    self._pending[stream_idx][seq] = (frame_idx, timestamp, dets)
+                    self._advance(stream_idx)
+                elif message[0] == "taken":
+                    in_flight[idx].update(message[1])
+                elif message[0] == "end":
+                    _, stream_idx, _, dropped, status = message
+                    self.stream_stats[stream_idx].update(dropped=dropped, status=status)
+                    captures_left.discard(stream_idx)
+                elif message[0] == "worker_done":
+                    workers_left.discard(idx)
+            if not captures_left and not ring_stopped:
+                # Workers finish the frames already in the ring, then stop
+                ring.stop(len(workers_left))
+                ring_stopped = True
+
+    def _advance(self, stream_idx):
+        """Delivers the results of a stream that are next in order, skipping lost frames."""
+        pending, lost = self._pending[stream_idx], self._lost[stream_idx]
+        while True:
+            seq = self._next_seq[stream_idx]
+            if seq in lost:
+                lost.discard(seq)
+                self.stream_stats[stream_idx]["lost"] += 1
+            elif seq in pending:
+                self._deliver(stream_idx, *pending.pop(seq), self._confirmations.get(stream_idx))
+            else:
+                return
+            self._next_seq[stream_idx] += 1
+
+    def _deliver(self, stream_idx, frame_idx, timestamp, dets, confirmation):
+        if confirmation is None:
+            fire_detected = len(dets) > 0
+        else:
+            confirmation.update(timestamp, float(dets["conf"].max()) if len(dets) else 0.0)
+            fire_detected = confirmation.active
+        stats = self.stream_stats[stream_idx]
+        stats["scanned"] += 1
+        stats["fire_frames"] += int(fire_detected)
+        if self.on_result:
+            self.on_result(stream_idx, frame_idx, timestamp, dets, fire_detected)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fire detection over many sources with one process per core.")
+    parser.add_argument("sources", nargs="+", help="Video files, device indices or RTSP URLs")
+    parser.add_argument("--model", default=None, help="Path to YOLO weights (default: fire_8n.pt)")
+    parser.add_argument("--workers", type=int, default=None, help="Inference processes (default: one per CPU)")
+    parser.add_argument("--conf", type=float, default=0.5, help="Confidence threshold")
+    parser.add_argument("--interval", type=int, default=3, help="Scan every Nth frame of each source")
+    parser.add_argument("--batch-size", type=int, default=1, help="Frames per model call in each worker")
+    parser.add_argument("--ring-slots", type=int, default=None, help="Frames in the shared ring (default: 2 per worker)")
+    parser.add_argument("--max-frame", default="1920x1080", help="Largest frame WxH kept in the ring")
+    parser.add_argument("--threads-per-worker", type=int, default=1, help="Intra-op threads of each model")
+    parser.add_argument("--imgsz", type=int, default=None, help="Inference resolution, e.g. 320, 416 or 640")
+    parser.add_argument("--backend", default="torch", help="torch, onnx, onnx_int8 or openvino")
+    parser.add_argument("--confirm", action="store_true",
+                        help="Report fire only after temporal confirmation (k-of-n votes with hysteresis)")
+    args = parser.parse_args(argv)
+
+    model_path = resolve_model_path(args.model) if args.model else resolve_model_path(*CAMERA_MODEL)
+    width, height = (int(v) for v in args.max_frame.lower().split("x"))
+    fire_state = {}
+
+    def on_result(stream_idx, frame_idx, timestamp, dets, fire_detected):
+        if fire_detected != fire_state.get(stream_idx, False):
+            state = "FIRE DETECTED" if fire_detected else "safe"
+            print(f"[{args.sources[stream_idx]}] frame {frame_idx} ({timestamp:.1f}s): {state}")
+        fire_state[stream_idx] = fire_detected
+
+    detector = ParallelDetector(model_path, args.workers, args.conf, args.interval, args.batch_size,
+                                args.ring_slots, (height, width, 3), args.imgsz, args.backend,
+                                args.threads_per_worker, {} if args.confirm else None, on_result)
+    print(detector.run(args.sources))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Regions of interest and tiling for fixed cameras.
+
+A RegionPlan turns a frame into the list of windows the model actually runs
+on: the configured regions of interest (or the whole frame), optionally
+split into overlapping tiles so small fires stay large enough at the
+inference resolution. Detections from all windows are shifted back to frame
+coordinates in one array operation and duplicates from overlapping windows
+are merged with class-aware NMS.
+"""
+import numpy as np
+from box_tracker import iou_matrix
+
+
+def result_arrays(result):
+    """
+    Detections of one ultralytics result as NumPy arrays.
+    Returns:
+        tuple: (xyxy (N, 4) float32, conf (N,) float32, cls (N,) int64)
+    """
+    boxes = result.boxes
+    if len(boxes) == 0:
+        return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+    return (np.asarray(boxes.xyxy.cpu().numpy(), dtype=np.float32).reshape(-1, 4),
+            np.asarray(boxes.conf.cpu().numpy(), dtype=np.float32).reshape(-1),
+            np.asarray(boxes.cls.cpu().numpy()).astype(np.int64).reshape(-1))
+
+
+def nms(xyxy, conf, cls, iou_thresh=0.5):
+    """Indices kept by greedy class-aware non-maximum suppression, best first."""
+    order = np.argsort(-conf)
+    if len(order) < 2:
+        return order
+    ious = iou_matrix(xyxy, xyxy)
+    same_class = cls[:, None] == cls[None, :]
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in order:
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed |= same_class[i] & (ious[i] > iou_thresh)
+    return np.array(keep, dtype=np.int64)
+
+
+def _tile_starts(start, end, tile, step):
+    if end - start <= tile:
+        return [start]
+    starts = list(range(start, end - tile, step))
+    starts.append(end - tile)
+    return starts
+
+
+class RegionPlan:
+    """
+    Windows of a frame to run the model on.
+
+    Args:
+        rois (list or None): (x1, y1, x2, y2) regions, in pixels or, if every
+            value is <= 1, as fractions of the frame size. None uses the whole frame.
+        tile_size (int or None): Regions larger than this (in frame pixels) are
+            split into tile_size x tile_size tiles; None disables tiling.
+        tile_overlap (float): Fraction of a tile shared with its neighbor, so
+            fires on a tile border are seen whole by one tile.
+        nms_iou (float): IoU above which detections from overlapping windows are merged.
+    """
+    def __init__(self, rois=None, tile_size=None, tile_overlap=0.2, nms_iou=0.5):
+        self.rois = None if rois is None else np.asarray(rois, dtype=np.float64).reshape(-1, 4)
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.nms_iou = nms_iou
+        self._windows_cache = {}
+
+    def windows(self, frame_shape):
+        """
+        Window rectangles for a frame size, computed once per size.
+        Returns:
+            ndarray: (W, 4) int array of x1, y1, x2, y2.
+        """
+        height, width = frame_shape[:2]
+        windows = self._windows_cache.get((height, width))
+        if windows is None:
+            windows = self._windows_cache[(height, width)] = self._build_windows(width, height)
+        return windows
+
+    def _build_windows(self, width, height):
+        if self.rois is None:
+            rois = np.array([[0, 0, width, height]], dtype=np.float64)
+        elif (self.rois <= 1).all():
+            rois = self.rois * [width, height, width, height]
+        else:
+            rois = self.rois
+        rois = np.clip(np.round(rois), 0, [width, height, width, height]).astype(np.int64)
+        rois = rois[(rois[:, 2] > rois[:, 0]) & (rois[:, 3] > rois[:, 1])]
+        if len(rois) == 0:
+            raise ValueError("No region of interest lies inside the frame")
+        if not self.tile_size:
+            return rois
+
+        tile = self.tile_size
+        step = max(1, int(tile * (1 - self.tile_overlap)))
+        windows = []
+        for x1, y1, x2, y2 in rois:
+            for ty in _tile_starts(y1, y2, tile, step):
+                for tx in _tile_starts(x1, x2, tile, step):
+                    windows.append((tx, ty, min(tx + tile, x2), min(ty + tile, y2)))
+        return np.array(windows, dtype=np.int64)
+
+    def crops(self, frame):
+        """Views (no copies) of the frame for each window."""
+        return [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in self.windows(frame.shape)]
+
+    def merge(self, frame_shape, window_arrays):
+        """
+        Maps detections of every window back to frame coordinates.
+        Args:
+            frame_shape (tuple): Shape of the frame the windows were cut from.
+            window_arrays (list): result_arrays() output for each window, in order.
+        Returns:
+            tuple: (xyxy, conf, cls) arrays in frame coordinates.
+        """
+        windows = self.windows(frame_shape)
+        counts = [len(conf) for _, conf, _ in window_arrays]
+        xyxy = np.concatenate([a[0] for a in window_arrays]) if window_arrays else np.zeros((0, 4), np.float32)
+        conf = np.concatenate([a[1] for a in window_arrays]) if window_arrays else np.zeros(0, np.float32)
+        cls = np.concatenate([a[2] for a in window_arrays]) if window_arrays else np.zeros(0, np.int64)
+        # Shift every box by the top-left corner of its window
+        offsets = np.repeat(windows[:, :2], counts, axis=0)
+        xyxy = xyxy + np.tile(offsets, 2)
+        if len(windows) > 1 and len(conf) > 1:
+            keep = nms(xyxy, conf, cls, self.nms_iou)
+            xyxy, conf, cls = xyxy[keep], conf[keep], cls[keep]
+        return xyxy, conf, cls
@@ -0,0 +1,221 @@
+"""
+Soak test of the camera loop.
+
+Runs the RealTimeFireApp stack (motion gate, adaptive stride, tracking,
+confirmation, threaded pipeline, thumbnail display) without Tk on a video
+file looped as a stand-in camera, for as long as asked. After a warm-up, it
+samples RSS, memory traced by tracemalloc (block count and size) and
+garbage-collector pauses at regular intervals, and fails if memory grew by
+more than the allowed amount. The report lists the allocation sites that
+grew the most.
+
+Usage:
+    python src/soak_test.py --duration 4h -o soak.json
+    python src/soak_test.py --duration 10m --no-pool      # compare without the frame pool
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+# Ensure we can import from the same directory
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fire_detection_logic import FireVideoProcessor
+from fire_pipeline import FramePipeline, DROP_OLDEST
+from frame_display import FrameDisplay
+from model_registry import resolve_model_path, CAMERA_MODEL
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_VIDEO = os.path.join(REPO_DIR, "videos", "fire_2.mp4")
+DISPLAY_SIZE = (300, 200)
+
+
+def parse_duration(text):
+    """Seconds from "90", "90s", "15m" or "4h"."""
+    units = {"s": 1, "m": 60, "h": 3600}
+    if text[-1:] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def rss_mb():
+    """Current resident set size of this process in MB, or None if unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+class GCPauses:
+    """Durations of garbage collections, via gc.callbacks."""
+    def __init__(self):
+        self.pauses_ms = {0: [], 1: [], 2: []}
+        self._start = None
+
+    def __call__(self, phase, info):
+        if phase == "start":
+            self._start = time.perf_counter()
+        elif self._start is not None:
+            self.pauses_ms[info["generation"]].append((time.perf_counter() - self._start) * 1000)
+            self._start = None
+
+    def summary(self):
+        return {f"gen{gen}": {"count": len(pauses), "max_ms": round(max(pauses, default=0.0), 2)}
+                for gen, pauses in self.pauses_ms.items()}
+
+
+def sample(start, frames, pipeline):
+    traced, _ = tracemalloc.get_traced_memory()
+    rss = rss_mb()
+    return {"elapsed_s": round(time.monotonic() - start, 1), "frames": frames,
+            "rss_mb": round(rss, 1) if rss is not None else None,
+            "traced_mb": round(traced / (1024 * 1024), 2),
+            "traced_blocks": sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename")),
+            "dropped_frames": pipeline.dropped_frames}
+
+
+def build_processor(model_path):
+    """The processor as configured by RealTimeFireApp, reading a looped file as a camera."""
+    processor = FireVideoProcessor(model_path)
+    processor.enable_motion_gate()
+    processor.enable_adaptive_stride()
+    processor.enable_tracking()
+    processor.enable_confirmation(raise_hold_s=3.0)
+    processor.convert_rgb = False
+    processor.decode_options = {"loop": True}
+    return processor
+
+
+def run_soak(processor, video_path, duration_s, warmup_s, sample_interval_s, pool_frames=True):
+    """
+    Runs the camera loop and samples memory.
+    Returns:
+        tuple: (samples after warm-up, tracemalloc snapshot at the end of warm-up,
+            final snapshot, GCPauses)
+    """
+    if not processor.load_video(video_path):
+        raise RuntimeError(f"Could not open {video_path}")
+    # Timestamps from the monotonic clock, as for a real camera (file positions restart on every loop).
+    # The file decodes faster than a camera delivers, so the pipeline drops many frames: that path is exercised too
+    processor.live_source = True
+    display = FrameDisplay(size=DISPLAY_SIZE)
+    frame_interval = 1.0 / (processor.fps or 30)
+
+    tracemalloc.start()
+    gc.collect()
+    gc.freeze()
+    pauses = GCPauses()
+    gc.callbacks.append(pauses)
+    pipeline = FramePipeline(processor, drop_policy=DROP_OLDEST, pool_frames=pool_frames)
+    pipeline.start()
+    start = time.monotonic()
+    next_sample = start + warmup_s
+    baseline = None
+    samples = []
+    frames = 0
+    try:
+        while time.monotonic() - start < duration_s:
+            result = pipeline.get_result()
+            if result is None:
+                time.sleep(0.005)
+                continue
+            frame, fire_detected, status = result
+            if status != "ok":
+                raise RuntimeError(f"Stream {status} after {frames} frames")
+            display.thumbnail(frame)
+            pipeline.recycle(frame)
+            frames += 1
+            now = time.monotonic()
+            if now >= next_sample:
+                if baseline is None:
+                    gc.collect()
+                    baseline = tracemalloc.take_snapshot()
+                samples.append(sample(start, frames, pipeline))
+                print(f"[{samples[-1]['elapsed_s']:8.0f}s] {frames} frames, RSS {samples[-1]['rss_mb']} MB, "
+                      f"traced {samples[-1]['traced_mb']} MB in {samples[-1]['traced_blocks']} blocks")
+                next_sample = now + sample_interval_s
+            # Paced like the Tk loop: one displayed frame per frame interval at most
+            time.sleep(max(0.0, frame_interval - (time.monotonic() - now)))
+        if baseline is None:
+            raise RuntimeError("No frame arrived after the warm-up")
+        gc.collect()
+        samples.append(sample(start, frames, pipeline))
+        final = tracemalloc.take_snapshot()
+    finally:
+        pipeline.stop()
+        processor.release_video()
+        gc.callbacks.remove(pauses)
+        gc.unfreeze()
+        tracemalloc.stop()
+    if pipeline.frame_pool is not None:
+        samples[-1]["frame_pool"] = pipeline.frame_pool.stats()
+    return samples, baseline, final, pauses
+
+
+def check_growth(samples, max_rss_growth_mb, max_traced_growth_mb, max_block_growth):
+    """Failures of the last sample against the first (end of warm-up)."""
+    first, last = samples[0], samples[-1]
+    failures = []
+    if first["rss_mb"] is not None and last["rss_mb"] - first["rss_mb"] > max_rss_growth_mb:
+        failures.append(f"RSS grew {last['rss_mb'] - first['rss_mb']:.1f} MB (allowed {max_rss_growth_mb})")
+    if last["traced_mb"] - first["traced_mb"] > max_traced_growth_mb:
+        failures.append(f"traced memory grew {last['traced_mb'] - first['traced_mb']:.2f} MB "
+                        f"(allowed {max_traced_growth_mb})")
+    if last["traced_blocks"] - first["traced_blocks"] > max_block_growth:
+        failures.append(f"allocated blocks grew by {last['traced_blocks'] - first['traced_blocks']} "
+                        f"(allowed {max_block_growth})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that the camera loop runs in bounded memory.")
+    parser.add_argument("-o", "--output", default="soak.json", help="JSON report to write")
+    parser.add_argument("--model", help="Path to YOLO weights (default: fire_8n.pt)")
+    parser.add_argument("--video", default=DEFAULT_VIDEO, help="Video file looped as the camera")
+    parser.add_argument("--duration", default="1h", help="Run time, e.g. 600, 30m or 4h")
+    parser.add_argument("--warmup", default="2m", help="Time before the first (baseline) sample")
+    parser.add_argument("--sample-interval", default="1m", help="Time between samples")
+    parser.add_argument("--no-pool", action="store_true", help="Allocate a new array per frame (for comparison)")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=32.0)
+    parser.add_argument("--max-traced-growth-mb", type=float, default=4.0)
+    parser.add_argument("--max-block-growth", type=int, default=2000,
+                        help="Allowed growth of the number of live traced allocations")
+    args = parser.parse_args(argv)
+
+    model_path = resolve_model_path(args.model) if args.model else resolve_model_path(*CAMERA_MODEL)
+    duration_s, warmup_s = parse_duration(args.duration), parse_duration(args.warmup)
+    if warmup_s >= duration_s:
+        parser.error("--warmup must be shorter than --duration")
+    processor = build_processor(model_path)
+    samples, baseline, final, pauses = run_soak(processor, args.video, duration_s, warmup_s,
+                                                parse_duration(args.sample_interval), not args.no_pool)
+    failures = check_growth(samples, args.max_rss_growth_mb, args.max_traced_growth_mb, args.max_block_growth)
+    top_growth = [str(stat) for stat in final.compare_to(baseline, "lineno")[:10]]
+    report = {"video": args.video, "duration_s": duration_s, "warmup_s": warmup_s,
+              "frame_pool": not args.no_pool, "samples": samples, "gc": pauses.summary(),
+              "top_growth": top_growth, "failures": failures}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+    print("Largest growth since warm-up:")
+    for line in top_growth[:5]:
+        print(f"  {line}")
+    print(f"GC: {pauses.summary()}")
+    for line in failures:
+        print(f"FAIL {line}")
+    print(f"{'FAILED' if failures else 'OK'} -> {args.output}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+"""
+Multi-camera stream multiplexer with a single shared YOLO model.
+
+Every source (device index, video file or RTSP URL) gets its own capture
+thread and its own FireVideoProcessor for per-stream state (capture, frame
+counter, cached boxes), but all processors share one model instance. A
+scheduler thread collects the freshest frame of each stream and runs the
+sampled ones through the model in one cross-stream batch.
+
+Usage:
+    python src/stream_mux.py 0 1 rtsp://cam3/stream videos/fire_2.mp4
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+# Ensure we can import from the same directory
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import cv2
+from fire_detection_logic import FireVideoProcessor
+from model_cascade import load_cascade
+from fire_metrics import METRICS
+from model_registry import get_model, resolve_model_path, CAMERA_MODEL
+
+ROUND_ROBIN = "round_robin"
+PRIORITY = "priority"
+
+
+def parse_source(source):
+    """Turns "0" into a device index; files and URLs are passed through unchanged."""
+    if isinstance(source, str) and source.isdigit():
+        return int(source)
+    return source
+
+
+class StreamState:
+    """Per-stream state. Holds no model: only a capture, counters and the latest frame/result."""
+    def __init__(self, stream_id, source, processor, priority=0, realtime=None):
+        self.stream_id = stream_id
+        self.source = source
+        self.processor = processor
+        self.priority = priority
+        # By default files are read at their native fps, like a live camera
+        self.realtime = realtime if realtime is not None else isinstance(source, str) and "://" not in source
+        self.lock = threading.Lock()
+        self.pending_frame = None
+        self.pending_time = 0.0
+        self.status = "ok"
+        self.result = None
+        self.last_served = 0.0
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.inferences = 0
+        self.thread = None
+
+    def offer_frame(self, frame, status, timestamp=0.0):
+        """Called by the capture thread. Keeps only the newest unprocessed frame."""
+        with self.lock:
+            self.status = status
+            if frame is None:
+                # Keep the last real frame so it is still processed before the end is reported
+                return
+            if self.pending_frame is not None:
+                self.frames_dropped += 1
+                METRICS.inc("frames_dropped")
+            self.pending_frame = frame
+            self.pending_time = timestamp
+            self.frames_read += 1
+
+    def take_frame(self):
+        """Returns (frame, timestamp) of the newest unprocessed frame; frame is None if there is none."""
+        with self.lock:
+            frame, self.pending_frame = self.pending_frame, None
+            return frame, self.pending_time
+
+
+class StreamMultiplexer:
+    """
+    Feeds many video sources into one shared model.
+
+    Args:
+        model_path (str): Weights loaded once and shared by all streams.
+        conf_thresh (float): Confidence threshold for detection.
+        process_interval (int): Run detection every N frames of each stream.
+        scheduling (str): ROUND_ROBIN, or PRIORITY to serve high-priority streams first.
+        max_batch_size (int): Maximum number of streams inferred in one model call.
+        on_result (callable): Optional callback(stream_id, frame, fire_detected, status),
+            called from the scheduler thread. The frame is BGR: callbacks that show it
+            convert it themselves, the others pay no color conversion.
+        motion_gate_options (dict or None): If set, every stream gets its own MotionGate
+            built from these options, so static scenes skip the model.
+        confirmation_options (dict or None): If set, every stream gets its own
+            FireConfirmation built from these options and reports the confirmed alarm state.
+        export_options (dict or None): If set, every stream writes event clips
+            through its own EventClipWriter built from these options.
+        backend (str): Inference backend, see inference_backends.load_model.
+        cascade_options (dict or None): If set, load_cascade options (confirm_model_path,
+            suspect_conf, ...): the shared model only screens, and the suspect frames of
+            all streams are confirmed by a larger model in one call.
+    """
+    def __init__(self, model_path="models/fire_8n.pt", conf_thresh=0.5, process_interval=3,
+                 scheduling=ROUND_ROBIN, max_batch_size=8, on_result=None, model=None,
+                 motion_gate_options=None, backend="auto", confirmation_options=None, export_options=None,
+                 cascade_options=None):
+        if scheduling not in (ROUND_ROBIN, PRIORITY):
+            raise ValueError(f"Unknown scheduling policy: {scheduling}")
+        if model is None:
+            model, backend = get_model(model_path, backend)
+        self.model = model
+        self.conf_thresh = conf_thresh
+        self.process_interval = process_interval
+        self.scheduling = scheduling
+        self.max_batch_size = max_batch_size
+        self.on_result = on_result
+        self.motion_gate_options = motion_gate_options
+        self.confirmation_options = confirmation_options
+        self.export_options = export_options
+        # One confirmation stage shared by all streams (see FireVideoProcessor.enable_cascade)
+        self.cascade = load_cascade(backend=backend, **cascade_options) if cascade_options is not None else None
+        self.streams = {}
+        self.batches_run = 0
+        self._rr_offset = 0
+        self._streams_lock = threading.Lock()
+        # Held around every model call; other users of the shared model (detection_service) take it too
+        self.model_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._scheduler_thread = None
+
+    def add_stream(self, stream_id, source, priority=0, realtime=None, imgsz=None, regions=None):
+        """
+        Opens a source and starts its capture thread.
+        Args:
+            imgsz (int or None): Inference resolution for this stream (e.g. 320 for a cheap camera).
+            regions (dict or None): FireVideoProcessor.enable_regions options (rois, tile_size,
+                tile_overlap) for this stream.
+        Returns:
+            bool: True if the source was opened.
+        """
+        source = parse_source(source)
+        processor = FireVideoProcessor(model=self.model)
+        processor.cascade = self.cascade
+        if self.motion_gate_options is not None:
+            processor.enable_motion_gate(**self.motion_gate_options)
+        if self.confirmation_options is not None:
+            processor.enable_confirmation(**self.confirmation_options)
+        if self.export_options is not None:
+            processor.enable_export(**self.export_options)
+        processor.set_inference_size(imgsz)
+        if regions is not None:
+            processor.enable_regions(**regions)
+        if not processor.load_video(source):
+            processor.disable_export()
+            return False
+        stream = StreamState(stream_id, source, processor, priority, realtime)
+        with self._streams_lock:
+            self.streams[stream_id] = stream
+        if self._scheduler_thread is not None:
+            self._start_capture(stream)
+        return True
+
+    def remove_stream(self, stream_id):
+        with self._streams_lock:
+            stream = self.streams.pop(stream_id, None)
+        if stream:
+            self._stop_capture(stream)
+
+    def start(self):
+        self._stop_event.clear()
+        for stream in list(self.streams.values()):
+            self._start_capture(stream)
+        self._scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
+        self._scheduler_thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._scheduler_thread is not None:
+            self._scheduler_thread.join(5.0)
+            self._scheduler_thread = None
+        for stream in list(self.streams.values()):
+            self._stop_capture(stream)
+
+    def get_result(self, stream_id):
+        """
+        Latest result of a stream for UI polling.
+        Returns:
+            tuple or None: (frame_rgb, fire_detected, status), or None if nothing new.
+        """
+        stream = self.streams.get(stream_id)
+        if stream is None:
+            return None
+        with stream.lock:
+            result, stream.result = stream.result, None
+        if result is None or result[0] is None:
+            return result
+        # Converted only here, so frames nobody polls are never converted
+        frame, fire_detected, status = result
+        with METRICS.stage("color_convert"):
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return frame_rgb, fire_detected, status
+
+    def stats(self):
+        """Per-stream counters plus the number of shared model calls."""
+        with self._streams_lock:
+            streams = list(self.streams.items())
+        return {
+            "batches_run": self.batches_run,
+            "cascade": self.cascade.stats() if self.cascade else None,
+            "streams": {
+                stream_id: {"frames_read": s.frames_read, "frames_dropped": s.frames_dropped,
+                            "inferences": s.inferences, "status": s.status,
+                            "motion_gate": s.processor.motion_gate.stats() if s.processor.motion_gate else None}
+                for stream_id, s in streams
+            },
+        }
+
+    def _start_capture(self, stream):
+        if stream.thread is not None and stream.thread.is_alive():
+            return
+        stream.thread = threading.Thread(target=self._capture_loop, args=(stream,), daemon=True)
+        stream.thread.start()
+
+    def _stop_capture(self, stream):
+        if stream.thread is not None:
+            stream.thread.join(5.0)
+            stream.thread = None
+        stream.processor.release_video()
+        stream.processor.disable_export()
+
+    def _capture_loop(self, stream):
+        frame_period = 1.0 / stream.processor.fps
+        next_time = time.perf_counter()
+        while not self._stop_event.is_set() and stream.stream_id in self.streams:
+            frame, status = stream.processor.read_frame()
+            stream.offer_frame(frame, status, stream.processor.last_frame_time)
+            if frame is None:
+                return
+            if stream.realtime:
+                next_time += frame_period
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+    def _schedule(self, ready):
+        """Orders the streams that have a fresh frame and keeps at most max_batch_size."""
+        if self.scheduling == PRIORITY:
+            # Highest priority first; among equals, the stream served longest ago
+            ready.sort(key=lambda s: (-s.priority, s.last_served))
+        else:
+            offset = self._rr_offset % len(ready)
+            ready = ready[offset:] + ready[:offset]
+            self._rr_offset += 1
+        return ready[:self.max_batch_size]
+
+    def _scheduler_loop(self):
+        while not self._stop_event.is_set():
+            with self._streams_lock:
+                ready = [s for s in self.streams.values() if s.pending_frame is not None or s.status != "ok"]
+            if not ready:
+                time.sleep(0.002)
+                continue
+
+            batch = []
+            for stream in self._schedule(ready):
+                frame, timestamp = stream.take_frame()
+                if frame is None:
+                    # Stream ended or failed: report it once and stop scheduling it
+                    self._publish(stream, (None, False, stream.status))
+                    self.remove_stream(stream.stream_id)
+                    continue
+                batch.append((stream, frame, timestamp))
+            self._process_batch(batch)
+
+    def _process_batch(self, batch):
+        sampled = [(stream, frame) for stream, frame, _ in batch
+                   if stream.processor.should_infer(frame, self.process_interval)]
+        # One model call per inference size for all sampled streams (ROI crops and tiles included)
+        by_size = {}
+        for stream, frame in sampled:
+            by_size.setdefault(stream.processor.imgsz, []).append((stream, frame))
+        detections = {}
+        for group in by_size.values():
+            inputs = [stream.processor.inference_inputs(frame) for stream, frame in group]
+            with METRICS.stage("inference_batch"), self.model_lock:
+                results = group[0][0].processor.run_model([img for imgs in inputs for img in imgs],
+                                                          group[0][0].processor.screen_conf(self.conf_thresh))
+            METRICS.inc("inferences", len(group))
+            self.batches_run += 1
+            start = 0
+            for (stream, frame), imgs in zip(group, inputs):
+                detections[stream.stream_id] = stream.processor.boxes_from_inputs(
+                    frame.shape, results[start:start + len(imgs)], stream.processor.frame_count)
+                start += len(imgs)
+                stream.inferences += 1
+        if self.cascade and detections:
+            # Suspect frames of all streams go through the confirmation model in one call
+            frames = {stream.stream_id: frame for stream, frame in sampled}
+            stream_ids = list(detections)
+            with self.model_lock:
+                confirmed = self.cascade.confirm([frames[i] for i in stream_ids],
+                                                 [detections[i] for i in stream_ids], self.conf_thresh)
+            detections = dict(zip(stream_ids, confirmed))
+
+        now = time.perf_counter()
+        for stream, frame, timestamp in batch:
+            processor = stream.processor
+            processor.update_boxes(detections.get(stream.stream_id))
+            with METRICS.stage("draw"):
+                processor.draw_boxes(frame, processor.last_boxes)
+            fire_detected = processor.confirm(timestamp, self.conf_thresh)
+            processor.export_frame(frame, timestamp, fire_detected)
+            processor.frame_count += 1
+            stream.last_served = now
+            self._publish(stream, (frame, fire_detected, "ok"))
+
+    def _publish(self, stream, result):
+        with stream.lock:
+            stream.result = result
+        if self.on_result:
+            self.on_result(stream.stream_id, *result)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monitor several cameras with one shared fire detection model.")
+    parser.add_argument("sources", nargs="+", help="Device indices, video files or RTSP URLs")
+    parser.add_argument("--model", default=None, help="Path to YOLO weights (default: fire_8n.pt)")
+    parser.add_argument("--conf", type=float, default=0.5, help="Confidence threshold")
+    parser.add_argument("--interval", type=int, default=3, help="Run detection every N frames per stream")
+    parser.add_argument("--scheduling", choices=[ROUND_ROBIN, PRIORITY], default=ROUND_ROBIN)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--motion-gate", action="store_true", help="Skip the model on static scenes")
+    parser.add_argument("--confirm", action="store_true",
+                        help="Report fire only once confirmed over several frames (k-of-n voting)")
+    parser.add_argument("--clip-dir", default=None, help="Write an MP4 clip of every fire event into this folder")
+    parser.add_argument("--cascade", nargs="?", const="", default=None, metavar="WEIGHTS",
+                        help="Confirm suspect frames with a larger model (default: fire_8l.pt)")
+    parser.add_argument("--suspect-conf", type=float, default=0.25,
+                        help="With --cascade, threshold above which frames are sent to the larger model")
+    parser.add_argument("--imgsz", type=int, default=None, help="Inference resolution, e.g. 320, 416 or 640")
+    parser.add_argument("--roi", action="append", default=[], metavar="INDEX=X1,Y1,X2,Y2",
+                        help="Region of interest of source INDEX (pixels or 0-1 fractions); repeatable")
+    parser.add_argument("--tile-size", type=int, default=None, help="Split regions larger than this into tiles")
+    parser.add_argument("--backend", default="auto", help="torch, onnx, onnx_int8, openvino, auto or benchmark")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve stage metrics on 127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-log-interval", type=float, default=None, help="Print a metrics summary every N s")
+    args = parser.parse_args(argv)
+
+    if args.metrics_port or args.metrics_log_interval:
+        METRICS.enable(port=args.metrics_port, log_interval=args.metrics_log_interval)
+
+    model_path = resolve_model_path(args.model) if args.model else resolve_model_path(*CAMERA_MODEL)
+
+    fire_state = {}
+
+    def on_result(stream_id, frame, fire_detected, status):
+        if status != "ok":
+            print(f"[{stream_id}] stream {status}")
+        elif fire_detected != fire_state.get(stream_id, False):
+            print(f"[{stream_id}] {'FIRE DETECTED' if fire_detected else 'safe'}")
+        fire_state[stream_id] = fire_detected
+
+    mux = StreamMultiplexer(model_path, args.conf, args.interval, args.scheduling,
+                            args.max_batch_size, on_result=on_result,
+                            motion_gate_options={} if args.motion_gate else None, backend=args.backend,
+                            confirmation_options={} if args.confirm else None,
+                            export_options={"clip_dir": args.clip_dir} if args.clip_dir else None,
+                            cascade_options=None if args.cascade is None else
+                            {"confirm_model_path": args.cascade or None, "suspect_conf": args.suspect_conf})
+    rois = {}
+    for spec in args.roi:
+        index, coords = spec.split("=", 1)
+        rois.setdefault(int(index), []).append([float(v) for v in coords.split(",")])
+    for i, source in enumerate(args.sources):
+        regions = None
+        if i in rois or args.tile_size:
+            regions = {"rois": rois.get(i), "tile_size": args.tile_size}
+        # Earlier sources get higher priority under PRIORITY scheduling
+        if not mux.add_stream(f"cam{i}", source, priority=len(args.sources) - i,
+                              imgsz=args.imgsz, regions=regions):
+            print(f"Warning: could not open {source}")
+    mux.start()
+    try:
+        while mux.streams:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mux.stop()
+    print(mux.stats())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
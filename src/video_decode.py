@@ -0,0 +1,223 @@
+"""
+Video decode layer on top of cv2.VideoCapture.
+
+Files and network streams are opened with the FFmpeg backend, multi-threaded
+decoding and hardware acceleration when the platform offers it (OpenCV falls
+back to software decoding otherwise). Frames that will never be looked at
+are skipped with grab(), which demuxes and decodes but skips the conversion
+to a BGR image and its copy.
+
+For random access, a keyframe index is read from the container with ffprobe
+(packets only, nothing is decoded) and cached per file. A seek then only
+happens when it lands on a keyframe past the current position; anything
+closer is reached by grabbing forward, which is what FFmpeg would decode
+after the seek anyway. Without ffprobe, short distances are grabbed and
+longer ones seek directly.
+"""
+import bisect
+import itertools
+import os
+import shutil
+import subprocess
+
+import cv2
+
+# Keyframe indices per (path, size, mtime), shared by all decoders in the process
+_KEYFRAME_CACHE = {}
+
+
+def is_live_source(source):
+    """Cameras (device indices) and network streams, as opposed to files."""
+    return isinstance(source, int) or "://" in str(source)
+
+
+def keyframe_times(path):
+    """
+    Presentation times (seconds) of the video keyframes, read by ffprobe.
+    Returns:
+        list or None: Sorted times, or None if ffprobe is missing or fails.
+    """
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe is None:
+        return None
+    command = [ffprobe, "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=pts_time,flags",
+               "-of", "csv=p=0", path]
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, timeout=120, check=True).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    times = []
+    for line in output.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            times.append(float(pts_time))
+    return sorted(times) or None
+
+
+class VideoDecoder:
+    """
+    Sequential reader with cheap skips and keyframe-aware seeks.
+
+    Args:
+        source (str or int): File path, stream URL or camera index.
+        hw_accel (bool): Request hardware decoding (FFmpeg backend only).
+        threads (int): FFmpeg decode threads; 0 lets FFmpeg pick one per core.
+        max_grab (int): Without a keyframe index, seek instead of grabbing
+            forward when the target is further than this many frames.
+        loop (bool): Restart files from the first frame when they end, e.g. to
+            stand in for a camera in soak tests.
+    """
+    def __init__(self, source, hw_accel=True, threads=0, max_grab=60, loop=False):
+        self.source = source
+        self.is_live = is_live_source(source)
+        self.max_grab = max_grab
+        self.loop = loop and not self.is_live
+        self.cap = self._open(source, hw_accel, threads)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0
+        # Handle invalid FPS values
+        if not self.fps or self.fps <= 0:
+            self.fps = 30
+        self.frame_total = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0) if not self.is_live else 0
+        self.position = 0
+        self._keyframes = None
+        self._peeked = None
+
+    @staticmethod
+    def _open(source, hw_accel, threads):
+        if isinstance(source, int):
+            return cv2.VideoCapture(source)
+        params = [cv2.CAP_PROP_N_THREADS, threads]
+        if hw_accel:
+            params += [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG, params)
+        if not cap.isOpened():
+            # Builds without FFmpeg (or without these properties) use the default backend
+            cap = cv2.VideoCapture(source)
+        return cap
+
+    def is_opened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        self._peeked = None
+
+    def read(self, out=None):
+        """
+        Decodes the next frame.
+        Args:
+            out (ndarray or None): Buffer to decode into; used when its shape
+                matches the frame, otherwise a new array is returned.
+        Returns:
+            tuple: (success, frame_bgr)
+        """
+        if self._peeked is not None:
+            frame, self._peeked = self._peeked, None
+            self.position += 1
+            if out is not None and out.shape == frame.shape:
+                out[...] = frame
+                return True, out
+            return True, frame
+        ret, frame = self.cap.read(out)
+        if not ret and self.loop and self.position > 0:
+            self.seek(0)
+            ret, frame = self.cap.read(out)
+        if ret:
+            self.position += 1
+        return ret, frame
+
+    def peek(self):
+        """
+        The next frame without consuming it: the following read() returns
+        (a copy of) it again, so previews need no seek back.
+        """
+        if self._peeked is None:
+            ret, frame = self.cap.read()
+            if not ret:
+                return None
+            self._peeked = frame
+        return self._peeked.copy()
+
+    def skip(self, count):
+        """
+        Advances past count frames with grab(), without retrieving images.
+        Returns:
+            int: Frames actually skipped (fewer at the end of the stream).
+        """
+        skipped = 0
+        if count > 0 and self._peeked is not None:
+            self._peeked = None
+            skipped = 1
+        while skipped < count and self.cap.grab():
+            skipped += 1
+        self.position += skipped
+        return skipped
+
+    def keyframes(self):
+        """Frame indices of the keyframes (built on first use), or None if unknown."""
+        if self._keyframes is None and not self.is_live:
+            try:
+                stat = os.stat(self.source)
+            except (OSError, TypeError):
+                return None
+            key = (os.path.abspath(self.source), stat.st_size, stat.st_mtime)
+            if key not in _KEYFRAME_CACHE:
+                times = keyframe_times(self.source)
+                _KEYFRAME_CACHE[key] = None if times is None else sorted({round(t * self.fps) for t in times})
+            self._keyframes = _KEYFRAME_CACHE[key]
+        return self._keyframes
+
+    def keyframe_before(self, frame_idx):
+        """Last keyframe at or before frame_idx, or None without an index."""
+        keyframes = self.keyframes()
+        if not keyframes:
+            return None
+        i = bisect.bisect_right(keyframes, frame_idx)
+        return keyframes[i - 1] if i else 0
+
+    def seek(self, frame_idx):
+        """
+        Positions the decoder so the next read() returns frame frame_idx.
+        Grabs forward when that decodes no more than a seek would.
+        Returns:
+            bool: False if the stream ended before frame_idx.
+        """
+        gap = frame_idx - self.position
+        if gap == 0:
+            return True
+        if gap > 0:
+            keyframe = self.keyframe_before(frame_idx)
+            if (keyframe is None and gap <= self.max_grab) or (keyframe is not None and keyframe <= self.position):
+                return self.skip(gap) == gap
+        self._peeked = None
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        self.position = frame_idx
+        return True
+
+    def sample_every(self, seconds, keyframes_only=False):
+        """
+        Yields (frame_idx, frame_bgr) for one frame every `seconds` of video.
+        Args:
+            keyframes_only (bool): Snap each sample to the keyframe before it, so
+                every sample is one seek and one decoded frame (samples that
+                snap to the same keyframe are dropped).
+        """
+        step = max(1, round(seconds * self.fps))
+        last = -1
+        for target in itertools.count(0, step):
+            if self.frame_total and target >= self.frame_total:
+                return
+            if keyframes_only:
+                keyframe = self.keyframe_before(target)
+                target = target if keyframe is None else keyframe
+                if target <= last:
+                    continue
+            if not self.seek(target):
+                return
+            ret, frame = self.read()
+            if not ret:
+                return
+            last = target
+            yield target, frame
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import numpy as np
+
+# The modules live flat in src/, as the scripts expect
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+
+class _Tensor:
+    def __init__(self, values):
+        self._values = np.asarray(values, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._values
+
+
+class _Boxes:
+    def __init__(self, boxes):
+        self.xyxy = _Tensor([box[:4] for box in boxes] or np.zeros((0, 4)))
+        self.conf = _Tensor([box[4] for box in boxes])
+        self.cls = _Tensor([box[5] for box in boxes])
+
+    def __len__(self):
+        return len(self.conf.numpy())
+
+
+class _Result:
+    def __init__(self, boxes):
+        self.boxes = _Boxes(boxes)
+
+
+class FakeModel:
+    """
+    Stands in for an ultralytics YOLO model: every image gets the boxes in
+    self.boxes (x1, y1, x2, y2, conf, cls) that pass the threshold.
+    """
+    def __init__(self, boxes=((10, 10, 50, 60, 0.8, 0),)):
+        self.names = {0: "fire", 1: "smoke"}
+        self.boxes = list(boxes)
+        self.calls = []
+
+    def __call__(self, images, conf=0.25, verbose=False, **kwargs):
+        images = images if isinstance(images, list) else [images]
+        self.calls.append(len(images))
+        return [_Result([box for box in self.boxes if box[4] >= conf]) for _ in images]
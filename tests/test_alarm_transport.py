@@ -0,0 +1,146 @@
+import os
+import select
+import sys
+import time
+
+import pytest
+from alarm_protocol import AlarmState
+from alarm_transport import AlarmTransport
+
+pytestmark = pytest.mark.skipif(sys.platform.startswith("win"), reason="FakeESP32 needs a pty")
+
+
+class PtyLink:
+    """The parts of serial.Serial that AlarmTransport uses, on the fake board's pty."""
+    def __init__(self, port):
+        self.fd = os.open(port, os.O_RDWR | os.O_NOCTTY)
+        self.broken = False
+        self._buffer = b""
+
+    def write(self, data):
+        if self.broken:
+            raise OSError("device disconnected")
+        os.write(self.fd, data)
+
+    def readline(self):
+        # Returns b"" after a short timeout, like serial.Serial(timeout=...)
+        while b"\n" not in self._buffer:
+            ready, _, _ = select.select([self.fd], [], [], 0.1)
+            if not ready:
+                return b""
+            try:
+                self._buffer += os.read(self.fd, 1024)
+            except OSError:
+                return b""
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        return line + b"\n"
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def board():
+    from fake_esp32 import FakeESP32
+    board = FakeESP32()
+    board.start()
+    yield board
+    board.stop()
+
+
+@pytest.fixture
+def make_transport(board):
+    transports = []
+    links = []
+
+    def connect(verbose=True):
+        links.append(PtyLink(board.port))
+        return links[-1]
+
+    def make(**options):
+        transport = AlarmTransport(connect=connect, **options)
+        transport.links = links
+        transports.append(transport)
+        return transport
+
+    yield make
+    for transport in transports:
+        transport.stop()
+
+
+def test_commands_are_acknowledged(board, make_transport):
+    transport = make_transport(heartbeat_s=0)
+    transport.start()
+    transport.set_fire(True)
+    assert wait_for(lambda: transport.counters["acked"] == 1)
+    assert board.state.fire_active
+    stats = transport.stats()
+    assert stats["connected"] and stats["latency_ms_max"] >= 0
+    assert board.received == ["FIRE 1"]
+
+
+def test_alarm_latches_until_reset(board, make_transport):
+    transport = make_transport(heartbeat_s=0)
+    transport.start()
+    transport.set_fire(True)
+    assert wait_for(lambda: transport.counters["acked"] == 1)
+    transport.set_fire(False)
+    assert wait_for(lambda: transport.counters["acked"] == 2)
+    assert board.state.fire_active and board.state.latched
+    transport.reset()
+    assert wait_for(lambda: transport.counters["acked"] == 3)
+    assert not board.state.fire_active and not board.state.latched
+
+
+def test_silence_on_safe_is_opt_in():
+    state = AlarmState(silence_on_safe=True)
+    assert state.handle("FIRE 1") == "ACK 1"
+    assert state.handle("SAFE 2") == "ACK 2"
+    assert not state.fire_active and state.latched
+    assert state.handle("RESET") is None
+    assert not state.latched
+    assert AlarmState().handle("BOGUS 3") == "NAK 3"
+
+
+def test_state_changes_are_coalesced(board, make_transport):
+    transport = make_transport(heartbeat_s=0)
+    # Not started: everything stays queued
+    for active in (True, False, True, True, False, True):
+        transport.set_fire(active)
+    assert transport.stats()["queued"] == 1
+    assert transport.counters["coalesced"] == 4
+    transport.start()
+    assert wait_for(lambda: transport.counters["acked"] == 1)
+    assert board.received == ["FIRE 1"]
+
+
+def test_heartbeat_while_idle(board, make_transport):
+    transport = make_transport(heartbeat_s=0.05)
+    transport.start()
+    assert wait_for(lambda: transport.counters["acked"] >= 3)
+    assert all(line.startswith("PING") for line in board.received)
+    assert transport.last_ack_time is not None
+
+
+def test_reconnects_and_restores_the_alarm(board, make_transport):
+    transport = make_transport(heartbeat_s=0.05, reconnect_s=0.05)
+    transport.start()
+    transport.set_fire(True)
+    assert wait_for(lambda: transport.counters["acked"] >= 1)
+    # The USB link drops: the next write fails and the transport connects again
+    transport.links[0].broken = True
+    assert wait_for(lambda: transport.counters["reconnects"] == 1)
+    # The board may have rebooted meanwhile: the raised alarm is sent again
+    assert wait_for(lambda: [line.split()[0] for line in board.received].count("FIRE") == 2)
+    assert len(transport.links) == 2
@@ -0,0 +1,165 @@
+import asyncio
+import base64
+import json
+import os
+import socket
+import struct
+import threading
+import urllib.error
+import urllib.request
+
+import cv2
+import numpy as np
+import pytest
+from conftest import FakeModel
+from detection_service import DetectionService
+
+
+@pytest.fixture
+def start_service():
+    """Starts DetectionService instances on 127.0.0.1 in a background event loop."""
+    running = []
+
+    def start(**options):
+        service = DetectionService(None, host="127.0.0.1", port=0, model=FakeModel(), batch_wait_ms=1,
+                                   **options)
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+        task = loop.create_task(service.serve(started=lambda port: started.set()))
+
+        def run():
+            try:
+                loop.run_until_complete(task)
+            except asyncio.CancelledError:
+                pass
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        assert started.wait(5)
+        running.append((loop, task, thread))
+        return service
+
+    yield start
+    for loop, task, thread in running:
+        loop.call_soon_threadsafe(task.cancel)
+        thread.join(5)
+        loop.close()
+
+
+def request(service, path, body=None, method=None, headers=None):
+    req = urllib.request.Request(f"http://127.0.0.1:{service.port}{path}", data=body, method=method,
+                                 headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def jpeg():
+    ok, data = cv2.imencode(".jpg", np.zeros((120, 160, 3), dtype=np.uint8))
+    assert ok
+    return data.tobytes()
+
+
+class WebSocket:
+    def __init__(self, port):
+        self.sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.sock.sendall((f"GET /events HTTP/1.1\r\nHost: 127.0.0.1\r\nUpgrade: websocket\r\n"
+                           f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                           "Sec-WebSocket-Version: 13\r\n\r\n").encode())
+        head = b""
+        while not head.endswith(b"\r\n\r\n"):
+            head += self.sock.recv(1)
+        assert head.startswith(b"HTTP/1.1 101")
+
+    def _read(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            assert chunk, "connection closed"
+            data += chunk
+        return data
+
+    def receive(self):
+        first, length = self._read(2)
+        assert first & 0x0F == 0x1
+        if length == 126:
+            length = struct.unpack("!H", self._read(2))[0]
+        return json.loads(self._read(length))
+
+    def close(self):
+        self.sock.close()
+
+
+def test_health(start_service):
+    service = start_service()
+    status, payload = request(service, "/health")
+    assert status == 200
+    assert payload["status"] == "ok"
+    assert payload["streams"] == 0
+
+
+def test_detect(start_service):
+    service = start_service()
+    status, payload = request(service, "/detect?conf=0.5", jpeg(), "POST")
+    assert status == 200
+    assert payload["fire_detected"] is True
+    assert payload["detections"][0]["class"] == "fire"
+    assert payload["detections"][0]["box"] == [10, 10, 50, 60]
+    assert request(service, "/health")[1]["images_detected"] == 1
+
+
+def test_detect_rejects_non_image(start_service):
+    service = start_service()
+    assert request(service, "/detect", b"not an image", "POST")[0] == 400
+
+
+def test_rate_limit_by_address(start_service):
+    service = start_service(rate_limit=0.01, rate_burst=3)
+    for i in range(3):
+        assert request(service, "/health")[0] == 200
+    # A client id header does not buy a fresh limit
+    status, payload = request(service, "/health", headers={"X-Client-Id": "someone-else"})
+    assert status == 429
+    assert "Rate limit" in payload["error"]
+
+
+def test_rate_limit_buckets_are_bounded(start_service):
+    service = start_service(max_clients=2)
+    for client in ("10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4"):
+        service._take_token(client)
+    assert list(service._buckets) == ["10.0.0.3", "10.0.0.4"]
+
+
+@pytest.mark.parametrize("imgsz", [0, 100, -64, 4096, "320", True, 3.5])
+def test_add_stream_rejects_bad_imgsz(start_service, imgsz):
+    service = start_service()
+    body = json.dumps({"id": "cam", "source": "missing.mp4", "imgsz": imgsz}).encode()
+    status, payload = request(service, "/streams", body, "POST")
+    assert status == 400
+    assert "imgsz" in payload["error"]
+
+
+def test_events(start_service):
+    service = start_service()
+    ws = WebSocket(service.port)
+    try:
+        assert ws.receive() == {"type": "hello", "streams": {}}
+        # The multiplexer reports results from its scheduler thread
+        reporter = threading.Thread(target=lambda: [service._on_stream_result("cam", None, fire, "ok")
+                                                    for fire in (True, True, False)])
+        reporter.start()
+        reporter.join()
+        fire, safe = ws.receive(), ws.receive()
+        assert (fire["type"], fire["stream"]) == ("fire", "cam")
+        assert (safe["type"], safe["stream"]) == ("safe", "cam")
+    finally:
+        ws.close()
+
+    ws = WebSocket(service.port)
+    try:
+        assert ws.receive() == {"type": "hello", "streams": {"cam": {"fire_detected": False}}}
+    finally:
+        ws.close()
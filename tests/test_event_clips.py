@@ -0,0 +1,50 @@
+import time
+
+import cv2
+import numpy as np
+from event_clips import EventClipWriter
+
+
+def frame_count(path):
+    capture = cv2.VideoCapture(path)
+    try:
+        return int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        capture.release()
+
+
+def test_annotated_copy_keeps_every_frame(tmp_path, monkeypatch):
+    writer = EventClipWriter(str(tmp_path), annotated_copy=True, queue_size=2)
+    # An encoder much slower than detection: the queue is full almost all the time
+    handle_frame = writer._handle_frame
+    monkeypatch.setattr(writer, "_handle_frame", lambda *args: (time.sleep(0.005), handle_frame(*args)))
+    writer.start()
+    writer.open("videos/fire.mp4", 30)
+    frame = np.zeros((64, 96, 3), dtype=np.uint8)
+    for i in range(60):
+        writer.submit(frame.copy(), i / 30, False)
+    writer.close()
+    assert writer.frames_dropped == 0
+    assert frame_count(str(tmp_path / "fire_annotated.mp4")) == 60
+
+
+def test_live_sources_drop_instead_of_waiting(tmp_path):
+    writer = EventClipWriter(str(tmp_path), annotated_copy=True, queue_size=2)
+    writer.open(0, 30, live=True)
+    frame = np.zeros((64, 96, 3), dtype=np.uint8)
+    # No worker: the queue holds the open message and one frame
+    for i in range(5):
+        writer.submit(frame, i / 30, False)
+    assert writer.frames_dropped == 4
+
+
+def test_clips_in_the_same_second_get_distinct_names(tmp_path):
+    writer = EventClipWriter(str(tmp_path), pre_roll_s=0.0, post_roll_s=0.0)
+    writer.start()
+    writer.open(0, 30, live=True)
+    frame = np.zeros((64, 96, 3), dtype=np.uint8)
+    for fire_active in (True, False, True, False):
+        writer.submit(frame, time.monotonic(), fire_active)
+    writer.close()
+    assert len(writer.saved_clips) == 2
+    assert len(set(writer.saved_clips)) == 2
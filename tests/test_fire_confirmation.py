@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+from conftest import FakeModel
+from fire_confirmation import FireConfirmation, RAISED, CLEARED
+from fire_detection_logic import FireVideoProcessor
+
+# Frame times that are exact in binary floating point
+FPS = 8
+
+
+def replay(confirmation, scores, start=0.0):
+    """Feeds scores at FPS from start; returns [(frame, timestamp, event)] of the state changes."""
+    events = []
+    for i, score in enumerate(scores):
+        timestamp = start + i / FPS
+        event = confirmation.update(timestamp, score)
+        if event:
+            events.append((i, timestamp, event))
+    return events
+
+
+def test_raises_after_k_votes():
+    confirmation = FireConfirmation(window=8, votes_to_raise=5)
+    assert replay(confirmation, [0.9] * 10) == [(4, 0.5, RAISED)]
+    assert confirmation.active
+
+
+def test_raise_waits_for_hold_time():
+    confirmation = FireConfirmation(votes_to_raise=5, raise_hold_s=1.0)
+    (frame, timestamp, event), = replay(confirmation, [0.9] * 30)
+    # The conditions first hold on frame 4, so the alarm raises a second later
+    assert (frame, timestamp, event) == (4 + FPS, 1.5, RAISED)
+
+
+def test_clear_needs_low_votes_low_ema_and_hold():
+    confirmation = FireConfirmation(window=8, votes_to_raise=5, votes_to_clear=1, clear_hold_s=1.0)
+    replay(confirmation, [0.9] * 10)
+    events = replay(confirmation, [0.0] * 40, start=10 / FPS)
+    (frame, timestamp, event), = events
+    assert event == CLEARED
+    # Votes drop to 1 after 7 empty frames, the EMA below 0.2 after 9;
+    # then the clear condition must hold for clear_hold_s
+    assert (frame, timestamp) == (8 + FPS, 3.25)
+    assert not confirmation.active
+
+
+def test_hysteresis_between_thresholds():
+    confirmation = FireConfirmation(conf_thresh=0.5, clear_hold_s=0.0)
+    replay(confirmation, [0.9] * 10)
+    # One weak detection in every three frames: too few votes to raise, too many to clear
+    weak = [0.6, 0.0, 0.0] * 20
+    assert replay(confirmation, weak, start=10 / FPS) == []
+    assert confirmation.active
+
+    cold = FireConfirmation(conf_thresh=0.5, clear_hold_s=0.0)
+    assert replay(cold, weak) == []
+    assert not cold.active
+
+
+def test_alternating_frames_do_not_flap():
+    scores = [0.9, 0.0] * 50
+    confirmation = FireConfirmation(window=8, votes_to_raise=5)
+    assert replay(confirmation, scores) == []
+
+    confirmation = FireConfirmation(window=8, votes_to_raise=5)
+    replay(confirmation, [0.9] * 10)
+    assert replay(confirmation, scores, start=10 / FPS) == []
+    assert confirmation.active
+
+
+def test_replay_is_deterministic():
+    rng = np.random.default_rng(0)
+    scores = (rng.random(500) * (rng.random(500) > 0.4)).tolist()
+    first = replay(FireConfirmation(raise_hold_s=0.3), scores)
+    assert first
+    assert replay(FireConfirmation(raise_hold_s=0.3), scores) == first
+
+
+def test_thresholds_follow_conf_thresh():
+    confirmation = FireConfirmation(conf_thresh=0.2)
+    # Boxes just above a low slider setting still raise the alarm
+    assert replay(confirmation, [0.25] * 10)[0][2] == RAISED
+
+    confirmation.set_conf_thresh(0.6)
+    assert (confirmation.positive_conf, confirmation.raise_conf) == (0.6, pytest.approx(0.48))
+    assert confirmation.active
+
+    fixed = FireConfirmation(conf_thresh=0.2, raise_conf=0.5)
+    fixed.set_conf_thresh(0.3)
+    assert (fixed.positive_conf, fixed.raise_conf) == (0.3, 0.5)
+
+
+def test_processor_follows_slider():
+    processor = FireVideoProcessor(model=FakeModel(boxes=[(10, 10, 50, 60, 0.3, 0)]))
+    processor.enable_confirmation()
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    fire = [processor.process_frame(frame.copy(), conf_thresh=0.2, process_interval=1, timestamp=i / FPS)[1]
+            for i in range(10)]
+    assert fire == [False] * 4 + [True] * 6
+
+    # Slider moved above the detections: the model finds nothing and the alarm clears
+    fire = [processor.process_frame(frame.copy(), conf_thresh=0.5, process_interval=1, timestamp=1 + i / FPS)[1]
+            for i in range(30)]
+    assert fire[0] and not fire[-1]
+    assert processor.confirmation.conf_thresh == 0.5
+
+
+def test_flickering_tracks_do_not_raise():
+    model = FakeModel()
+    processor = FireVideoProcessor(model=model)
+    processor.enable_tracking()
+    processor.enable_confirmation()
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    corners = [(20, 20), (400, 300), (20, 300), (400, 20)]
+    fire = []
+    for i in range(40):
+        # A strong box in a different far-away spot on every inference: never one track for long
+        x, y = corners[i % len(corners)]
+        model.boxes = [(x, y, x + 40, y + 40, 0.9, 0)]
+        fire.append(processor.process_frame(frame.copy(), conf_thresh=0.5, process_interval=1,
+                                            timestamp=i / FPS)[1])
+    assert not any(fire)
+
+    # The same box held in place is one persistent track and raises the alarm
+    model.boxes = [(20, 20, 60, 60, 0.9, 0)]
+    fire = [processor.process_frame(frame.copy(), conf_thresh=0.5, process_interval=1, timestamp=5 + i / FPS)[1]
+            for i in range(10)]
+    assert fire[-1]
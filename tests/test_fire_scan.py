@@ -0,0 +1,38 @@
+import csv
+import json
+
+from fire_scan import ResultWriter, prune_results
+
+
+def result(path, error=None):
+    return {"path": path, "type": "image", "frames_scanned": 0 if error else 1, "detections": [],
+            "fire_detected": False, "first_fire_frame": None, "seconds": 0.1, "error": error}
+
+
+def write_results(path, output_format, results):
+    writer = ResultWriter(str(path), output_format)
+    for r in results:
+        writer.write(r)
+    writer.close()
+
+
+def test_prune_keeps_only_checkpointed_jsonl(tmp_path):
+    output = tmp_path / "results.jsonl"
+    write_results(output, "jsonl", [result("/a.jpg"), result("/b.jpg", "Could not decode image")])
+    prune_results(str(output), "jsonl", {"/a.jpg"})
+    assert [json.loads(line)["path"] for line in output.read_text().splitlines()] == ["/a.jpg"]
+
+
+def test_prune_keeps_the_csv_header(tmp_path):
+    output = tmp_path / "results.csv"
+    write_results(output, "csv", [result("/a.jpg", "Could not decode image"), result("/b.jpg")])
+    prune_results(str(output), "csv", {"/b.jpg"})
+    # A resumed run appends to the pruned file without a second header
+    write_results(output, "csv", [result("/a.jpg")])
+    with open(output, newline="") as f:
+        assert [row["path"] for row in csv.DictReader(f)] == ["/b.jpg", "/a.jpg"]
+
+
+def test_prune_without_output_is_a_no_op(tmp_path):
+    prune_results(str(tmp_path / "missing.jsonl"), "jsonl", set())
+    assert not (tmp_path / "missing.jsonl").exists()
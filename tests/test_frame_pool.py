@@ -0,0 +1,32 @@
+import numpy as np
+from frame_pool import FramePool
+
+SHAPE = (48, 64, 3)
+
+
+def test_buffers_are_reused_and_bounded():
+    pool = FramePool(count=2)
+    first, second = pool.acquire(SHAPE), pool.acquire(SHAPE)
+    assert pool.acquire(SHAPE) is None
+    assert pool.stats() == {"buffers": 2, "free": 0, "misses": 1}
+    pool.release(first)
+    pool.release(first)
+    assert pool.acquire(SHAPE) is first
+    assert pool.stats()["free"] == 0
+
+
+def test_foreign_frames_are_not_adopted():
+    pool = FramePool(count=1)
+    buffer = pool.acquire(SHAPE)
+    pool.release(np.empty(SHAPE, dtype=np.uint8))
+    pool.release(buffer[:10])
+    assert pool.stats()["free"] == 0
+
+
+def test_buffers_of_an_old_shape_are_dropped():
+    pool = FramePool(count=1)
+    old = pool.acquire(SHAPE)
+    assert pool.acquire((24, 32, 3)) is not None
+    # The camera changed resolution: the old buffer is no longer the pool's
+    pool.release(old)
+    assert pool.stats() == {"buffers": 1, "free": 0, "misses": 0}
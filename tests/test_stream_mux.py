@@ -0,0 +1,52 @@
+import threading
+
+import cv2
+import numpy as np
+from conftest import FakeModel
+from stream_mux import StreamMultiplexer, StreamState
+
+
+def write_video(path, frames=12):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 30, (96, 64))
+    frame = np.zeros((64, 96, 3), dtype=np.uint8)
+    frame[..., 0] = 255  # Blue in BGR
+    for _ in range(frames):
+        writer.write(frame)
+    writer.release()
+
+
+def test_frames_are_converted_only_when_polled(tmp_path):
+    write_video(tmp_path / "cam.mp4")
+    finished = threading.Event()
+    callback_frames = []
+
+    def on_result(stream_id, frame, fire_detected, status):
+        if status == "ok":
+            callback_frames.append(frame)
+        else:
+            finished.set()
+
+    mux = StreamMultiplexer(conf_thresh=0.5, process_interval=1, on_result=on_result,
+                            model=FakeModel(boxes=[]))
+    assert mux.add_stream("cam", str(tmp_path / "cam.mp4"), realtime=False)
+    mux.start()
+    try:
+        assert finished.wait(10)
+    finally:
+        mux.stop()
+    # Callbacks get the BGR frame as processed (the capture may skip ahead of the scheduler)
+    assert callback_frames
+    assert callback_frames[-1][0, 0, 0] > 200
+
+
+def test_get_result_returns_rgb():
+    mux = StreamMultiplexer(model=FakeModel())
+    frame = np.zeros((8, 8, 3), dtype=np.uint8)
+    frame[..., 0] = 255
+    mux.streams["cam"] = stream = StreamState("cam", 0, processor=None)
+    mux._publish(stream, (frame, True, "ok"))
+    frame_rgb, fire_detected, status = mux.get_result("cam")
+    assert frame_rgb[0, 0].tolist() == [0, 0, 255]
+    assert frame[0, 0].tolist() == [255, 0, 0]
+    assert (fire_detected, status) == (True, "ok")
+    assert mux.get_result("cam") is None